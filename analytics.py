@@ -0,0 +1,203 @@
+# analytics.py
+# Analisis riwayat peminjaman dengan pandas/NumPy (tanpa loop per baris).
+#
+# Riwayat dibaca per potongan dengan pd.read_sql(chunksize=...) dan langsung
+# dikonversi ke tipe ringkas: id -> int32, tanggal -> datetime64, status ->
+# category. Semua analisis dikerjakan di atas id (angka), nama siswa/buku/kelas
+# baru digabungkan ke hasil akhir yang kecil.
+#
+# Pemakaian CLI:
+#   python analytics.py
+#   python analytics.py --db salinan.db --top 20
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from database import DatabaseConnection, initialize_database
+from query_log import track
+
+CHUNK_SIZE = 200_000
+STATUS_CATEGORIES = ["dipinjam", "dikembalikan"]
+
+LOAN_HISTORY_SQL = """
+    SELECT p.id_peminjaman, p.id_siswa, p.id_buku, s.id_kelas,
+           p.tanggal_pinjam, p.tanggal_jatuh_tempo, p.tanggal_kembali, p.status
+    FROM peminjaman p
+    LEFT JOIN siswa s ON s.id_siswa = p.id_siswa
+"""
+
+
+def _convert_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Konversi satu potongan hasil query ke tipe ringkas"""
+    for column in ("id_peminjaman", "id_siswa", "id_buku"):
+        chunk[column] = chunk[column].astype(np.int32)
+    # id_kelas bisa NULL (siswa tanpa kelas) -> 0
+    chunk["id_kelas"] = chunk["id_kelas"].fillna(0).astype(np.int32)
+    for column in ("tanggal_pinjam", "tanggal_jatuh_tempo", "tanggal_kembali"):
+        chunk[column] = pd.to_datetime(chunk[column], format="%Y-%m-%d", errors="coerce")
+    chunk["status"] = pd.Categorical(chunk["status"].fillna("dipinjam"),
+                                     categories=STATUS_CATEGORIES)
+    return chunk
+
+
+def load_loan_history(chunk_size: int = CHUNK_SIZE) -> pd.DataFrame:
+    """Seluruh riwayat peminjaman sebagai DataFrame bertipe (dibaca per chunk)"""
+    with DatabaseConnection.connection() as conn, track(LOAN_HISTORY_SQL, (), conn) as measured:
+        chunks = [_convert_chunk(chunk)
+                  for chunk in pd.read_sql(LOAN_HISTORY_SQL, conn, chunksize=chunk_size)]
+        measured.rows = sum(len(chunk) for chunk in chunks)
+
+    if not chunks:
+        return _convert_chunk(pd.DataFrame({
+            "id_peminjaman": [], "id_siswa": [], "id_buku": [], "id_kelas": [],
+            "tanggal_pinjam": [], "tanggal_jatuh_tempo": [], "tanggal_kembali": [],
+            "status": [],
+        }))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _lookup(sql: str) -> pd.Series:
+    """Tabel kecil id -> nama untuk melabeli hasil agregasi"""
+    with DatabaseConnection.connection() as conn, track(sql, (), conn) as measured:
+        df = pd.read_sql(sql, conn)
+        measured.rows = len(df)
+    return df.set_index(df.columns[0])[df.columns[1]]
+
+
+# =====================================================
+# ANALISIS
+# =====================================================
+def borrowing_frequency(loans: pd.DataFrame, freq: str = "M") -> pd.Series:
+    """Jumlah peminjaman per periode (M = bulan, W = minggu, D = hari)"""
+    periods = loans["tanggal_pinjam"].dt.to_period(freq)
+    return periods.value_counts(sort=False).sort_index().rename("jumlah")
+
+
+def loan_durations(loans: pd.DataFrame) -> pd.Series:
+    """Lama pinjam (hari) untuk peminjaman yang sudah dikembalikan"""
+    returned = loans["status"].eq("dikembalikan").to_numpy() & loans["tanggal_kembali"].notna().to_numpy()
+    days = (loans["tanggal_kembali"].to_numpy()[returned]
+            - loans["tanggal_pinjam"].to_numpy()[returned]) // np.timedelta64(1, "D")
+    return pd.Series(days, name="lama_hari")
+
+
+def duration_distribution(loans: pd.DataFrame, max_days: int = 30) -> dict:
+    """Ringkasan dan histogram lama pinjam (hari ke-`max_days` ke atas digabung)"""
+    days = loan_durations(loans).to_numpy()
+    if days.size == 0:
+        return {"count": 0, "mean": None, "median": None, "p90": None,
+                "histogram": pd.Series(dtype=np.int64, name="jumlah")}
+
+    counts = np.bincount(np.clip(days, 0, max_days), minlength=max_days + 1)
+    labels = [str(d) for d in range(max_days)] + [f"{max_days}+"]
+    return {
+        "count": int(days.size),
+        "mean": float(days.mean()),
+        "median": float(np.median(days)),
+        "p90": float(np.percentile(days, 90)),
+        "histogram": pd.Series(counts, index=labels, name="jumlah"),
+    }
+
+
+def class_activity(loans: pd.DataFrame, as_of=None) -> pd.DataFrame:
+    """Aktivitas per kelas: jumlah pinjam, siswa aktif, pinjaman berjalan, terlambat"""
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.now().normalize()
+    active = loans["status"].eq("dipinjam")
+    overdue = active & (loans["tanggal_jatuh_tempo"] < as_of)
+    late_return = loans["tanggal_kembali"] > loans["tanggal_jatuh_tempo"]
+
+    grouped = loans.assign(aktif=active, terlambat=overdue, kembali_terlambat=late_return) \
+        .groupby("id_kelas", sort=False)
+    result = pd.DataFrame({
+        "jumlah_pinjam": grouped.size(),
+        "siswa_meminjam": grouped["id_siswa"].nunique(),
+        "sedang_dipinjam": grouped["aktif"].sum(),
+        "terlambat": grouped["terlambat"].sum(),
+        "kembali_terlambat": grouped["kembali_terlambat"].sum(),
+    })
+    result["pinjam_per_siswa"] = (result["jumlah_pinjam"] / result["siswa_meminjam"]).round(2)
+
+    names = _lookup("SELECT id_kelas, nama_kelas FROM kelas")
+    result.insert(0, "nama_kelas", result.index.map(names).fillna("(tanpa kelas)"))
+    return result.sort_values("jumlah_pinjam", ascending=False).reset_index()
+
+
+def book_popularity(loans: pd.DataFrame, top: int = 20) -> pd.DataFrame:
+    """Buku paling sering dipinjam beserta jumlah peminjam unik"""
+    ids = loans["id_buku"].to_numpy()
+    if ids.size == 0:
+        return pd.DataFrame(columns=["id_buku", "kode_buku", "nama_buku", "jumlah", "peminjam_unik"])
+
+    counts = np.bincount(ids)
+    top_ids = np.argsort(counts)[::-1][:top]
+    top_ids = top_ids[counts[top_ids] > 0]
+
+    subset = loans.loc[np.isin(ids, top_ids), ["id_buku", "id_siswa"]]
+    unique_borrowers = subset.drop_duplicates().groupby("id_buku").size()
+
+    result = pd.DataFrame({"id_buku": top_ids, "jumlah": counts[top_ids]})
+    result["peminjam_unik"] = result["id_buku"].map(unique_borrowers).astype(np.int64)
+
+    placeholders = ",".join("?" * len(top_ids))
+    sql = f"SELECT id_buku, kode_buku, nama_buku FROM buku WHERE id_buku IN ({placeholders})"
+    params = [int(i) for i in top_ids]
+    with DatabaseConnection.connection() as conn, track(sql, params, conn) as measured:
+        books = pd.read_sql(sql, conn, params=params)
+        measured.rows = len(books)
+    result = result.merge(books, on="id_buku", how="left")
+    return result[["id_buku", "kode_buku", "nama_buku", "jumlah", "peminjam_unik"]]
+
+
+def summarize(loans: pd.DataFrame, top: int = 20) -> dict:
+    """Semua analisis sekaligus (dipakai dashboard dan CLI)"""
+    return {
+        "rows": len(loans),
+        "frequency": borrowing_frequency(loans),
+        "duration": duration_distribution(loans),
+        "classes": class_activity(loans),
+        "books": book_popularity(loans, top),
+    }
+
+
+# =====================================================
+# CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis riwayat peminjaman")
+    parser.add_argument("--db", default=None, help="path database (default: perpustakaan_final.db)")
+    parser.add_argument("--top", type=int, default=20, help="jumlah buku terpopuler")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        DatabaseConnection.configure(args.db)
+    initialize_database()
+
+    started = time.perf_counter()
+    loans = load_loan_history(args.chunk_size)
+    loaded = time.perf_counter()
+    result = summarize(loans, args.top)
+    finished = time.perf_counter()
+
+    print(f"✓ [ANALITIK] {result['rows']} peminjaman "
+          f"({loans.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB), "
+          f"baca {loaded - started:.2f} detik, analisis {finished - loaded:.2f} detik")
+    duration = result["duration"]
+    if duration["count"]:
+        print(f"  Lama pinjam: rata-rata {duration['mean']:.1f} hari, "
+              f"median {duration['median']:.0f}, p90 {duration['p90']:.0f}")
+    print("\nPeminjaman per bulan:")
+    print(result["frequency"].tail(12).to_string())
+    print("\nAktivitas per kelas:")
+    print(result["classes"].head(20).to_string(index=False))
+    print("\nBuku terpopuler:")
+    print(result["books"].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
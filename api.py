@@ -0,0 +1,316 @@
+# api.py
+# REST API (JSON) untuk scanner, kiosk dan sistem sekolah lain.
+#
+# Memakai model dan LoanService yang sama dengan UI Streamlit (models.py),
+# connection pool database.py dan cache query_cache.py, tanpa overhead rerun
+# Streamlit per permintaan.
+#
+#   POST /api/login                    {"username", "password"} -> token
+#   GET  /api/buku?q=&cursor=&limit=   daftar / cari buku
+#   GET  /api/buku/<kode_buku>
+#   GET  /api/siswa?q=&cursor=&limit=  daftar / cari siswa
+#   GET  /api/siswa/<kode_siswa>
+#   GET  /api/peminjaman?status=&cursor=&limit=
+#   GET  /api/peminjaman/aktif
+#   GET  /api/peminjaman/terlambat?tanggal=
+#   GET  /api/statistik
+#   POST /api/peminjaman               {"kode_siswa", "kode_buku"} atau
+#                                      {"nama_siswa", "nama_kelas", "kode_buku"}
+#   POST /api/pengembalian             {"kode_buku"} atau {"id_peminjaman"}
+#
+# Semua endpoint kecuali login butuh header "Authorization: Bearer <token>".
+# Respons GET memakai ETag: klien yang mengirim If-None-Match dengan ETag
+# yang sama mendapat 304 tanpa body.
+#
+# Pemakaian:
+#   python api.py --port 8000
+#   waitress-serve --port=8000 --call api:create_app     (produksi, multi-thread)
+
+import argparse
+import os
+import secrets
+import sys
+from datetime import datetime
+from functools import wraps
+
+from flask import Flask, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+import query_log
+from database import DatabaseConnection, initialize_database
+from migrations import MigrationError
+from models import (PAGE_SIZE, BukuModel, LoanError, LoanService, PeminjamanModel,
+                    SiswaModel, StatistikModel, UserModel)
+
+TOKEN_MAX_AGE = 12 * 60 * 60       # detik
+MAX_PAGE_SIZE = 500
+
+
+class ApiError(Exception):
+    """Permintaan ditolak; dikirim ke klien sebagai {"error": message}"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _records(df) -> list:
+    """DataFrame -> list of dict dengan tipe Python biasa (NaN -> null)"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def _page(result: dict, key: str) -> dict:
+    """Hasil keyset pagination model -> JSON dengan cursor halaman berikutnya"""
+    rows = _records(result["data"])
+    return {
+        "data": rows,
+        "has_next": result["has_next"],
+        "has_prev": result["has_prev"],
+        "next_cursor": rows[-1][key] if rows and result["has_next"] else None,
+        "prev_cursor": rows[0][key] if rows and result["has_prev"] else None,
+    }
+
+
+def _int_arg(name: str, default=None, maximum: int = None, minimum: int = 0):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(f"Parameter {name} harus angka")
+    if number < minimum or (maximum is not None and number > maximum):
+        batas = f"{minimum}-{maximum}" if maximum is not None else f"minimal {minimum}"
+        raise ApiError(f"Parameter {name} di luar batas ({batas})")
+    return number
+
+
+def _page_args() -> dict:
+    """cursor / direction / limit dari query string untuk method get_page model"""
+    direction = request.args.get("direction", "next")
+    if direction not in ("next", "prev"):
+        raise ApiError("direction harus next atau prev")
+    return {"cursor": _int_arg("cursor"), "direction": direction,
+            "page_size": _int_arg("limit", PAGE_SIZE, MAX_PAGE_SIZE, minimum=1)}
+
+
+def _json_body() -> dict:
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ApiError("Body harus objek JSON")
+    return data
+
+
+def _tanggal(value: str = None) -> str:
+    if not value:
+        return datetime.now().strftime("%Y-%m-%d")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ApiError("Format tanggal harus YYYY-MM-DD")
+
+
+def create_app(db_path: str = None, secret_key: str = None) -> Flask:
+    """Buat aplikasi Flask (juga dipakai server WSGI: api:create_app)"""
+    if db_path:
+        DatabaseConnection.configure(db_path)
+    initialize_database()
+
+    app = Flask(__name__)
+    app.json.sort_keys = False
+    app.json.ensure_ascii = False
+
+    secret_key = secret_key or os.environ.get("API_SECRET_KEY")
+    if not secret_key:
+        # Token tidak berlaku lagi setelah restart / di proses lain
+        print("⚠ [API] API_SECRET_KEY tidak diisi, memakai kunci acak per proses")
+        secret_key = secrets.token_hex(32)
+    tokens = URLSafeTimedSerializer(secret_key, salt="perpustakaan-api")
+
+    def login_required(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            header = request.headers.get("Authorization", "")
+            scheme, _, token = header.partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                raise ApiError("Token tidak ada (Authorization: Bearer <token>)", 401)
+            try:
+                g.admin = tokens.loads(token, max_age=TOKEN_MAX_AGE)
+            except SignatureExpired:
+                raise ApiError("Token kedaluwarsa, login ulang", 401)
+            except BadSignature:
+                raise ApiError("Token tidak valid", 401)
+            return view(*args, **kwargs)
+        return wrapper
+
+    # ------------------------------------------------------------
+    # Error & ETag
+    # ------------------------------------------------------------
+    @app.errorhandler(ApiError)
+    def handle_api_error(e):
+        return jsonify(error=str(e)), e.status
+
+    @app.errorhandler(LoanError)
+    def handle_loan_error(e):
+        return jsonify(error=str(e)), 409
+
+    @app.errorhandler(404)
+    def handle_not_found(e):
+        return jsonify(error="Tidak ditemukan"), 404
+
+    @app.errorhandler(405)
+    def handle_method_not_allowed(e):
+        return jsonify(error="Method tidak diizinkan"), 405
+
+    @app.before_request
+    def begin_query_log():
+        # Query per permintaan (slow-query log dan deteksi N+1 seperti per rerun UI)
+        query_log.begin_run(f"API {request.method} {request.path}")
+
+    @app.teardown_request
+    def end_query_log(exc):
+        query_log.end_run()
+
+    @app.after_request
+    def conditional_get(response):
+        # ETag dari isi respons: data yang sama -> 304 tanpa body
+        if request.method == "GET" and response.status_code == 200 and response.is_json:
+            response.add_etag()
+            response.headers["Cache-Control"] = "no-cache"
+            response.make_conditional(request)
+        return response
+
+    # ------------------------------------------------------------
+    # Autentikasi
+    # ------------------------------------------------------------
+    @app.post("/api/login")
+    def login():
+        data = _json_body()
+        user = UserModel.authenticate(str(data.get("username", "")), str(data.get("password", "")))
+        if not user:
+            raise ApiError("Username atau password salah", 401)
+        return jsonify(token=tokens.dumps(user), admin=user, expires_in=TOKEN_MAX_AGE)
+
+    # ------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------
+    @app.get("/api/buku")
+    @login_required
+    def list_buku():
+        keyword = request.args.get("q", "").strip()
+        if keyword:
+            return jsonify(data=_records(BukuModel.search(keyword)))
+        return jsonify(_page(BukuModel.get_page(**_page_args()), "id_buku"))
+
+    @app.get("/api/buku/<kode_buku>")
+    @login_required
+    def get_buku(kode_buku):
+        buku = BukuModel.get_by_kode(kode_buku)
+        if not buku:
+            raise ApiError(f"Buku tidak ditemukan: {kode_buku}", 404)
+        return jsonify(buku)
+
+    @app.get("/api/siswa")
+    @login_required
+    def list_siswa():
+        keyword = request.args.get("q", "").strip()
+        if keyword:
+            return jsonify(data=_records(SiswaModel.search(keyword)))
+        return jsonify(_page(SiswaModel.get_page(**_page_args()), "id_siswa"))
+
+    @app.get("/api/siswa/<kode_siswa>")
+    @login_required
+    def get_siswa(kode_siswa):
+        siswa = SiswaModel.get_by_kode(kode_siswa)
+        if not siswa:
+            raise ApiError(f"Kartu siswa tidak dikenal: {kode_siswa}", 404)
+        return jsonify(siswa)
+
+    @app.get("/api/peminjaman")
+    @login_required
+    def list_peminjaman():
+        status = request.args.get("status", "ALL")
+        if status not in ("ALL", "dipinjam", "dikembalikan"):
+            raise ApiError("status harus ALL, dipinjam atau dikembalikan")
+        return jsonify(_page(PeminjamanModel.get_page(status, **_page_args()), "id_peminjaman"))
+
+    @app.get("/api/peminjaman/aktif")
+    @login_required
+    def active_loans():
+        return jsonify(data=_records(PeminjamanModel.get_active_loans()))
+
+    @app.get("/api/peminjaman/terlambat")
+    @login_required
+    def overdue_loans():
+        df = PeminjamanModel.get_overdue(_tanggal(request.args.get("tanggal")))
+        return jsonify(data=_records(df), total_denda=int(df["denda"].sum()) if len(df) else 0)
+
+    @app.get("/api/statistik")
+    @login_required
+    def statistik():
+        return jsonify(StatistikModel.get_status_counts())
+
+    # ------------------------------------------------------------
+    # Transaksi
+    # ------------------------------------------------------------
+    @app.post("/api/peminjaman")
+    @login_required
+    def checkout():
+        data = _json_body()
+        kode_buku = str(data.get("kode_buku") or "").strip()
+        if not kode_buku:
+            raise ApiError("kode_buku harus diisi")
+        tanggal_pinjam = _tanggal(data.get("tanggal_pinjam"))
+
+        if data.get("kode_siswa"):
+            hasil = LoanService.checkout_by_codes(str(data["kode_siswa"]).strip(), kode_buku,
+                                                  tanggal_pinjam, g.admin["id"])
+        elif data.get("nama_siswa") and data.get("nama_kelas"):
+            hasil = LoanService.checkout(str(data["nama_siswa"]).strip(),
+                                         str(data["nama_kelas"]).strip(), kode_buku,
+                                         tanggal_pinjam, g.admin["id"])
+        else:
+            raise ApiError("Isi kode_siswa, atau nama_siswa dan nama_kelas")
+        return jsonify(hasil), 201
+
+    @app.post("/api/pengembalian")
+    @login_required
+    def return_book():
+        data = _json_body()
+        if data.get("kode_buku"):
+            hasil = LoanService.return_by_kode_buku(str(data["kode_buku"]).strip())
+        elif data.get("id_peminjaman") is not None:
+            try:
+                id_peminjaman = int(data["id_peminjaman"])
+            except (TypeError, ValueError):
+                raise ApiError("id_peminjaman harus angka")
+            hasil = LoanService.return_by_id(id_peminjaman)
+        else:
+            raise ApiError("Isi kode_buku atau id_peminjaman")
+        return jsonify(hasil)
+
+    return app
+
+
+# =====================================================
+# CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="REST API perpustakaan (server Flask)")
+    parser.add_argument("--db", default=None, help="path database (default: perpustakaan_final.db)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    try:
+        app = create_app(args.db)
+    except MigrationError as e:
+        print(f"✗ [API] Migrasi database gagal: {e}")
+        return 1
+    print(f"✓ [API] http://{args.host}:{args.port}/api")
+    app.run(host=args.host, port=args.port, threaded=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,25 @@
 import streamlit as st
-import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+import functools
 import pandas as pd
 import os
-from typing import Optional, Dict, List
-import base64
+from typing import Optional, Dict
+
+import autocomplete
+import profiler
+import query_log
+from assets import get_image_url, prepare_assets
+from bulk_import import BulkImportError, errors_to_csv, import_file
+from database import (DB_PATH, DatabaseConnection, get_database_settings, initialize_database,
+                      maybe_optimize)
+from export import FORMATS, export_bytes, export_filename
+from migrations import MigrationError
+from models import (DENDA_PER_HARI, LAMA_PINJAM_HARI, PAGE_SIZE, BukuModel, KelasModel,
+                    LoanError, LoanService, PeminjamanModel, SiswaModel, StatistikModel,
+                    UserModel)
+from query_cache import on_tables_changed, query_cache, watch_external_changes
+from scanner import ScanError, decode_image, normalize_code
 
 # =====================================================
 # KONFIGURASI HALAMAN
@@ -95,23 +110,22 @@ st.markdown("""
 # =====================================================
 # HELPER UNTUK GAMBAR
 # =====================================================
-def get_base64_image(image_path):
-    """Convert image to base64"""
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except:
-        return None
+BACKGROUND_IMAGES = ["sman47.jpeg", "logo1.jpeg"]
 
 def set_background_image(image_path, opacity=0.13):
-    """Set background image halaman login"""
-    base64_img = get_base64_image(image_path)
-    if base64_img:
+    """Set background image halaman login
+    
+    Gambar dioptimasi sekali per proses (assets.py) dan dirujuk lewat URL,
+    jadi tiap rerun hanya mengirim CSS pendek.
+    """
+    with profiler.phase("gambar background"):
+        image_url = get_image_url(image_path)
+    if image_url:
         st.markdown(f"""
         <style>
         .stApp {{
             background: linear-gradient(rgba(255,255,255,{opacity}), rgba(255,255,255,{opacity})),
-                        url("data:image/png;base64,{base64_img}");
+                        url("{image_url}");
             background-size: cover;
             background-position: center;
             background-repeat: no-repeat;
@@ -121,270 +135,51 @@ def set_background_image(image_path, opacity=0.13):
         """, unsafe_allow_html=True)
 
 # =====================================================
-# KONFIGURASI DATABASE
+# SINKRONISASI VPS (opsional, aktif jika VPS_HOST diisi)
 # =====================================================
-DB_PATH = "perpustakaan_final.db"
-
-# =====================================================
-# LAYER 1: DATABASE CONNECTION & MODELS
-# =====================================================
-class DatabaseConnection:
-    """Singleton Database Connection"""
-    _instance = None
-    
-    @classmethod
-    def get_connection(cls):
-        return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-class BaseModel:
-    """Base Model untuk semua entitas"""
-    
-    @staticmethod
-    def execute_query(query: str, params: tuple = (), fetch_one: bool = False):
-        conn = DatabaseConnection.get_connection()
-        cur = conn.cursor()
-        cur.execute(query, params)
-        
-        if query.strip().upper().startswith("SELECT"):
-            return cur.fetchone() if fetch_one else cur.fetchall()
-        else:
-            conn.commit()
-            return cur.lastrowid
-
-class UserModel(BaseModel):
-    """Model untuk User/Admin"""
-    
-    @staticmethod
-    def authenticate(username: str, password: str) -> Optional[Dict]:
-        result = BaseModel.execute_query(
-            "SELECT id_user, username FROM user WHERE username = ? AND password = ?",
-            (username, password),
-            fetch_one=True
-        )
-        if result:
-            return {"id": result[0], "username": result[1]}
+@st.cache_resource
+def get_vps_sync():
+    """Satu worker sync per proses; setiap penulisan memicu sync (debounced)"""
+    if not os.environ.get("VPS_HOST"):
         return None
-
-class KelasModel(BaseModel):
-    """Model untuk Kelas"""
-    
-    @staticmethod
-    def get_all() -> List[Dict]:
-        results = BaseModel.execute_query(
-            "SELECT id_kelas, nama_kelas FROM kelas ORDER BY id_kelas"
-        )
-        return [{"id": r[0], "nama": r[1]} for r in results]
-    
-    @staticmethod
-    def get_or_create(nama_kelas: str) -> str:
-        result = BaseModel.execute_query(
-            "SELECT id_kelas FROM kelas WHERE nama_kelas = ?",
-            (nama_kelas,),
-            fetch_one=True
-        )
-        if result:
-            return result[0]
-        else:
-            return BaseModel.execute_query(
-                "INSERT INTO kelas (nama_kelas) VALUES (?)",
-                (nama_kelas,)
-            )
-    
-    @staticmethod
-    def create(id_kelas: str, nama_kelas: str) -> int:
-        return BaseModel.execute_query(
-            "INSERT INTO kelas (id_kelas, nama_kelas) VALUES (?, ?)",
-            (id_kelas, nama_kelas)
-        )
-    
-    @staticmethod
-    def delete(id_kelas: str) -> bool:
-        BaseModel.execute_query(
-            "DELETE FROM kelas WHERE id_kelas = ?",
-            (id_kelas,)
-        )
-        return True
-
-class SiswaModel(BaseModel):
-    """Model untuk Siswa"""
-    
-    @staticmethod
-    def get_all() -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        df = pd.read_sql("""
-            SELECT s.id_siswa, s.nama_siswa, k.nama_kelas
-            FROM siswa s
-            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
-            ORDER BY s.id_siswa
-        """, conn)
-        return df
-    
-    @staticmethod
-    def search(keyword: str) -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        df = pd.read_sql("""
-            SELECT s.id_siswa, s.nama_siswa, k.nama_kelas
-            FROM siswa s
-            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
-            WHERE s.nama_siswa LIKE ?
-        """, conn, params=(f"%{keyword}%",))
-        return df
-    
-    @staticmethod
-    def get_or_create(nama_siswa: str, id_kelas: str) -> int:
-        result = BaseModel.execute_query(
-            "SELECT id_siswa FROM siswa WHERE nama_siswa = ? AND id_kelas = ?",
-            (nama_siswa, id_kelas),
-            fetch_one=True
-        )
-        if result:
-            return result[0]
-        else:
-            return BaseModel.execute_query(
-                "INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)",
-                (nama_siswa, id_kelas)
-            )
     
-    @staticmethod
-    def create(nama_siswa: str, id_kelas: str) -> int:
-        return BaseModel.execute_query(
-            "INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)",
-            (nama_siswa, id_kelas)
-        )
-    
-    @staticmethod
-    def delete(id_siswa: int) -> bool:
-        BaseModel.execute_query(
-            "DELETE FROM siswa WHERE id_siswa = ?",
-            (id_siswa,)
-        )
-        return True
+    from vps_sync import config_from_env, create_vps_sync
+    config = config_from_env()
+    manager = create_vps_sync(config["host"], config["user"], config["password"])
+    manager.start_background_sync(DB_PATH, config["remote_path"], backup_dir=config["backup_dir"])
+    on_tables_changed(lambda tables: manager.request_sync())
+    # Penulisan dari proses lain (REST API, import CLI) juga memicu sync
+    watch_external_changes()
+    return manager
 
-class BukuModel(BaseModel):
-    """Model untuk Buku"""
-    
-    @staticmethod
-    def get_all() -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        df = pd.read_sql(
-            "SELECT id_buku, kode_buku, nama_buku FROM buku ORDER BY id_buku",
-            conn
-        )
-        return df
-    
-    @staticmethod
-    def get_by_kode(kode_buku: str) -> Optional[Dict]:
-        result = BaseModel.execute_query(
-            "SELECT id_buku, kode_buku, nama_buku FROM buku WHERE kode_buku = ?",
-            (kode_buku,),
-            fetch_one=True
-        )
-        if result:
-            return {"id": result[0], "kode": result[1], "nama": result[2]}
-        return None
-    
-    @staticmethod
-    def search(keyword: str) -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        df = pd.read_sql("""
-            SELECT id_buku, kode_buku, nama_buku 
-            FROM buku 
-            WHERE nama_buku LIKE ? OR kode_buku LIKE ?
-        """, conn, params=(f"%{keyword}%", f"%{keyword}%"))
-        return df
-    
-    @staticmethod
-    def get_or_create(kode_buku: str, nama_buku: str) -> int:
-        result = BaseModel.execute_query(
-            "SELECT id_buku FROM buku WHERE kode_buku = ?",
-            (kode_buku,),
-            fetch_one=True
-        )
-        if result:
-            BaseModel.execute_query(
-                "UPDATE buku SET nama_buku = ? WHERE id_buku = ?",
-                (nama_buku, result[0])
-            )
-            return result[0]
-        else:
-            return BaseModel.execute_query(
-                "INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)",
-                (kode_buku, nama_buku)
-            )
-    
-    @staticmethod
-    def create(kode_buku: str, nama_buku: str) -> int:
-        return BaseModel.execute_query(
-            "INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)",
-            (kode_buku, nama_buku)
-        )
-    
-    @staticmethod
-    def delete(kode_buku: str) -> bool:
-        BaseModel.execute_query(
-            "DELETE FROM buku WHERE kode_buku = ?",
-            (kode_buku,)
-        )
-        return True
-
-class PeminjamanModel(BaseModel):
-    """Model untuk Peminjaman"""
-    
-    @staticmethod
-    def get_all(status_filter: str = "ALL") -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        if status_filter == "ALL":
-            df = pd.read_sql("""
-                SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku,
-                       p.tanggal_pinjam, p.tanggal_kembali, p.status
-                FROM peminjaman p
-                JOIN siswa s ON p.id_siswa = s.id_siswa
-                JOIN buku b ON p.id_buku = b.id_buku
-                ORDER BY p.id_peminjaman DESC
-            """, conn)
-        else:
-            df = pd.read_sql("""
-                SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku,
-                       p.tanggal_pinjam, p.tanggal_kembali, p.status
-                FROM peminjaman p
-                JOIN siswa s ON p.id_siswa = s.id_siswa
-                JOIN buku b ON p.id_buku = b.id_buku
-                WHERE p.status = ?
-                ORDER BY p.id_peminjaman DESC
-            """, conn, params=(status_filter,))
-        return df
-    
-    @staticmethod
-    def get_active_loans() -> pd.DataFrame:
-        conn = DatabaseConnection.get_connection()
-        df = pd.read_sql("""
-            SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku, b.kode_buku, p.tanggal_pinjam
-            FROM peminjaman p
-            JOIN siswa s ON p.id_siswa = s.id_siswa
-            JOIN buku b ON p.id_buku = b.id_buku
-            WHERE p.status = 'dipinjam'
-            ORDER BY p.id_peminjaman DESC
-        """, conn)
-        return df
-    
-    @staticmethod
-    def create(id_siswa: int, id_buku: int, tanggal_pinjam: str, admin_id: int) -> int:
-        return BaseModel.execute_query("""
-            INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, status, id_admin)
-            VALUES (?, ?, ?, 'dipinjam', ?)
-        """, (id_siswa, id_buku, tanggal_pinjam, admin_id))
-    
-    @staticmethod
-    def return_book(id_peminjaman: int) -> bool:
-        BaseModel.execute_query("""
-            UPDATE peminjaman 
-            SET tanggal_kembali = ?, status = 'dikembalikan' 
-            WHERE id_peminjaman = ?
-        """, (datetime.now().strftime("%Y-%m-%d"), id_peminjaman))
-        return True
+def vps_backup_panel(vps_sync):
+    """Daftar generasi backup di VPS dan restore ke database lokal"""
+    with st.expander("🗂️ Backup VPS"):
+        # Daftar diambil lewat SSH: hanya saat diminta, bukan di setiap rerun
+        if st.button("Muat daftar backup", key="vps_muat_backup"):
+            st.session_state.vps_generations = vps_sync.list_generations(vps_sync.backup_dir)
+        generations = st.session_state.get("vps_generations")
+        if generations is None:
+            return
+        if not generations:
+            st.caption("Belum ada backup")
+            return
+        
+        sizes = {g["id"]: g["size"] for g in generations}
+        pilihan = st.selectbox("Generasi", list(sizes), key="vps_generasi",
+                               format_func=lambda g: f"{g} ({sizes[g] / 1024:.0f} KB)")
+        yakin = st.checkbox("Timpa database lokal dengan backup ini", key="vps_restore_yakin")
+        if st.button("♻️ Restore", disabled=not yakin, key="vps_restore"):
+            with st.spinner("Memulihkan database..."):
+                ok = vps_sync.restore_generation(vps_sync.backup_dir, pilihan, DB_PATH)
+            if ok:
+                st.success(f"✅ Database dipulihkan dari backup {pilihan}")
+            else:
+                st.error("❌ Restore gagal, lihat log server")
 
 # =====================================================
 # LAYER 2: AUTHENTICATION SERVICE
+# (model dan LoanService ada di models.py, dipakai bersama REST API)
 # =====================================================
 class AuthService:
     """Service untuk autentikasi"""
@@ -427,6 +222,251 @@ def show_header():
     </div>
     """, unsafe_allow_html=True)
 
+@contextmanager
+def instrumented_rerun(page: str = ""):
+    """Kumpulkan query untuk Diagnostik (dan profil jika diaktifkan) selama satu rerun"""
+    query_log.begin_run(page)
+    if st.session_state.get("profiler_aktif"):
+        profiler.start(page)
+    try:
+        yield
+    finally:
+        st.session_state.query_run = query_log.end_run()
+        profil = profiler.finish(st.session_state.query_run)
+        if profil:
+            riwayat = st.session_state.get("profil_riwayat", [])
+            st.session_state.profil_riwayat = (riwayat + [profil])[-profiler.HISTORY_SIZE:]
+
+def page_fragment(func):
+    """Bagian halaman sebagai st.fragment: interaksi widget di dalamnya hanya
+    menjalankan ulang fungsi ini, tanpa membangun dan mengirim ulang CSS,
+    background, header, sidebar dan bagian halaman lain.
+    
+    Rerun fragment tetap tercatat di Diagnostik dan profiler.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if query_log.in_run():
+            # Dipanggil sebagai bagian dari rerun penuh
+            return func(*args, **kwargs)
+        with instrumented_rerun(f"{func.__name__} (fragment)"), profiler.phase("halaman"):
+            return func(*args, **kwargs)
+    
+    return st.fragment(wrapper)
+
+def _set_page(state_key: str, cursor, direction: str, page: int):
+    st.session_state[state_key] = {"cursor": cursor, "direction": direction, "page": page}
+
+def reset_pagination(state_key: str):
+    st.session_state.pop(state_key, None)
+
+def paginated_table(state_key: str, fetch_page, total_estimate: int, key_column: str,
+                    empty_message: str):
+    """Tabel dengan tombol Sebelumnya/Berikutnya (keyset pagination).
+    
+    Hanya satu halaman yang diambil dari database dan dikirim ke browser.
+    """
+    state = st.session_state.get(state_key) or {"cursor": None, "direction": "next", "page": 1}
+    page_size = st.session_state.get(f"{state_key}_size", PAGE_SIZE)
+    result = fetch_page(cursor=state["cursor"], direction=state["direction"],
+                        page_size=page_size)
+    df = result["data"]
+    
+    if df.empty:
+        if state["page"] > 1:
+            # Halaman kosong karena data berubah, kembali ke awal
+            reset_pagination(state_key)
+            st.rerun()
+        st.info(empty_message)
+        return
+    
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    
+    first_key = int(df[key_column].iloc[0])
+    last_key = int(df[key_column].iloc[-1])
+    total_pages = max(1, -(-total_estimate // page_size))
+    
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+    with col1:
+        st.button("◀ Sebelumnya", key=f"{state_key}_prev", use_container_width=True,
+                  disabled=not result["has_prev"],
+                  on_click=_set_page,
+                  args=(state_key, first_key, "prev", max(1, state["page"] - 1)))
+    with col2:
+        st.caption(f"Halaman {state['page']} dari ±{total_pages} (±{total_estimate} baris)")
+    with col3:
+        st.selectbox("Baris per halaman", [25, 50, 100, 200], index=1,
+                     key=f"{state_key}_size", label_visibility="collapsed",
+                     on_change=reset_pagination, args=(state_key,))
+    with col4:
+        st.button("Berikutnya ▶", key=f"{state_key}_next", use_container_width=True,
+                  disabled=not result["has_next"],
+                  on_click=_set_page,
+                  args=(state_key, last_key, "next", state["page"] + 1))
+
+def import_section(entity: str, columns_help: str):
+    """Expander upload CSV/Excel untuk import massal"""
+    with st.expander(f"📥 IMPORT {entity.upper()} DARI CSV / EXCEL"):
+        st.caption(f"Kolom yang dibutuhkan: {columns_help}")
+        uploaded = st.file_uploader("Pilih file", type=["csv", "xlsx"],
+                                    key=f"upload_{entity}")
+        
+        if uploaded and st.button("IMPORT", key=f"import_{entity}", use_container_width=True):
+            progress_bar = st.progress(0.0, text="Memproses...")
+            
+            def update_progress(fraction, rows):
+                progress_bar.progress(fraction, text=f"{rows} baris diproses")
+            
+            try:
+                result = import_file(uploaded, uploaded.name, entity, update_progress)
+            except BulkImportError as e:
+                st.error(f"❌ {e}")
+                return
+            except Exception as e:
+                st.error(f"❌ Import dibatalkan, tidak ada data yang disimpan: {e}")
+                return
+            
+            progress_bar.progress(1.0, text="Selesai")
+            st.success(
+                f"✅ {result['valid']} baris valid, {result['changed']} baris baru/berubah "
+                f"({result['seconds']:.1f} detik)"
+            )
+            if result["errors"]:
+                st.warning(f"⚠️ {len(result['errors'])} baris ditolak")
+                st.dataframe(pd.DataFrame(result["errors"][:1000]),
+                             use_container_width=True, hide_index=True)
+                st.download_button("Unduh laporan error", errors_to_csv(result["errors"]),
+                                   file_name=f"error_import_{entity}.csv", mime="text/csv")
+
+def export_buttons(entity: str, status_filter: str = "ALL"):
+    """Tombol unduh CSV / Excel / PDF. File baru dibuat saat tombol diklik
+    (deferred), dari query yang di-stream per potongan. Pembuatannya hemat
+    memori, tetapi download_button tetap memuat seluruh file ke memori."""
+    labels = {"csv": "⬇️ CSV", "xlsx": "⬇️ Excel", "pdf": "⬇️ PDF"}
+    for col, fmt in zip(st.columns(len(FORMATS)), FORMATS):
+        with col:
+            st.download_button(
+                labels[fmt],
+                data=lambda fmt=fmt: export_bytes(entity, fmt, status_filter),
+                file_name=export_filename(entity, fmt),
+                mime=FORMATS[fmt],
+                on_click="ignore",
+                key=f"export_{entity}_{fmt}",
+                use_container_width=True,
+            )
+
+def handle_scan(mode: str, code: str, result_key: str):
+    """Proses satu kode hasil scan (mode "pinjam" / "kembali").
+    Hasilnya disimpan di session_state[result_key] untuk ditampilkan di rerun berikutnya."""
+    code = normalize_code(code)
+    if not code:
+        return
+    
+    try:
+        if mode == "kembali":
+            hasil = LoanService.return_by_kode_buku(code)
+            pesan = f"✅ **{hasil['nama_buku']}** dikembalikan oleh **{hasil['nama_siswa']}**"
+            if hasil["denda"]:
+                pesan += (f" — terlambat {hasil['hari_terlambat']} hari, "
+                          f"denda **Rp {hasil['denda']:,}**")
+            st.session_state[result_key] = ("warning" if hasil["denda"] else "success", pesan)
+            return
+        
+        # Mode pinjam: kartu siswa dulu, lalu satu atau beberapa buku
+        siswa = SiswaModel.get_by_kode(code)
+        if siswa:
+            st.session_state.scan_siswa = siswa
+            st.session_state[result_key] = (
+                "info", f"👤 **{siswa['nama']}** ({siswa['kelas'] or '-'}) — silakan scan buku")
+            return
+        if not st.session_state.get("scan_siswa"):
+            st.session_state[result_key] = (
+                "error", f"❌ Scan kartu siswa terlebih dahulu (`{code}` bukan kode kartu siswa)")
+            return
+        
+        hasil = LoanService.checkout_by_codes(
+            st.session_state.scan_siswa["kode"], code,
+            datetime.now().strftime("%Y-%m-%d"), st.session_state.admin_id
+        )
+        st.session_state[result_key] = (
+            "success", f"✅ **{hasil['nama_buku']}** dipinjam oleh **{hasil['nama_siswa']}** "
+                       f"(ID {hasil['id_peminjaman']}, jatuh tempo {hasil['tanggal_jatuh_tempo']})")
+    except LoanError as e:
+        st.session_state[result_key] = ("error", f"❌ {e}")
+    except Exception as e:
+        st.session_state[result_key] = ("error", f"❌ Gagal memproses scan: {e}")
+
+def _on_scan_input(mode: str, key: str, result_key: str):
+    handle_scan(mode, st.session_state[key], result_key)
+    st.session_state[key] = ""  # kosongkan untuk scan berikutnya
+
+def scan_field(page: str, mode: str, label: str):
+    """Input scan: scanner keyboard-wedge (ketik + Enter) atau foto kamera.
+    Key session_state per halaman, supaya hasil scan tidak muncul di halaman lain."""
+    slot = f"{page}_{mode}"
+    key = f"scan_input_{slot}"
+    result_key = f"scan_result_{slot}"
+    st.text_input(label, key=key, on_change=_on_scan_input, args=(mode, key, result_key),
+                  placeholder="Klik di sini lalu scan barcode / QR")
+    
+    if st.toggle("📷 Gunakan kamera", key=f"scan_kamera_{slot}"):
+        foto = st.camera_input("Arahkan barcode / QR ke kamera", key=f"scan_foto_{slot}")
+        # camera_input tetap menyimpan foto terakhir: proses setiap foto sekali saja
+        if foto is not None and st.session_state.get(f"scan_foto_id_{slot}") != foto.file_id:
+            st.session_state[f"scan_foto_id_{slot}"] = foto.file_id
+            try:
+                codes = decode_image(foto.getvalue())
+            except ScanError as e:
+                st.session_state[result_key] = ("error", f"❌ {e}")
+            else:
+                if not codes:
+                    st.session_state[result_key] = (
+                        "error", "❌ Tidak ada barcode / QR yang terbaca, coba lagi")
+                for code in codes:
+                    handle_scan(mode, code, result_key)
+    
+    result = st.session_state.get(result_key)
+    if result:
+        level, pesan = result
+        getattr(st, level)(pesan)
+
+def _apply_suggestion(values: Dict):
+    for key, value in values.items():
+        st.session_state[key] = value or ""
+
+def suggestion_buttons(source: str, text: str, key: str, fields: Dict):
+    """Saran ketik dari index di memori (autocomplete.py) sebagai tombol.
+    `fields` memetakan key widget -> nama field di data saran."""
+    if not text:
+        return
+    saran = autocomplete.suggest(source, text, limit=5)
+    # Nilai yang diketik sudah persis sama dengan data yang ada: tidak perlu saran
+    if not saran or any(all(item["data"].get(f) == st.session_state.get(k)
+                            for k, f in fields.items()) for item in saran):
+        return
+    st.caption("Maksud Anda:")
+    for i, item in enumerate(saran):
+        label = f"{item['label']}{' ~' if item['fuzzy'] else ''}"
+        st.button(label, key=f"saran_{key}_{i}", type="tertiary",
+                  on_click=_apply_suggestion,
+                  args=({k: item["data"].get(f) for k, f in fields.items()},))
+
+def similar_entities(nama_siswa: str, kelas: str) -> Optional[str]:
+    """Pesan peringatan jika peminjaman ini akan membuat kelas / siswa BARU
+    padahal ada data yang mirip (kemungkinan salah ketik)"""
+    id_kelas = KelasModel.get_id(kelas)
+    if id_kelas is None:
+        mirip = [s["label"] for s in autocomplete.suggest("kelas", kelas, limit=3)]
+        if mirip:
+            return f"Kelas **{kelas}** belum ada. Kelas yang mirip: {', '.join(mirip)}"
+        return None
+    if SiswaModel.get_id(nama_siswa, id_kelas) is None:
+        mirip = [s["label"] for s in autocomplete.suggest("siswa", nama_siswa, limit=3)]
+        if mirip:
+            return (f"Siswa **{nama_siswa}** ({kelas}) belum terdaftar. "
+                    f"Siswa yang mirip: {', '.join(mirip)}")
+    return None
+
 def login_page():
     """Halaman Login dengan Background Library"""
     
@@ -502,15 +542,26 @@ def input_peminjaman_page():
     </script>
     """, unsafe_allow_html=True)
     
-    with st.form("form_peminjaman"):
+    form_peminjaman()
+
+@page_fragment
+def form_peminjaman():
+    """Form peminjaman (rerun sendiri saat field diisi / saran dipilih)"""
+    # Bukan st.form: saran ketik perlu rerun setiap kali field diisi (Enter)
+    with st.container(border=True):
         col1, col2 = st.columns(2)
         
         with col1:
-            nama_siswa = st.text_input("👤 Nama Siswa :", placeholder="Masukkan nama siswa")
-            kelas = st.text_input("📚 Kelas:", placeholder="Contoh: 11 IPA 1")
+            nama_siswa = st.text_input("👤 Nama Siswa :", placeholder="Masukkan nama siswa",
+                                       key="input_nama_siswa")
+            suggestion_buttons("siswa", nama_siswa, "siswa",
+                               {"input_nama_siswa": "nama_siswa", "input_kelas": "nama_kelas"})
+            kelas = st.text_input("📚 Kelas:", placeholder="Contoh: 11 IPA 1", key="input_kelas")
+            suggestion_buttons("kelas", kelas, "kelas", {"input_kelas": "nama_kelas"})
             
         with col2:
-            kode_buku = st.text_input("📖 Kode Buku:", placeholder="Masukkan kode buku")
+            kode_buku = st.text_input("📖 Kode Buku:", placeholder="Masukkan kode buku",
+                                      key="input_kode_buku")
             tanggal_pinjam = st.date_input("📅 Tanggal Pinjam:", datetime.now())
         
         # Info buku
@@ -520,9 +571,11 @@ def input_peminjaman_page():
                 st.success(f"✅ Buku ditemukan: **{buku['nama']}**")
             else:
                 st.warning("⚠️ Buku tidak ditemukan")
+                with col2:
+                    suggestion_buttons("buku", kode_buku, "buku", {"input_kode_buku": "kode_buku"})
         
         # Tanggal kembali otomatis (REAL-TIME UPDATE)
-        tanggal_kembali = tanggal_pinjam + timedelta(days=3)
+        tanggal_kembali = tanggal_pinjam + timedelta(days=LAMA_PINJAM_HARI)
         
         # Tampilkan dengan highlight
         st.markdown(f"""
@@ -539,106 +592,233 @@ def input_peminjaman_page():
         </div>
         """, unsafe_allow_html=True)
         
+        # Cegah siswa / kelas dobel karena salah ketik
+        peringatan = similar_entities(nama_siswa, kelas) if nama_siswa and kelas else None
+        if peringatan:
+            st.warning(f"⚠️ {peringatan}")
+            buat_baru = st.checkbox("Data sudah benar, simpan sebagai siswa / kelas baru")
+        
         st.markdown("---")
         
         col_a, col_b, col_c = st.columns([1, 2, 1])
         with col_b:
-            submit = st.form_submit_button("SIMPAN PEMINJAMAN", use_container_width=True)
+            submit = st.button("SIMPAN PEMINJAMAN", use_container_width=True)
         
         if submit:
             if not nama_siswa or not kelas or kelas == "Contoh: 11 IPA 1":
                 st.error("❌ Nama siswa dan kelas harus diisi!")
             elif not kode_buku:
                 st.error("❌ Kode buku harus diisi!")
+            elif peringatan and not buat_baru:
+                st.error("❌ Pilih data yang sudah ada dari saran, atau centang konfirmasi data baru")
             else:
-                buku = BukuModel.get_by_kode(kode_buku)
-                if not buku:
-                    st.error("❌ Buku tidak ditemukan!")
+                try:
+                    # Kelas, siswa dan peminjaman disimpan dalam satu transaksi
+                    hasil = LoanService.checkout(
+                        nama_siswa, kelas, kode_buku,
+                        tanggal_pinjam.strftime("%Y-%m-%d"),
+                        st.session_state.admin_id
+                    )
+                except LoanError as e:
+                    st.error(f"❌ {e}")
+                except Exception as e:
+                    st.error(f"❌ Gagal menyimpan: {e}")
                 else:
-                    try:
-                        # Get or create kelas
-                        id_kelas = KelasModel.get_or_create(kelas)
-                        
-                        # Get or create siswa
-                        id_siswa = SiswaModel.get_or_create(nama_siswa, id_kelas)
-                        
-                        # Get or create buku
-                        id_buku = BukuModel.get_or_create(kode_buku, buku['nama'])
-                        
-                        # Create peminjaman
-                        id_peminjaman = PeminjamanModel.create(
-                            id_siswa, id_buku, 
-                            tanggal_pinjam.strftime("%Y-%m-%d"),
-                            st.session_state.admin_id
-                        )
-                        
-                        st.success(f"Peminjaman berhasil! **ID: {id_peminjaman}**")
-                        st.balloons()
-                        
-                        # Show receipt
-                        st.markdown("---")
-                        st.markdown("### RECEIPT PEMINJAMAN BUKU")
-                        
-                        receipt_col1, receipt_col2 = st.columns(2)
-                        
-                        with receipt_col1:
-                            st.markdown(f"""
-                            **INFORMASI PEMINJAMAN**
-                            - No. Peminjaman: `{id_peminjaman}`
-                            - Tanggal Pinjam: `{tanggal_pinjam.strftime("%d-%m-%Y")}`
-                            - Tanggal Kembali: `{tanggal_kembali.strftime("%d-%m-%Y")}`
-                            - Admin: `{st.session_state.admin_username}`
-                            """)
-                        
-                        with receipt_col2:
-                            st.markdown(f"""
-                            **DATA SISWA**
-                            - Nama: `{nama_siswa}`
-                            - Kelas: `{kelas}`
-                            
-                            **DATA BUKU**
-                            - Kode: `{kode_buku}`
-                            - Nama: `{buku['nama']}`
-                            """)
-                        
-                        st.warning("⚠️ **Harap kembalikan buku tepat waktu!**")
+                    id_peminjaman = hasil["id_peminjaman"]
+                    
+                    st.success(f"Peminjaman berhasil! **ID: {id_peminjaman}**")
+                    st.balloons()
+                    
+                    # Show receipt
+                    st.markdown("---")
+                    st.markdown("### RECEIPT PEMINJAMAN BUKU")
+                    
+                    receipt_col1, receipt_col2 = st.columns(2)
+                    
+                    with receipt_col1:
+                        st.markdown(f"""
+                        **INFORMASI PEMINJAMAN**
+                        - No. Peminjaman: `{id_peminjaman}`
+                        - Tanggal Pinjam: `{tanggal_pinjam.strftime("%d-%m-%Y")}`
+                        - Tanggal Kembali: `{tanggal_kembali.strftime("%d-%m-%Y")}`
+                        - Admin: `{st.session_state.admin_username}`
+                        """)
+                    
+                    with receipt_col2:
+                        st.markdown(f"""
+                        **DATA SISWA**
+                        - Nama: `{nama_siswa}`
+                        - Kelas: `{kelas}`
                         
-                    except Exception as e:
-                        st.error(f"❌ Gagal menyimpan: {e}")
+                        **DATA BUKU**
+                        - Kode: `{kode_buku}`
+                        - Nama: `{hasil['nama_buku']}`
+                        """)
+                    
+                    st.warning("⚠️ **Harap kembalikan buku tepat waktu!**")
 
 def lihat_peminjaman_page():
     """Halaman Lihat Peminjaman"""
     show_header()
     st.markdown("## 📋 DATA PEMINJAMAN")
-    
+    tabel_peminjaman()
+
+@page_fragment
+def tabel_peminjaman():
+    """Filter, export dan tabel peminjaman (rerun sendiri saat filter / halaman diganti)"""
     # Filter buttons
     col1, col2, col3 = st.columns(3)
     with col1:
         if st.button("Semua", use_container_width=True):
             st.session_state.filter_status = "ALL"
+            reset_pagination("page_peminjaman")
     with col2:
         if st.button("Sedang Dipinjam", use_container_width=True):
             st.session_state.filter_status = "dipinjam"
+            reset_pagination("page_peminjaman")
     with col3:
         if st.button("Sudah Dikembalikan", use_container_width=True):
             st.session_state.filter_status = "dikembalikan"
+            reset_pagination("page_peminjaman")
     
     # Default filter
     if "filter_status" not in st.session_state:
         st.session_state.filter_status = "ALL"
     
-    # Load data
-    df = PeminjamanModel.get_all(st.session_state.filter_status)
+    # Load data (satu halaman)
+    status_filter = st.session_state.filter_status
+    export_buttons("peminjaman", status_filter)
+    paginated_table(
+        "page_peminjaman",
+        lambda **kw: PeminjamanModel.get_page(status_filter, **kw),
+        PeminjamanModel.count(status_filter),
+        "id_peminjaman",
+        "Tidak ada data peminjaman"
+    )
+
+def dashboard_page():
+    """Halaman Dashboard Statistik"""
+    show_header()
+    st.markdown("## 📊 STATISTIK PEMINJAMAN")
     
-    if df.empty:
-        st.info("Tidak ada data peminjaman")
+    counts = StatistikModel.get_status_counts()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Peminjaman", counts["total"])
+    col2.metric("Sedang Dipinjam", counts.get("dipinjam", 0))
+    col3.metric("Sudah Dikembalikan", counts.get("dikembalikan", 0))
+    col4.metric("Terlambat", PeminjamanModel.count_overdue())
+    
+    grafik_bulanan()
+    
+    st.markdown("### 🏆 Buku Paling Sering Dipinjam")
+    df_top = StatistikModel.get_top_books(10)
+    if df_top.empty:
+        st.info("📭 Belum ada data peminjaman")
     else:
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        st.bar_chart(df_top.set_index("nama_buku")["jumlah"], horizontal=True)
+        st.dataframe(df_top, use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    analisis_riwayat()
+
+@page_fragment
+def grafik_bulanan():
+    """Grafik peminjaman per kelas per bulan (rerun sendiri saat periode diganti)"""
+    st.markdown("### 📅 Peminjaman per Kelas per Bulan")
+    months = st.selectbox("Periode", [6, 12, 24], index=1,
+                          format_func=lambda m: f"{m} bulan terakhir")
+    df_bulanan = StatistikModel.get_monthly_by_kelas(months)
+    if df_bulanan.empty:
+        st.info("📭 Belum ada data peminjaman pada periode ini")
+    else:
+        pivot = df_bulanan.pivot(index="bulan", columns="nama_kelas", values="jumlah").fillna(0)
+        st.bar_chart(pivot)
+
+@page_fragment
+def analisis_riwayat():
+    """Analisis riwayat lengkap (rerun sendiri saat toggle diubah)"""
+    if st.toggle("🔬 Analisis riwayat lengkap"):
+        with st.spinner("Menganalisis riwayat peminjaman..."):
+            analisis = StatistikModel.get_history_analysis()
+        if analisis["rows"] == 0:
+            st.info("📭 Belum ada data peminjaman")
+            return
+        
+        durasi = analisis["duration"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rata-rata Lama Pinjam",
+                    f"{durasi['mean']:.1f} hari" if durasi["count"] else "-")
+        col2.metric("Median", f"{durasi['median']:.0f} hari" if durasi["count"] else "-")
+        col3.metric("Persentil 90", f"{durasi['p90']:.0f} hari" if durasi["count"] else "-")
+        
+        st.markdown("#### Peminjaman per Bulan")
+        frekuensi = analisis["frequency"]
+        st.line_chart(pd.Series(frekuensi.to_numpy(), index=frekuensi.index.astype(str)))
+        
+        st.markdown("#### Distribusi Lama Pinjam (hari)")
+        st.bar_chart(durasi["histogram"])
+        
+        st.markdown("#### Aktivitas per Kelas")
+        st.dataframe(analisis["classes"], use_container_width=True, hide_index=True)
+        
+        st.markdown("#### Popularitas Buku")
+        st.dataframe(analisis["books"], use_container_width=True, hide_index=True)
+
+def keterlambatan_page():
+    """Halaman Peminjaman Terlambat"""
+    show_header()
+    st.markdown("## ⏰ PEMINJAMAN TERLAMBAT")
+    tabel_keterlambatan()
+
+@page_fragment
+def tabel_keterlambatan():
+    """Daftar keterlambatan per tanggal (rerun sendiri saat tanggal diganti)"""
+    tanggal = st.date_input("Per tanggal", value=datetime.now())
+    df = PeminjamanModel.get_overdue(tanggal.strftime("%Y-%m-%d"))
+    
+    if df.empty:
+        st.success("✅ Tidak ada peminjaman yang terlambat")
+        return
+    
+    col1, col2 = st.columns(2)
+    col1.metric("Peminjaman Terlambat", len(df))
+    col2.metric("Total Denda", f"Rp {int(df['denda'].sum()):,}")
+    st.caption(f"Denda Rp {DENDA_PER_HARI:,} per hari setelah jatuh tempo "
+               f"({LAMA_PINJAM_HARI} hari sejak tanggal pinjam)")
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def scan_page():
+    """Halaman Scan Barcode (peminjaman & pengembalian cepat)"""
+    show_header()
+    st.markdown("## 🔎 SCAN BARCODE")
+    
+    tab_pinjam, tab_kembali = st.tabs(["📤 Peminjaman", "📥 Pengembalian"])
+    
+    with tab_pinjam:
+        siswa = st.session_state.get("scan_siswa")
+        if siswa:
+            col1, col2 = st.columns([3, 1])
+            col1.markdown(f"👤 Siswa: **{siswa['nama']}** · {siswa['kelas'] or '-'} · `{siswa['kode']}`")
+            if col2.button("Ganti Siswa", use_container_width=True):
+                st.session_state.scan_siswa = None
+                st.session_state.scan_result_scan_pinjam = None
+                st.rerun()
+        scan_field("scan", "pinjam", "Scan kartu siswa, lalu scan buku")
+    
+    with tab_kembali:
+        scan_field("scan", "kembali", "Scan barcode buku yang dikembalikan")
 
 def pengembalian_page():
     """Halaman Pengembalian"""
     show_header()
     st.markdown("## ✅ PENGEMBALIAN BUKU")
+    daftar_pengembalian()
+
+@page_fragment
+def daftar_pengembalian():
+    """Scan cepat dan daftar pinjaman aktif (rerun sendiri saat memilih / scan)"""
+    scan_field("pengembalian", "kembali", "⚡ Scan / ketik kode buku untuk langsung mengembalikan")
+    st.markdown("---")
     
     df = PeminjamanModel.get_active_loans()
     
@@ -654,6 +834,13 @@ def pengembalian_page():
             df["id_peminjaman"].tolist()
         )
         
+        jatuh_tempo = df.loc[df["id_peminjaman"] == id_peminjaman, "tanggal_jatuh_tempo"].iloc[0]
+        if jatuh_tempo:
+            denda = LoanService.calculate_fine(jatuh_tempo)
+            if denda["hari_terlambat"] > 0:
+                st.warning(f"⚠️ Terlambat **{denda['hari_terlambat']} hari** "
+                           f"(jatuh tempo {jatuh_tempo}) — denda **Rp {denda['denda']:,}**")
+        
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("KEMBALIKAN BUKU", use_container_width=True):
@@ -671,7 +858,7 @@ def data_siswa_page():
     st.markdown("## 👥 DATA SISWA")
     
     # Action buttons - PERBAIKAN
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2)
     
     with col1:
         if st.button("➕ Tambah Siswa", use_container_width=True):
@@ -679,11 +866,9 @@ def data_siswa_page():
     
     with col2:
         if st.button("Refresh", use_container_width=True):
+            query_cache.invalidate("siswa", "kelas")
             st.rerun()
     
-    with col3:
-        search_keyword = st.text_input("🔍 Cari siswa", key="search_siswa")
-    
     # Form tambah siswa
     if st.session_state.get("show_add_siswa", False):
         with st.expander("FORM TAMBAH SISWA BARU", expanded=True):
@@ -717,16 +902,26 @@ def data_siswa_page():
                     st.session_state.show_add_siswa = False
                     st.rerun()
     
+    import_section("siswa", "nama_siswa, kelas")
+    export_buttons("siswa")
+    tabel_siswa()
+
+@page_fragment
+def tabel_siswa():
+    """Pencarian dan tabel siswa (rerun sendiri saat mencari / ganti halaman)"""
+    search_keyword = st.text_input("🔍 Cari siswa", key="search_siswa")
+    
     # Load data
     if search_keyword:
         df = SiswaModel.search(search_keyword)
+        
+        if df.empty:
+            st.info("Tidak ada data siswa")
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True)
     else:
-        df = SiswaModel.get_all()
-    
-    if df.empty:
-        st.info("Tidak ada data siswa")
-    else:
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        paginated_table("page_siswa", SiswaModel.get_page, SiswaModel.count(),
+                        "id_siswa", "Tidak ada data siswa")
 
 def data_buku_page():
     """Halaman Data Buku"""
@@ -734,7 +929,7 @@ def data_buku_page():
     st.markdown("## 📚 DATA BUKU")
     
     # Action buttons - PERBAIKAN
-    col1, col2, col3 = st.columns(3)
+    col1, col2 = st.columns(2)
     
     with col1:
         if st.button("➕ Tambah Buku", use_container_width=True):
@@ -742,11 +937,9 @@ def data_buku_page():
     
     with col2:
         if st.button("Refresh", use_container_width=True):
+            query_cache.invalidate("buku")
             st.rerun()
     
-    with col3:
-        search_keyword = st.text_input("🔍 Cari buku", key="search_buku")
-    
     # Form tambah buku
     if st.session_state.get("show_add_buku", False):
         with st.expander("FORM TAMBAH BUKU BARU", expanded=True):
@@ -776,16 +969,160 @@ def data_buku_page():
                     st.session_state.show_add_buku = False
                     st.rerun()
     
+    import_section("buku", "kode_buku, nama_buku")
+    export_buttons("buku")
+    tabel_buku()
+
+@page_fragment
+def tabel_buku():
+    """Pencarian dan tabel buku (rerun sendiri saat mencari / ganti halaman)"""
+    search_keyword = st.text_input("🔍 Cari buku", key="search_buku")
+    
     # Load data
     if search_keyword:
         df = BukuModel.search(search_keyword)
+        
+        if df.empty:
+            st.info("Tidak ada data buku")
+        else:
+            st.dataframe(df, use_container_width=True, hide_index=True)
     else:
-        df = BukuModel.get_all()
+        paginated_table("page_buku", BukuModel.get_page, BukuModel.count(),
+                        "id_buku", "Tidak ada data buku")
+
+def diagnostik_page():
+    """Halaman Diagnostik Query (waktu, query lambat, pola N+1)"""
+    show_header()
+    st.markdown("## 🩺 DIAGNOSTIK QUERY")
+    log = query_log.query_log
+    
+    with st.expander("⚙️ Setting Database"):
+        pool = DatabaseConnection.get_pool().stats()
+        st.caption(f"File: `{DatabaseConnection.get_path()}` · pool {pool['in_use']} dipakai / "
+                   f"{pool['idle']} idle (maksimal {pool['max_size']} koneksi)")
+        st.dataframe(pd.DataFrame(list(get_database_settings().items()),
+                                  columns=["setting", "nilai"]).astype(str),
+                     use_container_width=True, hide_index=True)
+    
+    if not query_log.ENABLED:
+        st.info("ℹ️ Instrumentasi query dimatikan (QUERY_LOG=0)")
+        return
     
-    if df.empty:
-        st.info("Tidak ada data buku")
-    else:
-        st.dataframe(df, use_container_width=True, hide_index=True)
+    cache = query_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Query Tercatat", log.total)
+    col2.metric("Query Berbeda", len(log.queries))
+    col3.metric("Query Lambat", len(log.slow))
+    col4.metric("Cache Hit Rate", f"{cache['hit_rate']:.0%}")
+    st.caption(f"Ambang query lambat {log.slow_ms:g} ms · log JSON: `{log.log_path}` · "
+               f"query yang sama ≥ {query_log.REPEAT_THRESHOLD}x per rerun ditandai N+1")
+    
+    sebelumnya = st.session_state.get("query_run")
+    if sebelumnya:
+        st.markdown(f"### 🔁 Rerun Sebelumnya: {sebelumnya['page'] or '-'}")
+        st.caption(f"{sebelumnya['count']} query · {sebelumnya['total_ms']:.1f} ms di database · "
+                   f"{sebelumnya['elapsed_ms']:.0f} ms total rerun")
+        if sebelumnya["queries"]:
+            st.dataframe(pd.DataFrame(sebelumnya["queries"]), use_container_width=True,
+                         hide_index=True)
+    
+    tab_rerun, tab_teratas, tab_lambat = st.tabs(["📋 Per Rerun", "🏋️ Query Teratas", "🐢 Query Lambat"])
+    
+    with tab_rerun:
+        runs = log.recent_runs()
+        if not runs:
+            st.info("📭 Belum ada rerun yang tercatat")
+        else:
+            st.dataframe(pd.DataFrame([{
+                "waktu": run["started"], "halaman": run["page"], "query": run["count"],
+                "db_ms": round(run["total_ms"], 1), "rerun_ms": round(run["elapsed_ms"], 1),
+                "baris": run["rows"], "lambat": run["slow"], "berulang": len(run["repeated"]),
+            } for run in runs]), use_container_width=True, hide_index=True)
+            for run in runs:
+                for item in run["repeated"]:
+                    st.warning(f"⚠️ {run['page']} ({run['started']}): query dijalankan "
+                               f"{item['count']}x dari `{item['call_site']}`\n\n`{item['sql'][:200]}`")
+    
+    with tab_teratas:
+        order = st.radio("Urutkan", ["total_ms", "max_ms", "count", "rows"], horizontal=True,
+                         format_func={"total_ms": "Total waktu", "max_ms": "Waktu maks",
+                                      "count": "Jumlah eksekusi", "rows": "Jumlah baris"}.get)
+        top = log.top_queries(20, order)
+        if not top:
+            st.info("📭 Belum ada query yang tercatat")
+        else:
+            df_top = pd.DataFrame(top)
+            df_top["call_sites"] = df_top["call_sites"].str.join("\n")
+            df_top = df_top[["sql", "count", "total_ms", "avg_ms", "max_ms", "rows",
+                             "full_scan", "call_sites"]].round(2)
+            st.dataframe(df_top, use_container_width=True, hide_index=True)
+    
+    with tab_lambat:
+        slow = log.recent_slow()
+        if not slow:
+            st.success(f"✅ Tidak ada query di atas {log.slow_ms:g} ms")
+        for entry in slow:
+            label = f"{'🔴 SCAN' if entry['full_scan'] else '🟡'} {entry['ms']:.1f} ms · " \
+                    f"{entry['rows']} baris · {entry['page'] or '-'} · {entry['time']}"
+            with st.expander(label):
+                st.code(entry["sql"], language="sql")
+                st.caption(f"Pemanggil: {entry['call_site']} · parameter: {entry['params']}")
+                if entry["plan"]:
+                    st.code("\n".join(entry["plan"]), language="text")
+    
+    st.markdown("---")
+    col1, col2 = st.columns(2)
+    if col1.button("🧹 Reset Statistik", use_container_width=True):
+        log.reset()
+        st.session_state.query_run = None
+        st.rerun()
+    if os.path.exists(log.log_path):
+        with open(log.log_path, "rb") as f:
+            col2.download_button("⬇️ Unduh Log JSON", f.read(), os.path.basename(log.log_path),
+                                 "application/x-ndjson", use_container_width=True)
+
+def profiler_panel():
+    """Rincian profil rerun terakhir dan riwayatnya (opsional, dari toggle sidebar)"""
+    riwayat = st.session_state.get("profil_riwayat", [])
+    with st.expander("⏱️ Profil Rerun", expanded=True):
+        if not riwayat:
+            st.info("ℹ️ Profil muncul mulai rerun berikutnya")
+            return
+        
+        terakhir = riwayat[-1]
+        st.caption(f"Rerun {terakhir['time']} · halaman {terakhir['page'] or '-'}")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total", f"{terakhir['total_ms']:.0f} ms")
+        col2.metric("Query", terakhir["queries"] if terakhir["queries"] is not None else "-")
+        col3.metric("Terkirim", f"{terakhir['bytes_sent'] / 1024:.1f} KB")
+        col4.metric("Pesan", terakhir["messages"])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Waktu per fase (ms)**")
+            fase = pd.Series(terakhir["phases"], name="ms").sort_values(ascending=False)
+            st.bar_chart(fase, horizontal=True)
+        with col2:
+            st.markdown("**Byte per jenis elemen**")
+            st.dataframe(pd.DataFrame(list(terakhir["element_bytes"].items()),
+                                      columns=["elemen", "byte"]),
+                         use_container_width=True, hide_index=True)
+        
+        if terakhir["dataframes"]:
+            st.markdown("**DataFrame hasil query**")
+            st.dataframe(pd.DataFrame(terakhir["dataframes"]), use_container_width=True,
+                         hide_index=True)
+        
+        st.markdown(f"**Riwayat {len(riwayat)} rerun terakhir (ms per fase)**")
+        df_riwayat = pd.DataFrame([p["phases"] for p in riwayat]).fillna(0)
+        df_riwayat.index = [f"{i + 1}. {p['time']} {p['page']}" for i, p in enumerate(riwayat)]
+        st.bar_chart(df_riwayat)
+        st.dataframe(pd.DataFrame([{
+            "waktu": p["time"], "halaman": p["page"], "total_ms": round(p["total_ms"], 1),
+            "query": p["queries"], "kb_terkirim": round(p["bytes_sent"] / 1024, 1),
+            "pesan": p["messages"],
+        } for p in reversed(riwayat)]), use_container_width=True, hide_index=True)
+
 # =====================================================
 # MAIN APPLICATION
 # =====================================================
@@ -797,17 +1134,35 @@ def main():
         st.error(f"❌ Database tidak ditemukan: {DB_PATH}")
         st.stop()
     
+    with profiler.phase("inisialisasi"):
+        # Optimasi gambar background (sekali per proses)
+        prepare_assets(*BACKGROUND_IMAGES)
+        
+        # WAL + PRAGMA + migrasi skema (sekali per proses) dan PRAGMA optimize terjadwal
+        try:
+            initialize_database()
+        except MigrationError as e:
+            st.error(f"❌ Migrasi database gagal: {e}")
+            st.stop()
+        maybe_optimize()
+        
+        # Index saran ketik (siswa, kelas, buku) dibangun di background
+        autocomplete.warm_up()
+    
     # Initialize session state
     if "logged_in" not in st.session_state:
         st.session_state.logged_in = False
     
     # Check authentication
     if not AuthService.is_authenticated():
-        login_page()
+        query_log.label_run("Login")
+        profiler.label("Login")
+        with profiler.phase("halaman"):
+            login_page()
         return
     
     # Sidebar menu
-    with st.sidebar:
+    with profiler.phase("sidebar"), st.sidebar:
         # Hapus gambar di sidebar, cukup teks aja
         st.markdown("# 📚 MENU")
         st.markdown(f"**👤 Admin:** {st.session_state.admin_username}")
@@ -816,38 +1171,71 @@ def main():
         menu = st.radio(
             "Navigasi",
             [
+                "Dashboard",
+                "Scan Barcode",
                 "Input Peminjaman",
                 "Lihat Peminjaman",
                 "Pengembalian Buku",
+                "Keterlambatan",
                 "Data Siswa",
                 "Data Buku",
+                "Diagnostik",
                 "Logout"
             ],
             label_visibility="collapsed"
         )
+        query_log.label_run(menu)
+        profiler.label(menu)
+        
+        vps_sync = get_vps_sync()
+        if vps_sync:
+            status = vps_sync.get_status()
+            st.markdown("---")
+            st.caption(f"☁️ Sync VPS: {status['last_sync_str']} "
+                       f"(antrian {status['queue_depth']})")
+            if status["last_result"] == "gagal":
+                st.caption(f"⚠️ Sync gagal: {status['last_error']}")
+            vps_backup_panel(vps_sync)
         
         st.markdown("---")
+        st.toggle("⏱️ Profiler halaman", key="profiler_aktif",
+                  help="Tampilkan rincian waktu, byte terkirim dan ukuran DataFrame per rerun")
         st.caption("© 2025 SMAN 47 Jakarta")
         st.caption("Created By PKM Universitas Pamulang")
     
     # Route to pages
-    if menu == "Input Peminjaman":
-        input_peminjaman_page()
-    elif menu == "Lihat Peminjaman":
-        lihat_peminjaman_page()
-    elif menu == "Pengembalian Buku":
-        pengembalian_page()
-    elif menu == "Data Siswa":
-        data_siswa_page()
-    elif menu == "Data Buku":
-        data_buku_page()
-    elif menu == "Logout":
-        AuthService.logout()
-        st.success("✅ Logout berhasil!")
-        st.rerun()
+    with profiler.phase("halaman"):
+        if menu == "Dashboard":
+            dashboard_page()
+        elif menu == "Scan Barcode":
+            scan_page()
+        elif menu == "Input Peminjaman":
+            input_peminjaman_page()
+        elif menu == "Lihat Peminjaman":
+            lihat_peminjaman_page()
+        elif menu == "Pengembalian Buku":
+            pengembalian_page()
+        elif menu == "Keterlambatan":
+            keterlambatan_page()
+        elif menu == "Data Siswa":
+            data_siswa_page()
+        elif menu == "Data Buku":
+            data_buku_page()
+        elif menu == "Diagnostik":
+            diagnostik_page()
+        elif menu == "Logout":
+            AuthService.logout()
+            st.success("✅ Logout berhasil!")
+            st.rerun()
+    
+    # Rincian rerun sebelumnya (profiler opsional dari sidebar)
+    if st.session_state.get("profiler_aktif"):
+        with profiler.phase("profiler"):
+            profiler_panel()
 
 if __name__ == "__main__":
-    main()
+    with instrumented_rerun():
+        main()
 
 
 
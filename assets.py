@@ -0,0 +1,96 @@
+# assets.py
+# Pipeline gambar statis (background halaman).
+# Gambar diperkecil + dikompres ulang SEKALI per proses (hasilnya disimpan di
+# folder static/ dan di memori), lalu dipakai lewat URL static Streamlit.
+# Dengan begitu setiap rerun hanya mengirim CSS kecil berisi URL, bukan
+# ratusan KB base64, dan browser bisa meng-cache gambarnya.
+
+import base64
+import hashlib
+import os
+import threading
+
+import streamlit as st
+
+# Streamlit menyajikan folder static/ di sebelah script utama (app.py)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+MAX_WIDTH = 1600        # cukup untuk background layar penuh di PC sekolah
+WEBP_QUALITY = 70
+
+_lock = threading.Lock()
+_urls = {}
+
+
+def _static_serving_enabled() -> bool:
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+def _optimize_image(image_path: str) -> tuple:
+    """Resize + konversi ke WebP. Return (bytes, mime). Tanpa Pillow: file asli."""
+    try:
+        from PIL import Image
+    except ImportError:
+        with open(image_path, "rb") as f:
+            return f.read(), "image/jpeg"
+
+    import io
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        if img.width > MAX_WIDTH:
+            height = round(img.height * MAX_WIDTH / img.width)
+            img = img.resize((MAX_WIDTH, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue(), "image/webp"
+
+
+def _build_url(image_path: str) -> str:
+    data, mime = _optimize_image(image_path)
+
+    if _static_serving_enabled():
+        # Nama file memuat hash isi, jadi cache browser otomatis berganti
+        # kalau gambar sumbernya diganti
+        digest = hashlib.sha1(data).hexdigest()[:10]
+        name = os.path.splitext(os.path.basename(image_path))[0]
+        ext = "webp" if mime == "image/webp" else "jpg"
+        filename = f"{name}.{digest}.{ext}"
+        target = os.path.join(STATIC_DIR, filename)
+        if not os.path.exists(target):
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        return f"app/static/{filename}"
+
+    # Fallback: data URI, tapi tetap hasil kompresi dan dihitung sekali saja
+    return f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+
+def get_image_url(image_path: str) -> str:
+    """URL gambar yang sudah dioptimasi (memoized per proses). None jika file tidak ada."""
+    key = (image_path, os.path.getmtime(image_path) if os.path.exists(image_path) else None)
+    if key[1] is None:
+        return None
+
+    url = _urls.get(key)
+    if url is None:
+        with _lock:
+            url = _urls.get(key)
+            if url is None:
+                try:
+                    url = _build_url(image_path)
+                except Exception as e:
+                    print(f"⚠ [ASSET] Gagal memproses {image_path}: {e}")
+                    return None
+                _urls[key] = url
+    return url
+
+
+def prepare_assets(*image_paths):
+    """Proses semua gambar di awal (dipanggil saat startup)"""
+    for path in image_paths:
+        get_image_url(path)
@@ -0,0 +1,297 @@
+# autocomplete.py
+# Saran ketik (typeahead) untuk nama siswa, kelas dan buku dari index di memori.
+#
+# Setiap sumber dimuat SEKALI per proses ke:
+#   - daftar terurut (teks ternormalisasi, id) untuk pencarian prefix dengan
+#     bisect, termasuk prefix setiap kata ("san" -> "Budi Santoso")
+#   - index trigram untuk pencarian fuzzy (salah ketik: "Bdi Santosa")
+# Begitu tabelnya berubah (invalidate_tables), baris baru langsung dimuat
+# (id > id terakhir) dan index lengkap dibangun ulang di background untuk
+# menangkap perubahan / penghapusan.
+
+import bisect
+import difflib
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from database import DatabaseConnection, on_database_replaced
+from query_cache import on_tables_changed
+
+MAX_FUZZY_CANDIDATES = 50
+MAX_POSTING_LENGTH = 2000      # trigram yang terlalu umum tidak membantu ranking
+FUZZY_THRESHOLD = 0.6
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Huruf kecil, tanpa diakritik, spasi dirapikan"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _SPACES.sub(" ", text).strip().lower()
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(query: str, key: str) -> float:
+    """Kemiripan query dengan teks, dibandingkan per posisi awal kata
+    (jadi "matematka" tetap mirip dengan "buku pelajaran matematika")"""
+    best = 0.0
+    matcher = difflib.SequenceMatcher(None, "", query)
+    words = key.split(" ")
+    for i in range(len(words)):
+        window = " ".join(words[i:])[:len(query) + 2]
+        matcher.set_seq1(window)
+        # SequenceMatcher meng-cache seq2, jadi query dipasang sebagai seq2
+        best = max(best, matcher.ratio())
+    return best
+
+
+class PrefixIndex:
+    """Index saran untuk satu sumber data.
+
+    `loader(conn, after_id)` mengembalikan baris (id, [teks yang dicari], label, data)
+    dengan id > after_id, urut id.
+    """
+
+    def __init__(self, name: str, tables, loader, unique_labels: bool = False):
+        self.name = name
+        self.tables = set(tables)
+        self.loader = loader
+        self.unique_labels = unique_labels
+        self._lock = threading.Lock()           # baca / tukar isi index
+        self._build_lock = threading.RLock()    # satu pemuat (rebuild / baris baru) sekaligus
+        self._entries = {}          # id -> (label, data, [teks ternormalisasi])
+        self._sorted = []           # [(teks ternormalisasi, id)]
+        self._grams = {}            # trigram -> [id]
+        self._labels = set()
+        self._max_id = 0
+        self._loaded = False
+        self._stale = False
+        self._rebuilding = False
+
+    # ------------------------------------------------------------
+    # Pemuatan
+    # ------------------------------------------------------------
+    def _add(self, entries, sorted_keys, grams, labels, row):
+        entry_id, texts, label, data = row
+        if self.unique_labels:
+            if label in labels:
+                return
+            labels.add(label)
+        keys = [normalize(t) for t in texts if t]
+        entries[entry_id] = (label, data, keys)
+        for key in keys:
+            words = key.split(" ")
+            for i in range(len(words)):
+                sorted_keys.append((" ".join(words[i:]), entry_id))
+            for gram in _trigrams(key):
+                grams.setdefault(gram, []).append(entry_id)
+
+    def _load(self, after_id: int = 0):
+        with DatabaseConnection.connection() as conn:
+            return list(self.loader(conn, after_id))
+
+    def rebuild(self):
+        """Muat ulang seluruh index (dipakai saat pertama kali dan di background)"""
+        # Baca database sampai tukar index di bawah _build_lock: tanpa itu baris yang
+        # baru dimuat _load_new_rows bisa tertimpa hasil rebuild yang dibaca lebih dulu
+        with self._build_lock:
+            rows = self._load()
+            entries, sorted_keys, grams, labels = {}, [], {}, set()
+            for row in rows:
+                self._add(entries, sorted_keys, grams, labels, row)
+            sorted_keys.sort()
+            with self._lock:
+                self._entries, self._sorted, self._grams, self._labels = \
+                    entries, sorted_keys, grams, labels
+                self._max_id = max(entries, default=0)
+                self._loaded = True
+
+    def _load_new_rows(self):
+        with self._build_lock:
+            rows = self._load(self._max_id)
+            with self._lock:
+                new_keys = []
+                for row in rows:
+                    self._add(self._entries, new_keys, self._grams, self._labels, row)
+                    self._max_id = max(self._max_id, row[0])
+                for item in new_keys:
+                    bisect.insort(self._sorted, item)
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"⚠ [AUTOCOMPLETE] Gagal membangun ulang index {self.name}: {e}")
+            with self._lock:
+                self._stale = True
+        finally:
+            self._rebuilding = False
+
+    def mark_stale(self, tables):
+        if self.tables.intersection(t.lower() for t in tables):
+            self._stale = True
+
+    def ensure_fresh(self):
+        if not self._loaded:
+            # Pemanggil lain (mis. warm_up) mungkin sedang memuat: tunggu hasilnya
+            with self._build_lock:
+                if not self._loaded:
+                    self.rebuild()
+            return
+        if self._stale:
+            self._stale = False
+            # Baris baru langsung tersedia, perubahan/penghapusan menyusul dari rebuild
+            self._load_new_rows()
+            if not self._rebuilding:
+                self._rebuilding = True
+                threading.Thread(target=self._rebuild_in_background, daemon=True,
+                                 name=f"autocomplete-{self.name}").start()
+
+    # ------------------------------------------------------------
+    # Pencarian
+    # ------------------------------------------------------------
+    def _prefix_matches(self, query: str, limit: int) -> list:
+        found = []
+        seen = set()
+        start = bisect.bisect_left(self._sorted, (query,))
+        for position in range(start, len(self._sorted)):
+            key, entry_id = self._sorted[position]
+            if not key.startswith(query):
+                break
+            if entry_id not in seen and entry_id in self._entries:
+                seen.add(entry_id)
+                found.append(entry_id)
+                if len(found) >= limit * 4:
+                    break
+
+        def rank(entry_id):
+            keys = self._entries[entry_id][2]
+            # Awal teks lengkap lebih dulu, lalu yang paling pendek
+            return (not any(k.startswith(query) for k in keys), min(len(k) for k in keys))
+
+        return sorted(found, key=rank)[:limit]
+
+    def _fuzzy_matches(self, query: str, limit: int, exclude) -> list:
+        counts = Counter()
+        for gram in _trigrams(query):
+            posting = self._grams.get(gram)
+            if posting and len(posting) <= MAX_POSTING_LENGTH:
+                counts.update(posting)
+
+        scored = []
+        for entry_id, _ in counts.most_common(MAX_FUZZY_CANDIDATES):
+            if entry_id in exclude or entry_id not in self._entries:
+                continue
+            score = max(_similarity(query, key) for key in self._entries[entry_id][2])
+            if score >= FUZZY_THRESHOLD:
+                scored.append((score, entry_id))
+        scored.sort(key=lambda item: -item[0])
+        return [entry_id for _, entry_id in scored[:limit]]
+
+    def suggest(self, text: str, limit: int = 8) -> list:
+        """Saran untuk `text`: hasil prefix dulu, sisanya dari fuzzy match.
+        Return list of dict {"label", "data", "fuzzy"}."""
+        query = normalize(text)
+        if not query:
+            return []
+        self.ensure_fresh()
+
+        with self._lock:
+            ids = self._prefix_matches(query, limit)
+            fuzzy = []
+            if len(ids) < limit and len(query) >= 3:
+                fuzzy = self._fuzzy_matches(query, limit - len(ids), set(ids))
+            return [
+                {"label": self._entries[entry_id][0], "data": self._entries[entry_id][1],
+                 "fuzzy": entry_id in fuzzy}
+                for entry_id in ids + fuzzy
+            ]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "keys": len(self._sorted),
+                "trigrams": len(self._grams), "loaded": self._loaded}
+
+
+# =====================================================
+# SUMBER DATA
+# =====================================================
+def _load_siswa(conn, after_id):
+    for id_siswa, nama, kelas, kode in conn.execute("""
+        SELECT s.id_siswa, s.nama_siswa, k.nama_kelas, s.kode_siswa
+        FROM siswa s
+        LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+        WHERE s.id_siswa > ?
+        ORDER BY s.id_siswa
+    """, (after_id,)):
+        label = f"{nama} ({kelas})" if kelas else nama
+        yield id_siswa, [nama, kode], label, {"nama_siswa": nama, "nama_kelas": kelas,
+                                              "kode_siswa": kode}
+
+
+def _load_kelas(conn, after_id):
+    for id_kelas, nama in conn.execute(
+        "SELECT id_kelas, nama_kelas FROM kelas WHERE id_kelas > ? ORDER BY id_kelas",
+        (after_id,)
+    ):
+        yield id_kelas, [nama], nama, {"nama_kelas": nama}
+
+
+def _load_buku(conn, after_id):
+    for id_buku, kode, nama in conn.execute(
+        "SELECT id_buku, kode_buku, nama_buku FROM buku WHERE id_buku > ? ORDER BY id_buku",
+        (after_id,)
+    ):
+        yield id_buku, [kode, nama], f"{kode} — {nama}", {"kode_buku": kode, "nama_buku": nama}
+
+
+INDEXES = {
+    "siswa": PrefixIndex("siswa", ["siswa", "kelas"], _load_siswa),
+    "kelas": PrefixIndex("kelas", ["kelas"], _load_kelas, unique_labels=True),
+    "buku": PrefixIndex("buku", ["buku"], _load_buku),
+}
+
+
+def _on_tables_changed(tables):
+    for index in INDEXES.values():
+        index.mark_stale(tables)
+
+
+on_tables_changed(_on_tables_changed)
+
+
+def suggest(source: str, text: str, limit: int = 8) -> list:
+    """Saran ketik dari sumber "siswa", "kelas" atau "buku" """
+    return INDEXES[source].suggest(text, limit)
+
+
+_warm_up_started = False
+
+
+def warm_up():
+    """Bangun semua index di background (aman dipanggil di setiap rerun)"""
+    global _warm_up_started
+    if _warm_up_started:
+        return
+    _warm_up_started = True
+    for index in INDEXES.values():
+        threading.Thread(target=index.ensure_fresh, daemon=True,
+                         name=f"autocomplete-{index.name}").start()
+
+
+def reset():
+    """Buang semua index (mis. setelah DatabaseConnection.configure ke file lain
+    atau database dipulihkan dari backup)"""
+    global _warm_up_started
+    _warm_up_started = False
+    for name, index in list(INDEXES.items()):
+        INDEXES[name] = PrefixIndex(index.name, index.tables, index.loader, index.unique_labels)
+
+
+on_database_replaced(reset)
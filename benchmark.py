@@ -0,0 +1,386 @@
+# benchmark.py
+# Benchmark layer model/service dengan data sintetis berskala besar.
+#
+# Database sintetis dibuat di file terpisah (skema tabel diambil dari
+# perpustakaan_final.db, lalu migrasi dijalankan seperti di aplikasi), jadi
+# database asli tidak pernah disentuh. Setiap method diukur berulang kali:
+# latency p50/p99 (ms) dan puncak alokasi memori (KB, tracemalloc), lalu
+# dibandingkan dengan baseline yang disimpan.
+#
+# Pemakaian CLI:
+#   python benchmark.py --scale small                 # 10k siswa/buku, 100k peminjaman
+#   python benchmark.py --scale large --regenerate    # 100k siswa/buku, 1M peminjaman
+#   python benchmark.py --save-baseline               # simpan hasil sebagai baseline
+#   python benchmark.py --only Buku                   # hanya kasus yang namanya memuat "Buku"
+# Exit code 1 jika ada kasus yang lebih lambat dari baseline melewati toleransi.
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from database import DB_PATH, DatabaseConnection, initialize_database
+
+SCALES = {
+    "small": {"siswa": 10_000, "buku": 10_000, "peminjaman": 100_000},
+    "medium": {"siswa": 50_000, "buku": 50_000, "peminjaman": 500_000},
+    "large": {"siswa": 100_000, "buku": 100_000, "peminjaman": 1_000_000},
+    "xlarge": {"siswa": 1_000_000, "buku": 1_000_000, "peminjaman": 1_000_000},
+}
+BASE_TABLES = ["user", "admin", "kelas", "buku", "siswa", "peminjaman"]
+# Sumber skema: database aplikasi di sebelah file ini, dari direktori manapun dijalankan
+SOURCE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), DB_PATH)
+DEFAULT_SCRATCH = os.path.join(tempfile.gettempdir(), "perpustakaan_benchmark.db")
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_TOLERANCE = 0.25     # 25% lebih lambat dari baseline = regresi
+MIN_REGRESSION_MS = 0.5      # selisih di bawah ini dianggap noise
+
+# =====================================================
+# DATA SINTETIS
+# =====================================================
+NAMA_DEPAN = [
+    "Adi", "Agus", "Ahmad", "Aisyah", "Andi", "Anisa", "Arif", "Ayu", "Bagus", "Bayu",
+    "Budi", "Cahya", "Citra", "Dewi", "Dian", "Dimas", "Dinda", "Eka", "Eko", "Fajar",
+    "Fikri", "Fitri", "Gilang", "Hana", "Hendra", "Indah", "Intan", "Joko", "Kartika",
+    "Lestari", "Lukman", "Maya", "Muhammad", "Nadia", "Nur", "Putri", "Rahmat", "Rina",
+    "Rizky", "Sari", "Siti", "Sri", "Taufik", "Teguh", "Tri", "Wahyu", "Wulan", "Yoga",
+    "Yusuf", "Zahra",
+]
+NAMA_BELAKANG = [
+    "Pratama", "Saputra", "Wijaya", "Santoso", "Hidayat", "Nugroho", "Kurniawan",
+    "Setiawan", "Permata", "Lestari", "Rahayu", "Siregar", "Nasution", "Harahap",
+    "Simanjuntak", "Wibowo", "Susanto", "Firmansyah", "Ramadhan", "Maulana", "Fauzi",
+    "Utami", "Purnama", "Syahputra", "Kusuma", "Hakim", "Putra", "Anggraini",
+]
+TINGKAT = ["10", "11", "12"]
+JURUSAN = ["IPA", "IPS", "Bahasa"]
+
+JUDUL_AWAL = [
+    "Pengantar", "Dasar-dasar", "Sejarah", "Panduan Praktis", "Buku Pelajaran",
+    "Kumpulan Soal", "Ensiklopedia", "Memahami", "Mengenal", "Rahasia",
+]
+TOPIK = [
+    "Matematika", "Fisika", "Kimia", "Biologi", "Ekonomi", "Geografi", "Sosiologi",
+    "Bahasa Indonesia", "Bahasa Inggris", "Sastra Nusantara", "Kewarganegaraan",
+    "Seni Budaya", "Informatika", "Perpustakaan", "Kebudayaan Betawi", "Sejarah Indonesia",
+]
+JUDUL_AKHIR = ["untuk SMA", "Kurikulum Merdeka", "Edisi Revisi", "dan Penerapannya",
+               "Tingkat Lanjut", "Jilid 1", "Jilid 2", "Jilid 3", ""]
+
+
+def _nama_siswa(rng: random.Random) -> str:
+    nama = [rng.choice(NAMA_DEPAN), rng.choice(NAMA_BELAKANG)]
+    if rng.random() < 0.3:
+        nama.insert(1, rng.choice(NAMA_DEPAN))
+    return " ".join(nama)
+
+
+def _judul_buku(rng: random.Random) -> str:
+    return " ".join(p for p in (rng.choice(JUDUL_AWAL), rng.choice(TOPIK),
+                                rng.choice(JUDUL_AKHIR)) if p)
+
+
+def generate_dataset(path: str, siswa: int, buku: int, peminjaman: int,
+                     seed: int = 47, days: int = 3 * 365, batch: int = 50_000,
+                     source_db: str = SOURCE_DB):
+    """Buat database sintetis di `path` (ditimpa jika sudah ada)"""
+    if not os.path.exists(source_db):
+        raise FileNotFoundError(f"Database sumber skema tidak ditemukan: {source_db}")
+    rng = random.Random(seed)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    # Skema tabel dasar disalin dari database aplikasi; sisanya dibuat migrasi
+    source = sqlite3.connect(source_db)
+    schema = [row[0] for row in source.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN (%s)"
+        % ",".join("?" * len(BASE_TABLES)), BASE_TABLES)]
+    users = source.execute("SELECT * FROM user").fetchall()
+    source.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    for sql in schema:
+        conn.execute(sql)
+    if users:
+        conn.executemany(f"INSERT INTO user VALUES ({','.join('?' * len(users[0]))})", users)
+
+    kelas = [f"{t} {j} {n}" for t in TINGKAT for j in JURUSAN for n in range(1, 6)]
+    conn.executemany("INSERT INTO kelas (nama_kelas) VALUES (?)", [(k,) for k in kelas])
+
+    def insert_batches(sql, total, make_row):
+        for start in range(0, total, batch):
+            conn.executemany(sql, [make_row(i) for i in range(start, min(total, start + batch))])
+            conn.commit()
+
+    insert_batches("INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)", siswa,
+                   lambda i: (_nama_siswa(rng), rng.randint(1, len(kelas))))
+    insert_batches("INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)", buku,
+                   lambda i: (f"B{i + 1:06d}", _judul_buku(rng)))
+
+    today = date.today()
+
+    def make_loan(i):
+        pinjam = today - timedelta(days=int(days * (1 - i / peminjaman)) + rng.randint(0, 3))
+        # Peminjaman terbaru sebagian masih berjalan, yang lama hampir semua kembali
+        aktif = pinjam > today - timedelta(days=14) and rng.random() < 0.5 or rng.random() < 0.002
+        kembali = None if aktif else pinjam + timedelta(days=rng.choice([0, 1, 2, 3, 3, 4, 7, 10]))
+        return (rng.randint(1, siswa), rng.randint(1, buku), pinjam.isoformat(),
+                kembali.isoformat() if kembali else None,
+                "dipinjam" if aktif else "dikembalikan", 1)
+
+    insert_batches("""
+        INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, tanggal_kembali, status, id_admin)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, peminjaman, make_loan)
+    conn.close()
+
+    # Migrasi (index, FTS, ringkasan statistik, jatuh tempo, kode siswa) seperti di aplikasi
+    DatabaseConnection.configure(path)
+    initialize_database()
+
+
+# =====================================================
+# PENGUKURAN
+# =====================================================
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _checkpoint():
+    with DatabaseConnection.connection() as conn:
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+
+def measure(func, iterations: int, warm_cache: bool = False, write: bool = False) -> dict:
+    """Jalankan `func` berulang kali. Cache query dikosongkan sebelum setiap
+    panggilan (kecuali warm_cache) supaya yang terukur adalah kerja database.
+
+    Kasus tulis (`write`) diukur sampai commit benar-benar tersimpan di file
+    database: dengan WAL + synchronous=NORMAL commit hanya menulis ke WAL, fsync
+    terjadi saat checkpoint. Tanpa checkpoint di dalam pengukuran, biaya itu
+    jatuh di iterasi acak (auto-checkpoint) atau setelah pengukuran selesai."""
+    from query_cache import query_cache
+
+    timings = []
+    if write:
+        _checkpoint()
+    for _ in range(iterations):
+        if not warm_cache:
+            query_cache.clear()
+        started = time.perf_counter()
+        func()
+        if write:
+            _checkpoint()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Memori diukur terpisah: tracemalloc memperlambat eksekusi
+    if not warm_cache:
+        query_cache.clear()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p99_ms": round(_percentile(timings, 0.99), 3),
+        "max_ms": round(max(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+# Kasus yang menulis ke database (lihat measure)
+WRITE_CASES = {"SiswaModel.get_or_create", "LoanService.checkout+return"}
+
+
+def build_cases(rng: random.Random) -> list:
+    """(nama, fungsi, iterasi) untuk setiap method model / service yang diukur"""
+    import autocomplete
+    import models
+
+    with DatabaseConnection.connection() as conn:
+        max_siswa, max_buku = conn.execute(
+            "SELECT (SELECT MAX(id_siswa) FROM siswa), (SELECT MAX(id_buku) FROM buku)"
+        ).fetchone()
+        siswa_rows = conn.execute(
+            "SELECT s.nama_siswa, s.id_kelas, k.nama_kelas, s.kode_siswa FROM siswa s "
+            "JOIN kelas k ON k.id_kelas = s.id_kelas WHERE s.id_siswa IN (%s)"
+            % ",".join(str(rng.randint(1, max_siswa)) for _ in range(200))
+        ).fetchall()
+        kode_buku = [row[0] for row in conn.execute(
+            "SELECT kode_buku FROM buku WHERE id_buku IN (%s)"
+            % ",".join(str(rng.randint(1, max_buku)) for _ in range(200))
+        )]
+        page_cursor = conn.execute("SELECT MAX(id_peminjaman) / 2 FROM peminjaman").fetchone()[0]
+
+    def pick(items):
+        return items[rng.randrange(len(items))]
+
+    keywords = ["matematika", "sejarah indo", "fisika jilid", "kimia", "panduan"]
+    nama_keywords = ["budi", "siti rahayu", "putri", "muhammad", "wahyu"]
+
+    def checkout_and_return():
+        nama, _, kelas, _ = pick(siswa_rows)
+        kode = pick(kode_buku)
+        models.LoanService.checkout(nama, kelas, kode, date.today().isoformat(), 1)
+        try:
+            models.LoanService.return_by_kode_buku(kode)
+        except models.LoanError:
+            pass  # buku yang sama masih dipinjam di data sintetis
+
+    autocomplete.reset()
+    for index in autocomplete.INDEXES.values():
+        index.ensure_fresh()
+
+    return [
+        ("KelasModel.get_all", models.KelasModel.get_all, 50),
+        ("SiswaModel.get_page", lambda: models.SiswaModel.get_page(cursor=None), 50),
+        ("SiswaModel.search", lambda: models.SiswaModel.search(pick(nama_keywords)), 30),
+        ("SiswaModel.get_or_create", lambda: models.SiswaModel.get_or_create(*pick(siswa_rows)[:2]), 200),
+        ("SiswaModel.get_by_kode", lambda: models.SiswaModel.get_by_kode(pick(siswa_rows)[3]), 200),
+        ("BukuModel.get_page", lambda: models.BukuModel.get_page(cursor=None), 50),
+        ("BukuModel.get_by_kode", lambda: models.BukuModel.get_by_kode(pick(kode_buku)), 200),
+        ("BukuModel.search", lambda: models.BukuModel.search(pick(keywords)), 30),
+        ("PeminjamanModel.get_page", lambda: models.PeminjamanModel.get_page("ALL", page_cursor), 50),
+        ("PeminjamanModel.get_page[dipinjam]", lambda: models.PeminjamanModel.get_page("dipinjam"), 50),
+        ("PeminjamanModel.count[dipinjam]", lambda: models.PeminjamanModel.count("dipinjam"), 50),
+        ("PeminjamanModel.get_active_loans", models.PeminjamanModel.get_active_loans, 20),
+        ("PeminjamanModel.get_overdue", models.PeminjamanModel.get_overdue, 20),
+        ("PeminjamanModel.get_all", models.PeminjamanModel.get_all, 3),
+        ("StatistikModel.get_status_counts", models.StatistikModel.get_status_counts, 50),
+        ("StatistikModel.get_monthly_by_kelas", models.StatistikModel.get_monthly_by_kelas, 50),
+        ("StatistikModel.get_top_books", models.StatistikModel.get_top_books, 50),
+        ("LoanService.checkout+return", checkout_and_return, 100),
+        ("autocomplete.suggest[buku]", lambda: autocomplete.suggest("buku", pick(keywords)), 200),
+        ("autocomplete.suggest[siswa]", lambda: autocomplete.suggest("siswa", pick(nama_keywords)), 200),
+    ]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Daftar (nama, baseline_ms, sekarang_ms) untuk kasus yang lebih lambat dari baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = max(base["p50_ms"] * (1 + tolerance), base["p50_ms"] + MIN_REGRESSION_MS)
+        if result["p50_ms"] > limit:
+            regressions.append((name, base["p50_ms"], result["p50_ms"]))
+    return regressions
+
+
+# =====================================================
+# CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark model perpustakaan dengan data sintetis")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--siswa", type=int, help="jumlah siswa (menimpa --scale)")
+    parser.add_argument("--buku", type=int, help="jumlah buku (menimpa --scale)")
+    parser.add_argument("--peminjaman", type=int, help="jumlah peminjaman (menimpa --scale)")
+    parser.add_argument("--db", default=DEFAULT_SCRATCH, help="file database sintetis")
+    parser.add_argument("--source", default=SOURCE_DB,
+                        help="database aplikasi sumber skema (default: perpustakaan_final.db)")
+    parser.add_argument("--regenerate", action="store_true", help="buat ulang data sintetis")
+    parser.add_argument("--seed", type=int, default=47)
+    parser.add_argument("--only", default=None, help="hanya kasus yang namanya memuat teks ini")
+    parser.add_argument("--warm", action="store_true", help="ukur dengan cache query aktif")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="file baseline JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="simpan hasil sebagai baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--output", default=None, help="simpan hasil lengkap ke file JSON")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.db) == os.path.abspath(args.source):
+        print("✗ [BENCH] Database benchmark tidak boleh sama dengan database aplikasi")
+        return 1
+
+    size = dict(SCALES[args.scale])
+    for key in size:
+        if getattr(args, key):
+            size[key] = getattr(args, key)
+
+    if args.regenerate or not os.path.exists(args.db):
+        print(f"… [BENCH] Membuat data sintetis: {size['siswa']} siswa, {size['buku']} buku, "
+              f"{size['peminjaman']} peminjaman -> {args.db}")
+        started = time.perf_counter()
+        try:
+            generate_dataset(args.db, seed=args.seed, source_db=args.source, **size)
+        except FileNotFoundError as e:
+            print(f"✗ [BENCH] {e}")
+            return 1
+        DatabaseConnection.close_all()   # koneksi terakhir ditutup -> WAL di-checkpoint
+        print(f"✓ [BENCH] Data sintetis siap ({time.perf_counter() - started:.1f} detik)")
+
+    # Kasus tulis (checkout) mengubah data: setiap run memakai salinan baru,
+    # jadi dataset selalu sama dengan saat baseline dibuat
+    run_db = args.db + ".run"
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(run_db + suffix):
+            os.remove(run_db + suffix)
+    shutil.copyfile(args.db, run_db)
+    DatabaseConnection.configure(run_db)
+    initialize_database()
+
+    with DatabaseConnection.connection() as conn:
+        counts = {table: conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+                  for table in ("siswa", "buku", "peminjaman")}
+    print("  Dataset: " + ", ".join(f"{n} {t}" for t, n in counts.items()))
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"\n{'kasus':<40}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+    for name, func, iterations in build_cases(rng):
+        if args.only and args.only.lower() not in name.lower():
+            continue
+        result = measure(func, iterations, args.warm, write=name in WRITE_CASES)
+        results[name] = result
+        print(f"{name:<40}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['peak_kb']:>12.1f}")
+
+    report = {"dataset": counts, "warm_cache": args.warm, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ [BENCH] Baseline disimpan: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠ [BENCH] Belum ada baseline ({args.baseline}), jalankan dengan --save-baseline")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("dataset") != counts:
+        print(f"\n⚠ [BENCH] Ukuran dataset berbeda dengan baseline {baseline.get('dataset')}, "
+              f"perbandingan bisa tidak akurat")
+
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    if regressions:
+        print(f"\n✗ [BENCH] {len(regressions)} kasus lebih lambat dari baseline "
+              f"(toleransi {args.tolerance:.0%}):")
+        for name, before, after in regressions:
+            print(f"  {name}: {before:.2f} ms -> {after:.2f} ms")
+        return 1
+    print(f"\n✓ [BENCH] Tidak ada regresi dibanding baseline (toleransi {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+# bulk_import.py
+# Import massal data buku, siswa dan kelas dari CSV / Excel (.xlsx).
+#
+# File dibaca per potongan (chunk) tanpa memuat semuanya ke memori, setiap baris
+# divalidasi, lalu ditulis dengan executemany di dalam SATU transaksi.
+# Buku di-upsert berdasarkan kode_buku (judul diperbarui jika berbeda),
+# kelas dan siswa hanya ditambahkan jika belum ada.
+#
+# Pemakaian CLI:
+#   python bulk_import.py buku katalog.csv
+#   python bulk_import.py siswa siswa_2025.xlsx --errors laporan_error.csv
+#
+# Kolom yang dikenali (header tidak peka huruf besar/kecil):
+#   buku  : kode_buku (kode), nama_buku (judul, nama)
+#   siswa : nama_siswa (nama), kelas (nama_kelas)
+#   kelas : nama_kelas (kelas)
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+from database import DatabaseConnection, initialize_database
+from query_cache import invalidate_tables
+
+CHUNK_SIZE = 5000
+MAX_TEXT_LENGTH = 255
+
+ENTITIES = {
+    "buku": {
+        "columns": ["kode_buku", "nama_buku"],
+        "aliases": {"kode": "kode_buku", "judul": "nama_buku", "nama": "nama_buku",
+                    "judul_buku": "nama_buku"},
+        "tables": ["buku"],
+    },
+    "siswa": {
+        "columns": ["nama_siswa", "kelas"],
+        "aliases": {"nama": "nama_siswa", "nama_kelas": "kelas"},
+        "tables": ["siswa", "kelas"],
+    },
+    "kelas": {
+        "columns": ["nama_kelas"],
+        "aliases": {"kelas": "nama_kelas"},
+        "tables": ["kelas"],
+    },
+}
+
+
+class BulkImportError(Exception):
+    """File import tidak bisa diproses sama sekali (format/header salah)"""
+
+
+# =====================================================
+# PEMBACA FILE (streaming per chunk)
+# =====================================================
+def _normalize_header(header) -> str:
+    return str(header or "").strip().lower().replace(" ", "_")
+
+
+def _cell_text(value) -> str:
+    # Angka dari Excel (mis. kode buku 12) terbaca sebagai 12.0
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _map_columns(headers, entity: str) -> dict:
+    """Petakan nama kolom file -> index kolom untuk entity"""
+    spec = ENTITIES[entity]
+    mapping = {}
+    for index, header in enumerate(headers):
+        name = _normalize_header(header)
+        name = spec["aliases"].get(name, name)
+        if name in spec["columns"] and name not in mapping:
+            mapping[name] = index
+
+    missing = [c for c in spec["columns"] if c not in mapping]
+    if missing:
+        raise BulkImportError(
+            f"Kolom wajib tidak ditemukan: {', '.join(missing)} "
+            f"(header file: {', '.join(str(h) for h in headers)})"
+        )
+    return mapping
+
+
+def _iter_csv_rows(stream):
+    """Yield (baris_list, progress 0..1) dari file CSV biner"""
+    size = _stream_size(stream)
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    for row in csv.reader(text, dialect):
+        yield row, (stream.tell() / size if size else 0.0)
+    text.detach()
+
+
+def _iter_xlsx_rows(stream):
+    """Yield (baris_list, progress 0..1) dari sheet pertama file .xlsx"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise BulkImportError("Import Excel membutuhkan paket openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row or 0
+        for number, row in enumerate(sheet.iter_rows(values_only=True), start=1):
+            yield ["" if v is None else v for v in row], (number / total if total else 0.0)
+    finally:
+        workbook.close()
+
+
+def _stream_size(stream) -> int:
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(position)
+        return size
+    except (OSError, AttributeError):
+        return 0
+
+
+def iter_chunks(stream, filename: str, entity: str, chunk_size: int = CHUNK_SIZE):
+    """Yield (chunk, errors, progress).
+
+    chunk  : list of tuple nilai kolom yang valid (urutan sesuai ENTITIES[entity]["columns"])
+    errors : list of dict {"baris", "pesan"} untuk baris yang ditolak
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        rows = _iter_csv_rows(stream)
+    elif extension in (".xlsx", ".xlsm"):
+        rows = _iter_xlsx_rows(stream)
+    else:
+        raise BulkImportError(f"Format file tidak didukung: {extension} (gunakan .csv atau .xlsx)")
+
+    columns = ENTITIES[entity]["columns"]
+    try:
+        headers, progress = next(rows)
+    except StopIteration:
+        raise BulkImportError("File kosong")
+    mapping = _map_columns(headers, entity)
+
+    chunk, errors = [], []
+    for line_number, (row, progress) in enumerate(rows, start=2):
+        if not any(str(v).strip() for v in row):
+            continue  # baris kosong
+
+        values, problem = [], None
+        for column in columns:
+            index = mapping[column]
+            value = _cell_text(row[index]) if index < len(row) else ""
+            if not value:
+                problem = f"{column} kosong"
+                break
+            if len(value) > MAX_TEXT_LENGTH:
+                problem = f"{column} lebih dari {MAX_TEXT_LENGTH} karakter"
+                break
+            values.append(value)
+
+        if problem:
+            errors.append({"baris": line_number, "pesan": problem})
+        else:
+            chunk.append(tuple(values))
+
+        if len(chunk) >= chunk_size:
+            yield chunk, errors, progress
+            chunk, errors = [], []
+
+    if chunk or errors:
+        yield chunk, errors, 1.0
+
+
+# =====================================================
+# PENULIS (executemany per chunk)
+# =====================================================
+def _write_buku(conn, chunk) -> int:
+    cur = conn.executemany("""
+        INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)
+        ON CONFLICT(kode_buku) DO UPDATE SET nama_buku = excluded.nama_buku
+        WHERE buku.nama_buku IS NOT excluded.nama_buku
+    """, chunk)
+    return cur.rowcount
+
+
+def _insert_missing_kelas(conn, names) -> int:
+    cur = conn.executemany("""
+        INSERT INTO kelas (nama_kelas)
+        SELECT ? WHERE NOT EXISTS (SELECT 1 FROM kelas WHERE nama_kelas = ?)
+    """, [(name, name) for name in names])
+    return cur.rowcount
+
+
+def _write_kelas(conn, chunk) -> int:
+    return _insert_missing_kelas(conn, dict.fromkeys(row[0] for row in chunk))
+
+
+def _write_siswa(conn, chunk) -> int:
+    names = list(dict.fromkeys(row[1] for row in chunk))
+    _insert_missing_kelas(conn, names)
+
+    # Kelas dengan nama ganda: pakai id terkecil, sama seperti lookup di aplikasi
+    kelas_ids = {}
+    for start in range(0, len(names), 500):
+        part = names[start:start + 500]
+        placeholders = ",".join("?" * len(part))
+        for id_kelas, nama_kelas in conn.execute(
+            f"SELECT MIN(id_kelas), nama_kelas FROM kelas "
+            f"WHERE nama_kelas IN ({placeholders}) GROUP BY nama_kelas", part
+        ):
+            kelas_ids[nama_kelas] = id_kelas
+
+    params = []
+    for nama_siswa, nama_kelas in dict.fromkeys(chunk):
+        id_kelas = kelas_ids[nama_kelas]
+        params.append((nama_siswa, id_kelas, nama_siswa, id_kelas))
+    cur = conn.executemany("""
+        INSERT INTO siswa (nama_siswa, id_kelas)
+        SELECT ?, ? WHERE NOT EXISTS (
+            SELECT 1 FROM siswa WHERE nama_siswa = ? AND id_kelas = ?
+        )
+    """, params)
+    return cur.rowcount
+
+
+WRITERS = {"buku": _write_buku, "siswa": _write_siswa, "kelas": _write_kelas}
+
+
+def import_file(stream, filename: str, entity: str, progress=None,
+                chunk_size: int = CHUNK_SIZE) -> dict:
+    """Import file (objek biner) ke tabel `entity` dalam satu transaksi.
+
+    `progress(fraction, rows_done)` dipanggil setiap selesai satu chunk.
+    Baris yang tidak valid dilewati dan dilaporkan; kesalahan database
+    membatalkan seluruh import.
+    """
+    if entity not in ENTITIES:
+        raise BulkImportError(f"Jenis data tidak dikenal: {entity}")
+
+    writer = WRITERS[entity]
+    started = time.perf_counter()
+    result = {"entity": entity, "valid": 0, "changed": 0, "errors": []}
+
+    with DatabaseConnection.connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for chunk, errors, fraction in iter_chunks(stream, filename, entity, chunk_size):
+            if chunk:
+                result["changed"] += writer(conn, chunk)
+            result["valid"] += len(chunk)
+            result["errors"].extend(errors)
+            if progress:
+                progress(min(fraction, 1.0), result["valid"] + len(result["errors"]))
+
+    invalidate_tables(*ENTITIES[entity]["tables"])
+    result["total"] = result["valid"] + len(result["errors"])
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def errors_to_csv(errors) -> str:
+    """Laporan error sebagai teks CSV (untuk diunduh / disimpan)"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=["baris", "pesan"])
+    writer.writeheader()
+    writer.writerows(errors)
+    return output.getvalue()
+
+
+# =====================================================
+# CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import massal data perpustakaan dari CSV/XLSX")
+    parser.add_argument("entity", choices=sorted(ENTITIES), help="jenis data")
+    parser.add_argument("file", help="file .csv atau .xlsx")
+    parser.add_argument("--db", default=None, help="path database (default: perpustakaan_final.db)")
+    parser.add_argument("--errors", default=None, help="simpan laporan error ke file CSV ini")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.db:
+        DatabaseConnection.configure(args.db)
+    if not os.path.exists(DatabaseConnection.get_path()):
+        print(f"✗ [IMPORT] Database tidak ditemukan: {DatabaseConnection.get_path()}")
+        return 1
+    initialize_database()  # pastikan index unik kode_buku sudah ada
+
+    def show_progress(fraction, rows):
+        print(f"\r  {fraction * 100:5.1f}%  {rows} baris", end="", flush=True)
+
+    try:
+        with open(args.file, "rb") as stream:
+            result = import_file(stream, args.file, args.entity, show_progress, args.chunk_size)
+    except BulkImportError as e:
+        print(f"\n✗ [IMPORT] {e}")
+        return 1
+    print()
+
+    print(f"✓ [IMPORT] {result['valid']} baris valid, {result['changed']} baris berubah, "
+          f"{len(result['errors'])} baris ditolak ({result['seconds']:.2f} detik)")
+    for error in result["errors"][:20]:
+        print(f"  baris {error['baris']}: {error['pesan']}")
+    if len(result["errors"]) > 20:
+        print(f"  ... dan {len(result['errors']) - 20} error lainnya")
+    if args.errors and result["errors"]:
+        with open(args.errors, "w", encoding="utf-8", newline="") as f:
+            f.write(errors_to_csv(result["errors"]))
+        print(f"✓ [IMPORT] Laporan error disimpan: {args.errors}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# database.py
+# Layer koneksi database SQLite (connection pool)
+# Modul ini sengaja dipisah dari app.py: Streamlit mengeksekusi ulang app.py
+# di setiap rerun, sedangkan modul yang di-import hanya dimuat sekali per proses,
+# sehingga pool di sini dipakai bersama oleh semua sesi dan semua rerun.
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from migrations import run_migrations
+
+DB_PATH = "perpustakaan_final.db"
+
+# PRAGMA per-koneksi, dijalankan SEKALI saat koneksi dibuat
+CONNECTION_PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA synchronous = NORMAL",      # aman untuk WAL, fsync hanya saat checkpoint
+    "PRAGMA cache_size = -16000",       # ~16 MB page cache per koneksi
+    "PRAGMA mmap_size = 134217728",     # 128 MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+]
+
+# Interval menjalankan PRAGMA optimize (detik)
+OPTIMIZE_INTERVAL = 60 * 60
+
+
+class PoolTimeoutError(Exception):
+    """Semua koneksi di pool sedang dipakai dan tidak ada yang kembali tepat waktu"""
+
+
+class ConnectionPool:
+    """Pool koneksi SQLite berukuran terbatas dan thread-safe"""
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 10.0):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _new_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Ambil koneksi dari pool (buat baru jika belum mencapai max_size)"""
+        if self._closed:
+            raise RuntimeError("Connection pool sudah ditutup")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._new_connection()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f"Tidak ada koneksi tersedia dalam {self.timeout} detik "
+                f"(max_size={self.max_size})"
+            )
+
+    def release(self, conn: sqlite3.Connection):
+        """Kembalikan koneksi ke pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """Context manager: commit jika sukses, rollback jika error"""
+        conn = self.acquire()
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Tutup semua koneksi idle; koneksi yang sedang dipakai ditutup saat dikembalikan"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        return {
+            "max_size": self.max_size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+            "in_use": self._created - self._idle.qsize(),
+        }
+
+
+class DatabaseConnection:
+    """Singleton Connection Pool"""
+    _pool = None
+    _db_path = DB_PATH
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, db_path: str):
+        """Arahkan pool ke file database lain (script CLI, benchmark)"""
+        global _settings
+        cls.close_all()
+        with cls._lock:
+            cls._db_path = db_path
+        _settings = None
+
+    @classmethod
+    def get_path(cls) -> str:
+        return cls._db_path
+
+    @classmethod
+    def get_pool(cls) -> ConnectionPool:
+        if cls._pool is None:
+            with cls._lock:
+                if cls._pool is None:
+                    cls._pool = ConnectionPool(cls._db_path)
+        return cls._pool
+
+    @classmethod
+    def connection(cls):
+        """Pinjam koneksi dari pool: `with DatabaseConnection.connection() as conn:`"""
+        return cls.get_pool().connection()
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.close_all()
+                cls._pool = None
+
+
+# =====================================================
+# INISIALISASI DATABASE (sekali per proses)
+# =====================================================
+_init_lock = threading.Lock()
+_settings = None
+_last_optimize = 0.0
+
+
+def initialize_database() -> dict:
+    """Aktifkan WAL, jalankan migrasi skema dan optimize awal,
+    lalu kembalikan setting efektif.
+
+    Aman dipanggil di setiap rerun: pekerjaan hanya dilakukan sekali per proses.
+    """
+    global _settings, _last_optimize
+    if _settings is not None:
+        return _settings
+
+    with _init_lock:
+        if _settings is None:
+            with DatabaseConnection.connection() as conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+                run_migrations(conn)
+                conn.execute("PRAGMA optimize")
+                settings = {
+                    name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                    for name in ("journal_mode", "synchronous", "cache_size",
+                                 "mmap_size", "temp_store", "busy_timeout")
+                }
+                settings["schema_version"] = conn.execute(
+                    "SELECT MAX(version) FROM schema_migrations"
+                ).fetchone()[0]
+            _last_optimize = time.monotonic()
+            _settings = settings
+            print(f"✓ [DB] {DatabaseConnection.get_path()} siap: " +
+                  ", ".join(f"{k}={v}" for k, v in settings.items()))
+    return _settings
+
+
+_replaced_listeners = []
+
+
+def on_database_replaced(callback):
+    """Daftarkan callback() yang dipanggil setelah isi file database diganti (restore)"""
+    if callback not in _replaced_listeners:
+        _replaced_listeners.append(callback)
+
+
+def reload_database(db_path: str):
+    """Dipanggil setelah file `db_path` diganti hasil restore / download.
+
+    Migrasi dijalankan ulang karena skema hasil restore bisa lebih lama.
+    Jika pool memakai file itu, koneksi lama ditutup dan listener (cache query,
+    index autocomplete) membuang isi yang dibangun dari database sebelumnya.
+    """
+    if os.path.abspath(db_path) != os.path.abspath(DatabaseConnection.get_path()):
+        conn = sqlite3.connect(db_path)
+        try:
+            run_migrations(conn)
+        finally:
+            conn.close()
+        return
+
+    DatabaseConnection.configure(db_path)
+    initialize_database()
+    for callback in list(_replaced_listeners):
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠ [DB] Listener restore gagal: {e}")
+
+
+def get_database_settings() -> dict:
+    """Setting PRAGMA efektif hasil initialize_database()"""
+    return dict(_settings or {})
+
+
+def maybe_optimize(interval: float = OPTIMIZE_INTERVAL) -> bool:
+    """Jalankan PRAGMA optimize jika sudah lewat `interval` detik sejak terakhir"""
+    global _last_optimize
+    now = time.monotonic()
+    if now - _last_optimize < interval:
+        return False
+
+    with _init_lock:
+        if now - _last_optimize < interval:
+            return False
+        _last_optimize = now
+
+    with DatabaseConnection.connection() as conn:
+        conn.execute("PRAGMA optimize")
+    return True
+
+
+def _shutdown():
+    try:
+        with DatabaseConnection.connection() as conn:
+            conn.execute("PRAGMA optimize")
+    except Exception:
+        pass
+    DatabaseConnection.close_all()
+
+
+atexit.register(_shutdown)
@@ -0,0 +1,295 @@
+# export.py
+# Export tabel peminjaman, siswa dan buku ke CSV / Excel (.xlsx) / PDF.
+#
+# Baris diambil dari SQLite per potongan (cursor.fetchmany) dan langsung
+# ditulis ke generator file, tanpa DataFrame. Hasilnya ditampung di file
+# sementara (di memori sampai 1 MB, selebihnya di disk), jadi pemakaian
+# memori saat MEMBUAT file tetap kecil berapapun jumlah barisnya.
+#
+# Yang dibaca per potongan hanya sampai file sementara: CLI di bawah
+# menyalinnya ke disk per 64 KB, tetapi st.download_button di UI membaca
+# seluruh file ke memori (disimpan media file manager Streamlit), jadi di UI
+# puncak memori tetap sebesar file hasil export.
+#
+# Pemakaian CLI:
+#   python export.py peminjaman csv laporan.csv
+#   python export.py buku xlsx katalog.xlsx
+
+import argparse
+import csv
+import io
+import sys
+import tempfile
+from datetime import datetime
+
+from database import DatabaseConnection
+
+FETCH_SIZE = 1000
+SPOOL_LIMIT = 1024 * 1024
+
+EXPORTS = {
+    "peminjaman": {
+        "title": "Data Peminjaman",
+        "sql": """
+            SELECT p.id_peminjaman, s.nama_siswa, k.nama_kelas, b.kode_buku, b.nama_buku,
+                   p.tanggal_pinjam, p.tanggal_jatuh_tempo, p.tanggal_kembali, p.status
+            FROM peminjaman p
+            JOIN siswa s ON p.id_siswa = s.id_siswa
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+            JOIN buku b ON p.id_buku = b.id_buku
+            {where}
+            ORDER BY p.id_peminjaman DESC
+        """,
+        "filter": "p.status = ?",
+    },
+    "siswa": {
+        "title": "Data Siswa",
+        "sql": """
+            SELECT s.id_siswa, s.nama_siswa, k.nama_kelas
+            FROM siswa s
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+            ORDER BY s.id_siswa
+        """,
+    },
+    "buku": {
+        "title": "Data Buku",
+        "sql": "SELECT id_buku, kode_buku, nama_buku FROM buku ORDER BY id_buku",
+    },
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+}
+
+
+class ExportError(Exception):
+    """Export tidak bisa dibuat (jenis data / format tidak dikenal, paket tidak ada)"""
+
+
+def iter_rows(entity: str, status_filter: str = "ALL", fetch_size: int = FETCH_SIZE):
+    """Yield header (tuple nama kolom) lalu setiap baris data, diambil per potongan"""
+    if entity not in EXPORTS:
+        raise ExportError(f"Jenis data tidak dikenal: {entity}")
+    spec = EXPORTS[entity]
+
+    params = ()
+    where = ""
+    if spec.get("filter") and status_filter != "ALL":
+        where, params = f"WHERE {spec['filter']}", (status_filter,)
+
+    with DatabaseConnection.connection() as conn:
+        cursor = conn.execute(spec["sql"].format(where=where), params)
+        yield tuple(column[0] for column in cursor.description)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+
+
+# =====================================================
+# GENERATOR FILE
+# =====================================================
+def write_csv(rows, output):
+    text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+    csv.writer(text).writerows(rows)
+    text.flush()
+    text.detach()
+
+
+def write_xlsx(rows, output, title: str = "Data"):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError("Export Excel membutuhkan paket openpyxl (pip install openpyxl)")
+
+    # write_only: baris langsung di-stream ke XML sheet, tidak disimpan di memori
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(output)
+
+
+class _PdfWriter:
+    """Generator PDF minimal (teks Courier, A4 landscape) yang menulis per halaman.
+
+    Hanya objek halaman yang sedang dibuat yang ada di memori; offset objek
+    dicatat untuk tabel xref di akhir file.
+    """
+
+    PAGE_WIDTH, PAGE_HEIGHT = 842, 595
+    MARGIN = 36
+    FONT_SIZE = 8
+    LEADING = 11
+    CHAR_WIDTH = FONT_SIZE * 0.6        # Courier: lebar karakter tetap
+
+    def __init__(self, output):
+        self.output = output
+        self.offsets = {}
+        self.pages = []
+        self.position = 0
+        self.next_id = 4                # 1 = catalog, 2 = pages, 3 = font
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def lines_per_page(self) -> int:
+        return int((self.PAGE_HEIGHT - 2 * self.MARGIN) / self.LEADING)
+
+    @property
+    def chars_per_line(self) -> int:
+        return int((self.PAGE_WIDTH - 2 * self.MARGIN) / self.CHAR_WIDTH)
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id: int, body: bytes):
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text: str) -> bytes:
+        data = text.encode("latin-1", "replace")
+        return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def add_page(self, lines):
+        content = [b"BT /F1 %d Tf %d TL %d %d Td" % (
+            self.FONT_SIZE, self.LEADING, self.MARGIN, self.PAGE_HEIGHT - self.MARGIN)]
+        for line in lines:
+            content.append(b"(" + self._escape(line) + b") '")
+        content.append(b"ET")
+        stream = b"\n".join(content)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        self._object(page_id, b"<< /Type /Page /Parent 2 0 R /Contents %d 0 R >>" % content_id)
+        self.pages.append(page_id)
+
+    def close(self):
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+                        b"/Encoding /WinAnsiEncoding >>")
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.pages)
+        self._object(2, b"<< /Type /Pages /Kids [%s] /Count %d /Resources << /Font << /F1 3 0 R >> >> "
+                        b"/MediaBox [0 0 %d %d] >>" % (kids, len(self.pages),
+                                                       self.PAGE_WIDTH, self.PAGE_HEIGHT))
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_position = self.position
+        size = self.next_id
+        entries = [b"0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            entries.append(b"%010d 00000 n \n" % self.offsets[object_id])
+        self._write(b"xref\n0 %d\n" % size + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (size, xref_position))
+
+
+def write_pdf(rows, output, title: str = "Data", column_widths=None):
+    """Tabel teks lebar tetap. Lebar kolom diambil dari `column_widths`
+    (default: dibagi rata), teks yang terlalu panjang dipotong."""
+    rows = iter(rows)
+    header = next(rows)
+    pdf = _PdfWriter(output)
+
+    available = pdf.chars_per_line - (len(header) - 1) * 2
+    widths = column_widths or [max(4, available // len(header))] * len(header)
+
+    def format_row(values):
+        cells = []
+        for value, width in zip(values, widths):
+            text = "" if value is None else str(value)
+            cells.append(text[:width].ljust(width))
+        return "  ".join(cells).rstrip()
+
+    heading = [f"{title} - dicetak {datetime.now().strftime('%d-%m-%Y %H:%M')}", "",
+               format_row(header), "-" * min(pdf.chars_per_line, sum(widths) + 2 * (len(widths) - 1))]
+    page_number = 1
+    lines = list(heading)
+    for row in rows:
+        lines.append(format_row(row))
+        if len(lines) >= pdf.lines_per_page - 2:
+            lines += ["", f"Halaman {page_number}"]
+            pdf.add_page(lines)
+            page_number += 1
+            lines = list(heading)
+    lines += ["", f"Halaman {page_number}"]
+    pdf.add_page(lines)
+    pdf.close()
+
+
+PDF_COLUMN_WIDTHS = {
+    "peminjaman": [5, 22, 10, 10, 30, 10, 10, 10, 12],
+    "siswa": [8, 60, 30],
+    "buku": [8, 20, 80],
+}
+
+
+def export_file(entity: str, fmt: str, status_filter: str = "ALL"):
+    """Buat file export. Return file sementara (posisi di awal) yang siap dibaca."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Format export tidak dikenal: {fmt}")
+
+    rows = iter_rows(entity, status_filter)
+    title = EXPORTS[entity]["title"]
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT)
+    try:
+        if fmt == "csv":
+            write_csv(rows, output)
+        elif fmt == "xlsx":
+            write_xlsx(rows, output, title)
+        else:
+            write_pdf(rows, output, title, PDF_COLUMN_WIDTHS.get(entity))
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+
+def export_bytes(entity: str, fmt: str, status_filter: str = "ALL") -> bytes:
+    """Isi file export sebagai bytes (data untuk st.download_button, yang
+    tidak menerima SpooledTemporaryFile)"""
+    with export_file(entity, fmt, status_filter) as exported:
+        return exported.read()
+
+
+def export_filename(entity: str, fmt: str) -> str:
+    return f"{entity}_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+
+
+# =====================================================
+# CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export data perpustakaan ke CSV/XLSX/PDF")
+    parser.add_argument("entity", choices=sorted(EXPORTS), help="jenis data")
+    parser.add_argument("format", choices=sorted(FORMATS), help="format file")
+    parser.add_argument("file", nargs="?", help="file tujuan (default: <jenis>_<tanggal>.<format>)")
+    parser.add_argument("--db", default=None, help="path database (default: perpustakaan_final.db)")
+    parser.add_argument("--status", default="ALL", help="filter status peminjaman")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        DatabaseConnection.configure(args.db)
+    target = args.file or export_filename(args.entity, args.format)
+    try:
+        with export_file(args.entity, args.format, args.status) as exported, \
+                open(target, "wb") as f:
+            while True:
+                block = exported.read(64 * 1024)
+                if not block:
+                    break
+                f.write(block)
+    except ExportError as e:
+        print(f"✗ [EXPORT] {e}")
+        return 1
+    print(f"✓ [EXPORT] {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
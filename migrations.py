@@ -0,0 +1,344 @@
+# migrations.py
+# Migrasi skema database yang diberi nomor versi.
+# Versi yang sudah dijalankan dicatat di tabel schema_migrations,
+# jadi setiap migrasi hanya berjalan SEKALI per database.
+#
+# Menambah migrasi baru: tambahkan entry di MIGRATIONS dengan versi berikutnya.
+# Langkah migrasi boleh berupa string SQL atau fungsi `step(conn)`.
+# Jangan pernah mengubah migrasi yang sudah dirilis.
+
+import sqlite3
+from datetime import datetime
+
+# Lama pinjam standar (hari). Dipakai trigger jatuh tempo di bawah dan oleh
+# models.py; mengubahnya butuh migrasi baru yang membuat ulang trigger tersebut.
+LAMA_PINJAM_HARI = 3
+
+
+class MigrationError(Exception):
+    """Migrasi gagal dijalankan (seluruh migrasi tersebut di-rollback)"""
+
+
+def _check_kode_buku_unik(conn):
+    duplikat = conn.execute("""
+        SELECT kode_buku, COUNT(*) FROM buku
+        WHERE kode_buku IS NOT NULL
+        GROUP BY kode_buku HAVING COUNT(*) > 1
+        LIMIT 10
+    """).fetchall()
+    if duplikat:
+        daftar = ", ".join(f"{kode} ({n}x)" for kode, n in duplikat)
+        raise MigrationError(
+            f"kode_buku duplikat, rapikan dulu sebelum membuat unique index: {daftar}"
+        )
+
+def _add_kolom(table: str, column: str, definition: str):
+    """Langkah migrasi ALTER TABLE ADD COLUMN yang aman dijalankan ulang"""
+    def step(conn):
+        kolom = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in kolom:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def _delta_bulanan(row: str, sign: str, kelas: str) -> str:
+    return f"""
+        INSERT INTO statistik_bulanan (bulan, id_kelas, jumlah)
+        VALUES (substr({row}.tanggal_pinjam, 1, 7), {kelas}, {sign}1)
+        ON CONFLICT(bulan, id_kelas) DO UPDATE SET jumlah = jumlah {sign} 1;"""
+
+
+def _delta_buku(row: str, sign: str) -> str:
+    return f"""
+        INSERT INTO statistik_buku (id_buku, jumlah) VALUES ({row}.id_buku, {sign}1)
+        ON CONFLICT(id_buku) DO UPDATE SET jumlah = jumlah {sign} 1;"""
+
+
+def _delta_status(row: str, sign: str) -> str:
+    return f"""
+        INSERT INTO statistik_status (status, jumlah)
+        VALUES (COALESCE({row}.status, 'dipinjam'), {sign}1)
+        ON CONFLICT(status) DO UPDATE SET jumlah = jumlah {sign} 1;"""
+
+
+def _statistik_delta(row: str, sign: str) -> str:
+    """SQL trigger untuk menambah (+) / mengurangi (-) ringkasan dari baris old/new
+    (versi migrasi 5: kelas diambil dari kelas siswa saat trigger berjalan)"""
+    kelas = f"COALESCE((SELECT id_kelas FROM siswa WHERE id_siswa = {row}.id_siswa), 0)"
+    return _delta_bulanan(row, sign, kelas) + _delta_buku(row, sign) + _delta_status(row, sign)
+
+
+def _create_statistik_triggers(conn):
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS peminjaman_statistik_ai
+        AFTER INSERT ON peminjaman BEGIN {_statistik_delta("new", "+")}
+    END""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS peminjaman_statistik_ad
+        AFTER DELETE ON peminjaman BEGIN {_statistik_delta("old", "-")}
+    END""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS peminjaman_statistik_au
+        AFTER UPDATE OF id_siswa, id_buku, tanggal_pinjam, status ON peminjaman BEGIN
+        {_statistik_delta("old", "-")}
+        {_statistik_delta("new", "+")}
+    END""")
+
+
+def _kelas_peminjaman(row: str) -> str:
+    # id_kelas hanya NULL sesaat setelah INSERT dari penulis yang tidak mengisinya
+    # (sebelum peminjaman_kelas_ai mengisinya): saat itu kelas siswa = kelas saat pinjam
+    return (f"COALESCE({row}.id_kelas, "
+            f"(SELECT id_kelas FROM siswa WHERE id_siswa = {row}.id_siswa), 0)")
+
+
+def _recreate_statistik_triggers(conn):
+    """Trigger ringkasan versi 8: kelas dari peminjaman.id_kelas (kelas saat pinjam),
+    dan perubahan status (pengembalian) hanya menyentuh statistik_status"""
+    for name in ("peminjaman_statistik_ai", "peminjaman_statistik_ad",
+                 "peminjaman_statistik_au", "peminjaman_statistik_status_au"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    def semua(row, sign):
+        return (_delta_bulanan(row, sign, _kelas_peminjaman(row))
+                + _delta_buku(row, sign) + _delta_status(row, sign))
+
+    conn.execute(f"""CREATE TRIGGER peminjaman_statistik_ai
+        AFTER INSERT ON peminjaman BEGIN {semua("new", "+")}
+    END""")
+    conn.execute(f"""CREATE TRIGGER peminjaman_statistik_ad
+        AFTER DELETE ON peminjaman BEGIN {semua("old", "-")}
+    END""")
+    conn.execute(f"""CREATE TRIGGER peminjaman_statistik_status_au
+        AFTER UPDATE OF status ON peminjaman BEGIN
+        {_delta_status("old", "-")}
+        {_delta_status("new", "+")}
+    END""")
+    conn.execute(f"""CREATE TRIGGER peminjaman_statistik_au
+        AFTER UPDATE OF id_buku, tanggal_pinjam, id_kelas ON peminjaman BEGIN
+        {_delta_bulanan("old", "-", _kelas_peminjaman("old"))}
+        {_delta_buku("old", "-")}
+        {_delta_bulanan("new", "+", _kelas_peminjaman("new"))}
+        {_delta_buku("new", "+")}
+    END""")
+
+
+def _create_versi_triggers(conn):
+    """Setiap INSERT/UPDATE/DELETE menaikkan table_versions.versi di transaksi yang sama,
+    jadi perubahan dari proses mana pun (app, API, import CLI) terlihat oleh cache query"""
+    for table in ("kelas", "siswa", "buku", "peminjaman"):
+        conn.execute("INSERT OR IGNORE INTO table_versions (nama) VALUES (?)", (table,))
+        for event, suffix in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad")):
+            conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {table}_versi_{suffix}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET versi = versi + 1 WHERE nama = '{table}';
+                END""")
+
+
+# (versi, nama, [langkah])
+MIGRATIONS = [
+    (1, "index pencarian kode buku", [
+        _check_kode_buku_unik,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_buku_kode ON buku(kode_buku)",
+    ]),
+    (2, "index lookup siswa dan kelas", [
+        "CREATE INDEX IF NOT EXISTS idx_siswa_nama_kelas ON siswa(nama_siswa, id_kelas)",
+        "CREATE INDEX IF NOT EXISTS idx_kelas_nama ON kelas(nama_kelas)",
+    ]),
+    (3, "index status peminjaman", [
+        "CREATE INDEX IF NOT EXISTS idx_peminjaman_status "
+        "ON peminjaman(status, id_peminjaman)",
+        "CREATE INDEX IF NOT EXISTS idx_peminjaman_aktif "
+        "ON peminjaman(id_peminjaman) WHERE status = 'dipinjam'",
+    ]),
+    (4, "full-text search buku dan siswa (FTS5)", [
+        # External-content FTS5: teks tetap di tabel asli, index dijaga trigger.
+        # remove_diacritics 2 -> "é" dicari dengan "e"; prefix index untuk ketik-cari.
+        """CREATE VIRTUAL TABLE IF NOT EXISTS buku_fts USING fts5(
+            kode_buku, nama_buku,
+            content='buku', content_rowid='id_buku',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS buku_fts_ai AFTER INSERT ON buku BEGIN
+            INSERT INTO buku_fts(rowid, kode_buku, nama_buku)
+            VALUES (new.id_buku, new.kode_buku, new.nama_buku);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS buku_fts_ad AFTER DELETE ON buku BEGIN
+            INSERT INTO buku_fts(buku_fts, rowid, kode_buku, nama_buku)
+            VALUES ('delete', old.id_buku, old.kode_buku, old.nama_buku);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS buku_fts_au AFTER UPDATE OF kode_buku, nama_buku ON buku BEGIN
+            INSERT INTO buku_fts(buku_fts, rowid, kode_buku, nama_buku)
+            VALUES ('delete', old.id_buku, old.kode_buku, old.nama_buku);
+            INSERT INTO buku_fts(rowid, kode_buku, nama_buku)
+            VALUES (new.id_buku, new.kode_buku, new.nama_buku);
+        END""",
+        "INSERT INTO buku_fts(buku_fts) VALUES ('rebuild')",
+
+        """CREATE VIRTUAL TABLE IF NOT EXISTS siswa_fts USING fts5(
+            nama_siswa,
+            content='siswa', content_rowid='id_siswa',
+            tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS siswa_fts_ai AFTER INSERT ON siswa BEGIN
+            INSERT INTO siswa_fts(rowid, nama_siswa) VALUES (new.id_siswa, new.nama_siswa);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS siswa_fts_ad AFTER DELETE ON siswa BEGIN
+            INSERT INTO siswa_fts(siswa_fts, rowid, nama_siswa)
+            VALUES ('delete', old.id_siswa, old.nama_siswa);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS siswa_fts_au AFTER UPDATE OF nama_siswa ON siswa BEGIN
+            INSERT INTO siswa_fts(siswa_fts, rowid, nama_siswa)
+            VALUES ('delete', old.id_siswa, old.nama_siswa);
+            INSERT INTO siswa_fts(rowid, nama_siswa) VALUES (new.id_siswa, new.nama_siswa);
+        END""",
+        "INSERT INTO siswa_fts(siswa_fts) VALUES ('rebuild')",
+    ]),
+    (5, "tabel ringkasan statistik peminjaman", [
+        # Ringkasan dijaga trigger, jadi dashboard cukup membaca beberapa baris
+        # ringkasan, bukan memindai seluruh riwayat peminjaman.
+        # Kelas per bulan: lihat migrasi 8 (kelas dicatat di baris peminjaman).
+        """CREATE TABLE IF NOT EXISTS statistik_bulanan (
+            bulan TEXT NOT NULL,
+            id_kelas INTEGER NOT NULL,
+            jumlah INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bulan, id_kelas)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS statistik_buku (
+            id_buku INTEGER PRIMARY KEY,
+            jumlah INTEGER NOT NULL DEFAULT 0
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_statistik_buku_jumlah ON statistik_buku(jumlah)",
+        """CREATE TABLE IF NOT EXISTS statistik_status (
+            status TEXT PRIMARY KEY,
+            jumlah INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        _create_statistik_triggers,
+        "DELETE FROM statistik_bulanan",
+        "DELETE FROM statistik_buku",
+        "DELETE FROM statistik_status",
+        """INSERT INTO statistik_bulanan (bulan, id_kelas, jumlah)
+           SELECT substr(p.tanggal_pinjam, 1, 7), COALESCE(s.id_kelas, 0), COUNT(*)
+           FROM peminjaman p LEFT JOIN siswa s ON s.id_siswa = p.id_siswa
+           GROUP BY 1, 2""",
+        """INSERT INTO statistik_buku (id_buku, jumlah)
+           SELECT id_buku, COUNT(*) FROM peminjaman GROUP BY id_buku""",
+        """INSERT INTO statistik_status (status, jumlah)
+           SELECT COALESCE(status, 'dipinjam'), COUNT(*) FROM peminjaman GROUP BY 1""",
+    ]),
+    (6, "tanggal jatuh tempo peminjaman", [
+        _add_kolom("peminjaman", "tanggal_jatuh_tempo", "DATE"),
+        # Data lama: lama pinjam standar
+        f"""UPDATE peminjaman
+           SET tanggal_jatuh_tempo = date(tanggal_pinjam, '+{LAMA_PINJAM_HARI} days')
+           WHERE tanggal_jatuh_tempo IS NULL""",
+        # Penulis lain (import, script) yang tidak mengisi jatuh tempo
+        f"""CREATE TRIGGER IF NOT EXISTS peminjaman_jatuh_tempo_ai
+           AFTER INSERT ON peminjaman WHEN new.tanggal_jatuh_tempo IS NULL BEGIN
+               UPDATE peminjaman
+               SET tanggal_jatuh_tempo = date(new.tanggal_pinjam, '+{LAMA_PINJAM_HARI} days')
+               WHERE id_peminjaman = new.id_peminjaman;
+           END""",
+        # Partial index: hanya peminjaman aktif, urut jatuh tempo.
+        # "Semua yang terlambat" = satu range scan, berapapun panjang riwayatnya.
+        "CREATE INDEX IF NOT EXISTS idx_peminjaman_jatuh_tempo "
+        "ON peminjaman(tanggal_jatuh_tempo) WHERE status = 'dipinjam'",
+    ]),
+    (7, "kode kartu siswa dan lookup scan barcode", [
+        # Kode yang dicetak di kartu siswa (barcode / QR), mis. S00012
+        _add_kolom("siswa", "kode_siswa", "TEXT"),
+        "UPDATE siswa SET kode_siswa = printf('S%05d', id_siswa) WHERE kode_siswa IS NULL",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_siswa_kode ON siswa(kode_siswa)",
+        """CREATE TRIGGER IF NOT EXISTS siswa_kode_ai
+           AFTER INSERT ON siswa WHEN new.kode_siswa IS NULL BEGIN
+               UPDATE siswa SET kode_siswa = printf('S%05d', new.id_siswa)
+               WHERE id_siswa = new.id_siswa;
+           END""",
+        # Pengembalian lewat scan: kode buku -> satu-satunya peminjaman aktif
+        "CREATE INDEX IF NOT EXISTS idx_peminjaman_aktif_buku "
+        "ON peminjaman(id_buku) WHERE status = 'dipinjam'",
+    ]),
+    (8, "kelas peminjaman untuk statistik bulanan", [
+        # Trigger migrasi 5 mengambil kelas siswa SAAT INI, jadi siswa yang naik
+        # kelas sebelum mengembalikan buku menggeser hitungan ke kelas baru.
+        # Kelas saat pinjam sekarang disimpan di baris peminjaman.
+        _add_kolom("peminjaman", "id_kelas", "INTEGER"),
+        # Data lama: kelas saat pinjam tidak tercatat, pakai kelas siswa sekarang
+        """UPDATE peminjaman SET id_kelas = COALESCE(
+               (SELECT id_kelas FROM siswa WHERE siswa.id_siswa = peminjaman.id_siswa), 0)
+           WHERE id_kelas IS NULL""",
+        _recreate_statistik_triggers,
+        # Penulis lain (import, script) yang tidak mengisi id_kelas
+        """CREATE TRIGGER IF NOT EXISTS peminjaman_kelas_ai
+           AFTER INSERT ON peminjaman WHEN new.id_kelas IS NULL BEGIN
+               UPDATE peminjaman SET id_kelas = COALESCE(
+                   (SELECT id_kelas FROM siswa WHERE id_siswa = new.id_siswa), 0)
+               WHERE id_peminjaman = new.id_peminjaman;
+           END""",
+        "DELETE FROM statistik_bulanan",
+        """INSERT INTO statistik_bulanan (bulan, id_kelas, jumlah)
+           SELECT substr(tanggal_pinjam, 1, 7), id_kelas, COUNT(*)
+           FROM peminjaman GROUP BY 1, 2""",
+    ]),
+    (9, "versi tabel untuk invalidasi cache lintas proses", [
+        """CREATE TABLE IF NOT EXISTS table_versions (
+            nama TEXT PRIMARY KEY,
+            versi INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID""",
+        _create_versi_triggers,
+    ]),
+]
+
+
+def _ensure_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+
+def get_applied_versions(conn: sqlite3.Connection) -> set:
+    _ensure_table(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def run_migrations(conn: sqlite3.Connection, migrations=None) -> list:
+    """Jalankan semua migrasi yang belum tercatat. Return daftar versi yang baru dijalankan."""
+    migrations = MIGRATIONS if migrations is None else migrations
+    applied_now = []
+
+    if conn.in_transaction:
+        conn.commit()
+    _ensure_table(conn)
+
+    for version, name, steps in sorted(migrations, key=lambda m: m[0]):
+        # BEGIN IMMEDIATE mengunci penulis lain, lalu cek ulang
+        # supaya dua proses yang start bersamaan tidak menjalankan migrasi dua kali
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            sudah = conn.execute(
+                "SELECT 1 FROM schema_migrations WHERE version = ?", (version,)
+            ).fetchone()
+            if sudah:
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise MigrationError(f"Migrasi {version} ({name}) gagal: {e}") from e
+
+        applied_now.append(version)
+        print(f"✓ [DB] Migrasi {version} dijalankan: {name}")
+
+    return applied_now
@@ -0,0 +1,719 @@
+# models.py
+# Layer data: model per tabel dan service transaksi peminjaman.
+#
+# Tidak bergantung pada Streamlit, jadi dipakai bersama oleh UI (app.py),
+# REST API (api.py) dan script CLI / benchmark.
+
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import analytics
+import profiler
+import query_log
+from database import DatabaseConnection
+from migrations import LAMA_PINJAM_HARI
+from query_cache import cached_query, invalidate_tables, tables_written
+
+# =====================================================
+# MODEL
+# (connection pool ada di database.py)
+# =====================================================
+PAGE_SIZE = 50
+DENDA_PER_HARI = 1000   # Rupiah per hari keterlambatan
+class BaseModel:
+    """Base Model untuk semua entitas"""
+    
+    @staticmethod
+    def execute_query(query: str, params: tuple = (), fetch_one: bool = False):
+        with profiler.phase("sql"), DatabaseConnection.connection() as conn, \
+                query_log.track(query, params, conn) as measured:
+            cur = conn.cursor()
+            cur.execute(query, params)
+            
+            if query.strip().upper().startswith("SELECT"):
+                if fetch_one:
+                    row = cur.fetchone()
+                    measured.rows = int(row is not None)
+                    return row
+                rows = cur.fetchall()
+                measured.rows = len(rows)
+                return rows
+            lastrowid = cur.lastrowid
+            measured.rows = cur.rowcount
+        
+        # Sudah di-commit: hasil cache yang bergantung pada tabel ini tidak berlaku lagi
+        invalidate_tables(*tables_written(query))
+        return lastrowid
+    
+    @staticmethod
+    def read_dataframe(query: str, params: tuple = ()) -> pd.DataFrame:
+        with profiler.phase("sql"), DatabaseConnection.connection() as conn, \
+                query_log.track(query, params, conn) as measured:
+            df = pd.read_sql(query, conn, params=params)
+            measured.rows = len(df)
+        if profiler.active():
+            profiler.record_dataframe(query_log.call_site(1), df)
+        return df
+    
+    @staticmethod
+    def fetch_page(select_sql: str, key: str, where: str = "", params: tuple = (),
+                   cursor: Optional[int] = None, direction: str = "next",
+                   page_size: int = PAGE_SIZE, descending: bool = False) -> Dict:
+        """Keyset pagination pada kolom `key` (primary key).
+        
+        `cursor` adalah key terakhir (direction="next") atau pertama
+        (direction="prev") dari halaman yang sedang ditampilkan.
+        Mengambil page_size + 1 baris untuk tahu apakah masih ada halaman lanjutan.
+        """
+        forward = direction == "next"
+        # Urutan scan: searah urutan tampil untuk "next", berlawanan untuk "prev"
+        scan_desc = descending if forward else not descending
+        
+        conditions = [where] if where else []
+        query_params = list(params)
+        if cursor is not None:
+            conditions.append(f"{key} {'<' if scan_desc else '>'} ?")
+            query_params.append(cursor)
+        
+        query = select_sql
+        if conditions:
+            query += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+        query += f" ORDER BY {key} {'DESC' if scan_desc else 'ASC'} LIMIT ?"
+        query_params.append(page_size + 1)
+        
+        df = BaseModel.read_dataframe(query, tuple(query_params))
+        has_more = len(df) > page_size
+        df = df.iloc[:page_size]
+        if not forward:
+            df = df.iloc[::-1]
+        df = df.reset_index(drop=True)
+        
+        return {
+            "data": df,
+            "has_next": has_more if forward else True,
+            "has_prev": (cursor is not None) if forward else has_more,
+        }
+    
+    @staticmethod
+    def estimate_count(table: str) -> int:
+        """Perkiraan jumlah baris O(1) dari sqlite_sequence (semua tabel pakai AUTOINCREMENT).
+        
+        Ini batas atas: baris yang sudah dihapus ikut terhitung.
+        """
+        result = BaseModel.execute_query(
+            "SELECT seq FROM sqlite_sequence WHERE name = ?", (table,), fetch_one=True
+        )
+        if result:
+            return result[0]
+        return BaseModel.execute_query(f"SELECT COUNT(*) FROM {table}", fetch_one=True)[0]
+    
+    @staticmethod
+    def fts_query(keyword: str) -> Optional[str]:
+        """Ubah input bebas jadi query FTS5: setiap kata dicari sebagai prefix (AND)"""
+        tokens = re.findall(r"\w+", keyword)
+        if not tokens:
+            return None
+        return " ".join(f'"{t}"*' for t in tokens)
+
+class UserModel(BaseModel):
+    """Model untuk User/Admin"""
+    
+    @staticmethod
+    def authenticate(username: str, password: str) -> Optional[Dict]:
+        result = BaseModel.execute_query(
+            "SELECT id_user, username FROM user WHERE username = ? AND password = ?",
+            (username, password),
+            fetch_one=True
+        )
+        if result:
+            return {"id": result[0], "username": result[1]}
+        return None
+
+class KelasModel(BaseModel):
+    """Model untuk Kelas"""
+    
+    @staticmethod
+    @cached_query("kelas")
+    def get_all() -> List[Dict]:
+        results = BaseModel.execute_query(
+            "SELECT id_kelas, nama_kelas FROM kelas ORDER BY id_kelas"
+        )
+        return [{"id": r[0], "nama": r[1]} for r in results]
+    
+    @staticmethod
+    def get_id(nama_kelas: str) -> Optional[int]:
+        result = BaseModel.execute_query(
+            "SELECT id_kelas FROM kelas WHERE nama_kelas = ?",
+            (nama_kelas,),
+            fetch_one=True
+        )
+        return result[0] if result else None
+    
+    @staticmethod
+    def get_or_create(nama_kelas: str) -> str:
+        result = BaseModel.execute_query(
+            "SELECT id_kelas FROM kelas WHERE nama_kelas = ?",
+            (nama_kelas,),
+            fetch_one=True
+        )
+        if result:
+            return result[0]
+        else:
+            return BaseModel.execute_query(
+                "INSERT INTO kelas (nama_kelas) VALUES (?)",
+                (nama_kelas,)
+            )
+    
+    @staticmethod
+    def create(id_kelas: str, nama_kelas: str) -> int:
+        return BaseModel.execute_query(
+            "INSERT INTO kelas (id_kelas, nama_kelas) VALUES (?, ?)",
+            (id_kelas, nama_kelas)
+        )
+    
+    @staticmethod
+    def delete(id_kelas: str) -> bool:
+        BaseModel.execute_query(
+            "DELETE FROM kelas WHERE id_kelas = ?",
+            (id_kelas,)
+        )
+        return True
+
+class SiswaModel(BaseModel):
+    """Model untuk Siswa"""
+    
+    @staticmethod
+    @cached_query("siswa", "kelas")
+    def get_all() -> pd.DataFrame:
+        df = BaseModel.read_dataframe("""
+            SELECT s.id_siswa, s.kode_siswa, s.nama_siswa, k.nama_kelas
+            FROM siswa s
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+            ORDER BY s.id_siswa
+        """)
+        return df
+    
+    @staticmethod
+    @cached_query("siswa", "kelas")
+    def get_page(cursor: Optional[int] = None, direction: str = "next",
+                 page_size: int = PAGE_SIZE) -> Dict:
+        return BaseModel.fetch_page("""
+            SELECT s.id_siswa, s.kode_siswa, s.nama_siswa, k.nama_kelas
+            FROM siswa s
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+        """, "s.id_siswa", cursor=cursor, direction=direction, page_size=page_size)
+    
+    @staticmethod
+    @cached_query("siswa")
+    def count() -> int:
+        return BaseModel.estimate_count("siswa")
+    
+    @staticmethod
+    @cached_query("siswa", "kelas")
+    def search(keyword: str) -> pd.DataFrame:
+        match = BaseModel.fts_query(keyword)
+        if match is None:
+            return pd.DataFrame(columns=["id_siswa", "kode_siswa", "nama_siswa", "nama_kelas"])
+        df = BaseModel.read_dataframe("""
+            SELECT s.id_siswa, s.kode_siswa, s.nama_siswa, k.nama_kelas
+            FROM siswa_fts f
+            JOIN siswa s ON s.id_siswa = f.rowid
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+            WHERE siswa_fts MATCH ?
+            ORDER BY f.rank
+        """, (match,))
+        return df
+    
+    @staticmethod
+    def get_by_kode(kode_siswa: str) -> Optional[Dict]:
+        result = BaseModel.execute_query("""
+            SELECT s.id_siswa, s.kode_siswa, s.nama_siswa, k.nama_kelas
+            FROM siswa s
+            LEFT JOIN kelas k ON s.id_kelas = k.id_kelas
+            WHERE s.kode_siswa = ?
+        """, (kode_siswa,), fetch_one=True)
+        if result:
+            return {"id": result[0], "kode": result[1], "nama": result[2], "kelas": result[3]}
+        return None
+    
+    @staticmethod
+    def get_id(nama_siswa: str, id_kelas: int) -> Optional[int]:
+        result = BaseModel.execute_query(
+            "SELECT id_siswa FROM siswa WHERE nama_siswa = ? AND id_kelas = ?",
+            (nama_siswa, id_kelas),
+            fetch_one=True
+        )
+        return result[0] if result else None
+    
+    @staticmethod
+    def get_or_create(nama_siswa: str, id_kelas: str) -> int:
+        result = BaseModel.execute_query(
+            "SELECT id_siswa FROM siswa WHERE nama_siswa = ? AND id_kelas = ?",
+            (nama_siswa, id_kelas),
+            fetch_one=True
+        )
+        if result:
+            return result[0]
+        else:
+            return BaseModel.execute_query(
+                "INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)",
+                (nama_siswa, id_kelas)
+            )
+    
+    @staticmethod
+    def create(nama_siswa: str, id_kelas: str) -> int:
+        return BaseModel.execute_query(
+            "INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)",
+            (nama_siswa, id_kelas)
+        )
+    
+    @staticmethod
+    def delete(id_siswa: int) -> bool:
+        BaseModel.execute_query(
+            "DELETE FROM siswa WHERE id_siswa = ?",
+            (id_siswa,)
+        )
+        return True
+
+class BukuModel(BaseModel):
+    """Model untuk Buku"""
+    
+    @staticmethod
+    @cached_query("buku")
+    def get_all() -> pd.DataFrame:
+        df = BaseModel.read_dataframe(
+            "SELECT id_buku, kode_buku, nama_buku FROM buku ORDER BY id_buku"
+        )
+        return df
+    
+    @staticmethod
+    @cached_query("buku")
+    def get_page(cursor: Optional[int] = None, direction: str = "next",
+                 page_size: int = PAGE_SIZE) -> Dict:
+        return BaseModel.fetch_page(
+            "SELECT id_buku, kode_buku, nama_buku FROM buku",
+            "id_buku", cursor=cursor, direction=direction, page_size=page_size
+        )
+    
+    @staticmethod
+    @cached_query("buku")
+    def count() -> int:
+        return BaseModel.estimate_count("buku")
+    
+    @staticmethod
+    @cached_query("buku")
+    def get_by_kode(kode_buku: str) -> Optional[Dict]:
+        result = BaseModel.execute_query(
+            "SELECT id_buku, kode_buku, nama_buku FROM buku WHERE kode_buku = ?",
+            (kode_buku,),
+            fetch_one=True
+        )
+        if result:
+            return {"id": result[0], "kode": result[1], "nama": result[2]}
+        return None
+    
+    @staticmethod
+    @cached_query("buku")
+    def search(keyword: str) -> pd.DataFrame:
+        match = BaseModel.fts_query(keyword)
+        if match is None:
+            return pd.DataFrame(columns=["id_buku", "kode_buku", "nama_buku"])
+        # bm25: kecocokan di kode_buku diberi bobot lebih tinggi dari judul
+        df = BaseModel.read_dataframe("""
+            SELECT b.id_buku, b.kode_buku, b.nama_buku 
+            FROM buku_fts f
+            JOIN buku b ON b.id_buku = f.rowid
+            WHERE buku_fts MATCH ?
+            ORDER BY bm25(buku_fts, 5.0, 1.0)
+        """, (match,))
+        return df
+    
+    @staticmethod
+    def get_or_create(kode_buku: str, nama_buku: str) -> int:
+        result = BaseModel.execute_query(
+            "SELECT id_buku FROM buku WHERE kode_buku = ?",
+            (kode_buku,),
+            fetch_one=True
+        )
+        if result:
+            BaseModel.execute_query(
+                "UPDATE buku SET nama_buku = ? WHERE id_buku = ?",
+                (nama_buku, result[0])
+            )
+            return result[0]
+        else:
+            return BaseModel.execute_query(
+                "INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)",
+                (kode_buku, nama_buku)
+            )
+    
+    @staticmethod
+    def create(kode_buku: str, nama_buku: str) -> int:
+        return BaseModel.execute_query(
+            "INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)",
+            (kode_buku, nama_buku)
+        )
+    
+    @staticmethod
+    def delete(kode_buku: str) -> bool:
+        BaseModel.execute_query(
+            "DELETE FROM buku WHERE kode_buku = ?",
+            (kode_buku,)
+        )
+        return True
+
+class PeminjamanModel(BaseModel):
+    """Model untuk Peminjaman"""
+    
+    @staticmethod
+    @cached_query("peminjaman", "siswa", "buku")
+    def get_all(status_filter: str = "ALL") -> pd.DataFrame:
+        if status_filter == "ALL":
+            df = BaseModel.read_dataframe("""
+                SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku,
+                       p.tanggal_pinjam, p.tanggal_kembali, p.status
+                FROM peminjaman p
+                JOIN siswa s ON p.id_siswa = s.id_siswa
+                JOIN buku b ON p.id_buku = b.id_buku
+                ORDER BY p.id_peminjaman DESC
+            """)
+        else:
+            df = BaseModel.read_dataframe("""
+                SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku,
+                       p.tanggal_pinjam, p.tanggal_kembali, p.status
+                FROM peminjaman p
+                JOIN siswa s ON p.id_siswa = s.id_siswa
+                JOIN buku b ON p.id_buku = b.id_buku
+                WHERE p.status = ?
+                ORDER BY p.id_peminjaman DESC
+            """, (status_filter,))
+        return df
+    
+    @staticmethod
+    @cached_query("peminjaman", "siswa", "buku")
+    def get_page(status_filter: str = "ALL", cursor: Optional[int] = None,
+                 direction: str = "next", page_size: int = PAGE_SIZE) -> Dict:
+        where, params = ("", ()) if status_filter == "ALL" else ("p.status = ?", (status_filter,))
+        return BaseModel.fetch_page("""
+            SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku,
+                   p.tanggal_pinjam, p.tanggal_kembali, p.status
+            FROM peminjaman p
+            JOIN siswa s ON p.id_siswa = s.id_siswa
+            JOIN buku b ON p.id_buku = b.id_buku
+        """, "p.id_peminjaman", where, params, cursor=cursor, direction=direction,
+            page_size=page_size, descending=True)
+    
+    @staticmethod
+    @cached_query("peminjaman")
+    def count(status_filter: str = "ALL") -> int:
+        if status_filter == "ALL":
+            return BaseModel.estimate_count("peminjaman")
+        # COUNT lewat covering index idx_peminjaman_status
+        return BaseModel.execute_query(
+            "SELECT COUNT(*) FROM peminjaman WHERE status = ?",
+            (status_filter,), fetch_one=True
+        )[0]
+    
+    @staticmethod
+    @cached_query("peminjaman", "siswa", "buku")
+    def get_active_loans() -> pd.DataFrame:
+        df = BaseModel.read_dataframe("""
+            SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku, b.kode_buku,
+                   p.tanggal_pinjam, p.tanggal_jatuh_tempo
+            FROM peminjaman p
+            JOIN siswa s ON p.id_siswa = s.id_siswa
+            JOIN buku b ON p.id_buku = b.id_buku
+            WHERE p.status = 'dipinjam'
+            ORDER BY p.id_peminjaman DESC
+        """)
+        return df
+    
+    @staticmethod
+    def due_date(tanggal_pinjam: str) -> str:
+        """Tanggal jatuh tempo (YYYY-MM-DD) untuk tanggal pinjam"""
+        tanggal = datetime.strptime(tanggal_pinjam, "%Y-%m-%d")
+        return (tanggal + timedelta(days=LAMA_PINJAM_HARI)).strftime("%Y-%m-%d")
+    
+    @staticmethod
+    @cached_query("peminjaman", "siswa", "buku", ttl=60)
+    def get_overdue(as_of: Optional[str] = None) -> pd.DataFrame:
+        """Peminjaman aktif yang lewat jatuh tempo per tanggal `as_of` (default hari ini),
+        lengkap dengan jumlah hari terlambat dan denda"""
+        as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+        df = BaseModel.read_dataframe("""
+            SELECT p.id_peminjaman, s.nama_siswa, b.kode_buku, b.nama_buku,
+                   p.tanggal_pinjam, p.tanggal_jatuh_tempo,
+                   CAST(julianday(?) - julianday(p.tanggal_jatuh_tempo) AS INTEGER) AS hari_terlambat
+            FROM peminjaman p
+            JOIN siswa s ON p.id_siswa = s.id_siswa
+            JOIN buku b ON p.id_buku = b.id_buku
+            WHERE p.status = 'dipinjam' AND p.tanggal_jatuh_tempo < ?
+            ORDER BY p.tanggal_jatuh_tempo
+        """, (as_of, as_of))
+        df["denda"] = df["hari_terlambat"] * DENDA_PER_HARI
+        return df
+    
+    @staticmethod
+    @cached_query("peminjaman", ttl=60)
+    def count_overdue(as_of: Optional[str] = None) -> int:
+        as_of = as_of or datetime.now().strftime("%Y-%m-%d")
+        return BaseModel.execute_query("""
+            SELECT COUNT(*) FROM peminjaman
+            WHERE status = 'dipinjam' AND tanggal_jatuh_tempo < ?
+        """, (as_of,), fetch_one=True)[0]
+    
+    @staticmethod
+    def create(id_siswa: int, id_buku: int, tanggal_pinjam: str, admin_id: int) -> int:
+        return BaseModel.execute_query("""
+            INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, tanggal_jatuh_tempo,
+                                    status, id_admin)
+            VALUES (?, ?, ?, ?, 'dipinjam', ?)
+        """, (id_siswa, id_buku, tanggal_pinjam,
+              PeminjamanModel.due_date(tanggal_pinjam), admin_id))
+    
+    @staticmethod
+    def return_book(id_peminjaman: int) -> bool:
+        BaseModel.execute_query("""
+            UPDATE peminjaman 
+            SET tanggal_kembali = ?, status = 'dikembalikan' 
+            WHERE id_peminjaman = ?
+        """, (datetime.now().strftime("%Y-%m-%d"), id_peminjaman))
+        return True
+
+class StatistikModel(BaseModel):
+    """Model untuk statistik peminjaman (tabel ringkasan, dijaga trigger)"""
+    
+    @staticmethod
+    @cached_query("peminjaman")
+    def get_status_counts() -> Dict:
+        rows = BaseModel.execute_query("SELECT status, jumlah FROM statistik_status")
+        counts = {status: jumlah for status, jumlah in rows}
+        counts["total"] = sum(counts.values())
+        return counts
+    
+    @staticmethod
+    @cached_query("peminjaman", "kelas")
+    def get_monthly_by_kelas(months: int = 12) -> pd.DataFrame:
+        awal = (pd.Timestamp.now().to_period("M") - (months - 1)).strftime("%Y-%m")
+        return BaseModel.read_dataframe("""
+            SELECT sb.bulan, COALESCE(k.nama_kelas, '(tanpa kelas)') AS nama_kelas,
+                   SUM(sb.jumlah) AS jumlah
+            FROM statistik_bulanan sb
+            LEFT JOIN kelas k ON k.id_kelas = sb.id_kelas
+            WHERE sb.bulan >= ? AND sb.jumlah > 0
+            GROUP BY sb.bulan, 2
+            ORDER BY sb.bulan
+        """, (awal,))
+    
+    @staticmethod
+    @cached_query("peminjaman", "buku")
+    def get_top_books(limit: int = 10) -> pd.DataFrame:
+        return BaseModel.read_dataframe("""
+            SELECT b.kode_buku, b.nama_buku, sb.jumlah
+            FROM statistik_buku sb
+            JOIN buku b ON b.id_buku = sb.id_buku
+            WHERE sb.jumlah > 0
+            ORDER BY sb.jumlah DESC
+            LIMIT ?
+        """, (limit,))
+    
+    @staticmethod
+    @cached_query("peminjaman", "siswa", "buku", "kelas")
+    def get_history_analysis() -> Dict:
+        """Analisis seluruh riwayat (analytics.py); hanya dihitung ulang jika ada perubahan"""
+        return analytics.summarize(analytics.load_loan_history())
+
+# =====================================================
+# LOAN SERVICE
+# =====================================================
+class LoanError(Exception):
+    """Peminjaman tidak bisa diproses (data tidak valid)"""
+
+class LoanService:
+    """Service untuk transaksi peminjaman"""
+    
+    @staticmethod
+    def checkout(nama_siswa: str, nama_kelas: str, kode_buku: str,
+                 tanggal_pinjam: str, admin_id: int) -> Dict:
+        """Simpan peminjaman dalam SATU transaksi (satu commit / fsync).
+        
+        Kelas dan siswa dibuat jika belum ada. Jika ada langkah yang gagal,
+        seluruh transaksi di-rollback sehingga tidak ada data setengah jadi.
+        """
+        written = ["peminjaman"]
+        
+        with DatabaseConnection.connection() as conn:
+            # IMMEDIATE: kunci tulis diambil di awal, jadi cek "sudah ada?"
+            # di bawah tidak bisa balapan dengan meja lain
+            conn.execute("BEGIN IMMEDIATE")
+            
+            buku = conn.execute(
+                "SELECT id_buku, nama_buku FROM buku WHERE kode_buku = ?",
+                (kode_buku,)
+            ).fetchone()
+            if not buku:
+                raise LoanError("Buku tidak ditemukan!")
+            
+            kelas = conn.execute(
+                "SELECT id_kelas FROM kelas WHERE nama_kelas = ?",
+                (nama_kelas,)
+            ).fetchone()
+            if kelas is None:
+                kelas = conn.execute(
+                    "INSERT INTO kelas (nama_kelas) VALUES (?) RETURNING id_kelas",
+                    (nama_kelas,)
+                ).fetchone()
+                written.append("kelas")
+            
+            siswa = conn.execute(
+                "SELECT id_siswa FROM siswa WHERE nama_siswa = ? AND id_kelas = ?",
+                (nama_siswa, kelas[0])
+            ).fetchone()
+            if siswa is None:
+                siswa = conn.execute(
+                    "INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?) RETURNING id_siswa",
+                    (nama_siswa, kelas[0])
+                ).fetchone()
+                written.append("siswa")
+            
+            peminjaman = conn.execute("""
+                INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, tanggal_jatuh_tempo,
+                                        status, id_admin, id_kelas)
+                VALUES (?, ?, ?, ?, 'dipinjam', ?, ?)
+                RETURNING id_peminjaman, tanggal_jatuh_tempo
+            """, (siswa[0], buku[0], tanggal_pinjam,
+                  PeminjamanModel.due_date(tanggal_pinjam), admin_id, kelas[0])).fetchone()
+        
+        invalidate_tables(*written)
+        return {
+            "id_peminjaman": peminjaman[0],
+            "id_siswa": siswa[0],
+            "id_kelas": kelas[0],
+            "id_buku": buku[0],
+            "nama_buku": buku[1],
+            "tanggal_jatuh_tempo": peminjaman[1],
+        }
+    
+    @staticmethod
+    def calculate_fine(tanggal_jatuh_tempo: str, tanggal_kembali: Optional[str] = None) -> Dict:
+        """Hitung denda keterlambatan. `tanggal_kembali` default hari ini.
+        Return {"hari_terlambat", "denda"}."""
+        jatuh_tempo = datetime.strptime(tanggal_jatuh_tempo, "%Y-%m-%d").date()
+        kembali = (datetime.strptime(tanggal_kembali, "%Y-%m-%d").date()
+                   if tanggal_kembali else datetime.now().date())
+        hari = max(0, (kembali - jatuh_tempo).days)
+        return {"hari_terlambat": hari, "denda": hari * DENDA_PER_HARI}
+    
+    @staticmethod
+    def checkout_by_codes(kode_siswa: str, kode_buku: str, tanggal_pinjam: str,
+                          admin_id: int) -> Dict:
+        """Peminjaman dari hasil scan kartu siswa + barcode buku (lookup lewat index unik).
+        Buku yang masih tercatat dipinjam ditolak: satu barcode = satu eksemplar."""
+        with DatabaseConnection.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            
+            siswa = conn.execute(
+                "SELECT id_siswa, nama_siswa, COALESCE(id_kelas, 0) FROM siswa "
+                "WHERE kode_siswa = ?",
+                (kode_siswa,)
+            ).fetchone()
+            if not siswa:
+                raise LoanError(f"Kartu siswa tidak dikenal: {kode_siswa}")
+            
+            buku = conn.execute(
+                "SELECT id_buku, nama_buku FROM buku WHERE kode_buku = ?",
+                (kode_buku,)
+            ).fetchone()
+            if not buku:
+                raise LoanError(f"Buku tidak ditemukan: {kode_buku}")
+            
+            aktif = conn.execute(
+                "SELECT id_peminjaman FROM peminjaman WHERE id_buku = ? AND status = 'dipinjam'",
+                (buku[0],)
+            ).fetchone()
+            if aktif:
+                raise LoanError(f"Buku {kode_buku} masih tercatat dipinjam "
+                                f"(ID peminjaman {aktif[0]})")
+            
+            peminjaman = conn.execute("""
+                INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, tanggal_jatuh_tempo,
+                                        status, id_admin, id_kelas)
+                VALUES (?, ?, ?, ?, 'dipinjam', ?, ?)
+                RETURNING id_peminjaman, tanggal_jatuh_tempo
+            """, (siswa[0], buku[0], tanggal_pinjam,
+                  PeminjamanModel.due_date(tanggal_pinjam), admin_id, siswa[2])).fetchone()
+        
+        invalidate_tables("peminjaman")
+        return {
+            "id_peminjaman": peminjaman[0],
+            "nama_siswa": siswa[1],
+            "nama_buku": buku[1],
+            "tanggal_jatuh_tempo": peminjaman[1],
+        }
+    
+    @staticmethod
+    def return_by_kode_buku(kode_buku: str) -> Dict:
+        """Pengembalian dari hasil scan barcode buku: kode buku -> peminjaman aktifnya"""
+        tanggal_kembali = datetime.now().strftime("%Y-%m-%d")
+        with DatabaseConnection.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("""
+                SELECT p.id_peminjaman, s.nama_siswa, b.nama_buku, p.tanggal_jatuh_tempo
+                FROM buku b
+                JOIN peminjaman p ON p.id_buku = b.id_buku AND p.status = 'dipinjam'
+                JOIN siswa s ON s.id_siswa = p.id_siswa
+                WHERE b.kode_buku = ?
+                LIMIT 2
+            """, (kode_buku,)).fetchall()
+            if not rows:
+                raise LoanError(f"Tidak ada peminjaman aktif untuk buku {kode_buku}")
+            if len(rows) > 1:
+                raise LoanError(f"Buku {kode_buku} tercatat dipinjam lebih dari sekali, "
+                                f"pilih manual dari daftar peminjaman aktif")
+            
+            id_peminjaman, nama_siswa, nama_buku, jatuh_tempo = rows[0]
+            conn.execute("""
+                UPDATE peminjaman SET tanggal_kembali = ?, status = 'dikembalikan'
+                WHERE id_peminjaman = ?
+            """, (tanggal_kembali, id_peminjaman))
+        
+        invalidate_tables("peminjaman")
+        hasil = {"id_peminjaman": id_peminjaman, "nama_siswa": nama_siswa,
+                 "nama_buku": nama_buku, "hari_terlambat": 0, "denda": 0}
+        if jatuh_tempo:
+            hasil.update(LoanService.calculate_fine(jatuh_tempo, tanggal_kembali))
+        return hasil
+    
+    @staticmethod
+    def return_by_id(id_peminjaman: int) -> Dict:
+        """Pengembalian berdasarkan ID peminjaman; ditolak jika sudah dikembalikan"""
+        tanggal_kembali = datetime.now().strftime("%Y-%m-%d")
+        with DatabaseConnection.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT s.nama_siswa, b.nama_buku, p.tanggal_jatuh_tempo, p.status
+                FROM peminjaman p
+                JOIN siswa s ON s.id_siswa = p.id_siswa
+                JOIN buku b ON b.id_buku = p.id_buku
+                WHERE p.id_peminjaman = ?
+            """, (id_peminjaman,)).fetchone()
+            if not row:
+                raise LoanError(f"Peminjaman tidak ditemukan: {id_peminjaman}")
+            nama_siswa, nama_buku, jatuh_tempo, status = row
+            if status != "dipinjam":
+                raise LoanError(f"Peminjaman {id_peminjaman} sudah dikembalikan")
+            
+            conn.execute("""
+                UPDATE peminjaman SET tanggal_kembali = ?, status = 'dikembalikan'
+                WHERE id_peminjaman = ?
+            """, (tanggal_kembali, id_peminjaman))
+        
+        invalidate_tables("peminjaman")
+        hasil = {"id_peminjaman": id_peminjaman, "nama_siswa": nama_siswa,
+                 "nama_buku": nama_buku, "hari_terlambat": 0, "denda": 0}
+        if jatuh_tempo:
+            hasil.update(LoanService.calculate_fine(jatuh_tempo, tanggal_kembali))
+        return hasil
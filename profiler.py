@@ -0,0 +1,176 @@
+# profiler.py
+# Profiler per rerun untuk halaman Streamlit (opsional, diaktifkan per sesi).
+#
+# Satu rerun dipecah menjadi:
+#   - fase yang ditandai dengan `with phase("nama"):` (inisialisasi, sidebar,
+#     halaman, gambar background, ...). Waktu fase bersarang tidak dihitung
+#     ganda: waktu fase induk hanya waktu miliknya sendiri.
+#   - fase "sql" (BaseModel) dan "kirim ke browser" (serialisasi pesan,
+#     diukur dengan membungkus ScriptRunContext.enqueue) yang otomatis
+#     dikurangkan dari fase tempat keduanya terjadi
+#   - pesan yang dikirim ke browser: jumlah dan byte per jenis elemen
+#   - DataFrame hasil query (baris, kolom, memori)
+#
+# Profil disimpan di riwayat bergulir per sesi (lihat app.py).
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+HISTORY_SIZE = 30
+
+_local = threading.local()
+
+
+class RerunProfile:
+    """Data profil untuk satu rerun"""
+
+    def __init__(self, page: str = ""):
+        self.page = page
+        self.started = time.perf_counter()
+        self.phases = Counter()             # nama fase -> ms (tanpa fase anak)
+        self._stack = []                    # [(nama, mulai, ms fase anak)]
+        self.messages = 0
+        self.bytes_sent = 0
+        self.element_bytes = Counter()      # jenis elemen -> byte
+        self.dataframes = []
+        self._ctx = None
+        self._send = None
+
+    # ------------------------------------------------------------
+    # Fase
+    # ------------------------------------------------------------
+    def enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, started, children_ms = self._stack.pop()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.phases[name] += elapsed - children_ms
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    # ------------------------------------------------------------
+    # Pesan ke browser
+    # ------------------------------------------------------------
+    def attach(self, ctx):
+        """Bungkus enqueue milik ScriptRunContext selama rerun ini"""
+        if ctx is None:
+            return
+        self._ctx = ctx
+        enqueue, send = ctx.enqueue, ctx._enqueue
+
+        def timed_enqueue(msg):
+            # Termasuk hashing (serialisasi protobuf) oleh Streamlit
+            self.enter("kirim ke browser")
+            try:
+                enqueue(msg)
+            finally:
+                self.exit()
+
+        def counted_send(msg):
+            size = msg.ByteSize()
+            self.messages += 1
+            self.bytes_sent += size
+            self.element_bytes[_element_type(msg)] += size
+            send(msg)
+
+        ctx.enqueue = timed_enqueue
+        ctx._enqueue = counted_send
+        self._send = send
+
+    def detach(self):
+        if self._ctx is None:
+            return
+        ctx, self._ctx = self._ctx, None
+        ctx.__dict__.pop("enqueue", None)
+        ctx._enqueue = self._send
+
+    def add_dataframe(self, label: str, df):
+        self.dataframes.append({
+            "sumber": label,
+            "baris": len(df),
+            "kolom": len(df.columns),
+            "kb": round(float(df.memory_usage(index=True).sum()) / 1024, 1),
+        })
+
+    # ------------------------------------------------------------
+    # Ringkasan
+    # ------------------------------------------------------------
+    def summary(self, query_run: dict = None) -> dict:
+        total_ms = (time.perf_counter() - self.started) * 1000
+        phases = dict(self.phases)
+        phases["lain-lain"] = max(0.0, total_ms - sum(phases.values()))
+        return {
+            "page": self.page,
+            "time": time.strftime("%H:%M:%S"),
+            "total_ms": total_ms,
+            "phases": phases,
+            "queries": query_run["count"] if query_run else None,
+            "messages": self.messages,
+            "bytes_sent": self.bytes_sent,
+            "element_bytes": dict(self.element_bytes.most_common()),
+            "dataframes": self.dataframes,
+        }
+
+
+def _element_type(msg) -> str:
+    kind = msg.WhichOneof("type")
+    if kind != "delta":
+        return kind or "?"
+    delta = msg.delta
+    if delta.WhichOneof("type") == "new_element":
+        return delta.new_element.WhichOneof("type") or "element"
+    return delta.WhichOneof("type") or "delta"
+
+
+def start(page: str = "") -> RerunProfile:
+    """Mulai memprofil rerun di thread ini"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    profile = RerunProfile(page)
+    profile.attach(get_script_run_ctx())
+    _local.profile = profile
+    return profile
+
+
+def finish(query_run: dict = None):
+    """Hentikan profil rerun ini. Return ringkasan (None jika tidak aktif)."""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.detach()
+    return profile.summary(query_run)
+
+
+def active() -> bool:
+    return getattr(_local, "profile", None) is not None
+
+
+def label(page: str):
+    profile = getattr(_local, "profile", None)
+    if profile is not None:
+        profile.page = page
+
+
+@contextmanager
+def phase(name: str):
+    """Tandai satu fase rerun; tidak melakukan apa-apa jika profiler tidak aktif"""
+    profile = getattr(_local, "profile", None)
+    if profile is None:
+        yield
+        return
+    profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit()
+
+
+def record_dataframe(source: str, df):
+    """Catat ukuran DataFrame hasil query (dipanggil dari BaseModel.read_dataframe)"""
+    profile = getattr(_local, "profile", None)
+    if profile is not None:
+        profile.add_dataframe(source, df)
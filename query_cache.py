@@ -0,0 +1,227 @@
+# query_cache.py
+# Cache hasil query untuk method baca di model (dipakai bersama semua sesi).
+#
+# Setiap tabel punya nomor versi. Versi tabel ikut menjadi bagian key cache,
+# jadi begitu ada INSERT/UPDATE/DELETE ke tabel tersebut (invalidate),
+# semua hasil yang bergantung padanya otomatis tidak terpakai lagi dan
+# akhirnya tergusur oleh LRU.
+#
+# Perubahan dari proses lain (API, import CLI, script) terlihat lewat tabel
+# table_versions di database (dinaikkan trigger, migrasi 9). Sebelum memakai
+# hasil cache, versi itu dibandingkan dengan yang terakhir terlihat; tabel yang
+# berubah diinvalidasi dan listener on_tables_changed ikut dipanggil.
+
+import copy
+import functools
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from database import DatabaseConnection, on_database_replaced
+
+DEFAULT_TTL = 300          # detik
+DEFAULT_MAX_ENTRIES = 512
+
+_WRITE_PATTERN = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)"
+    r"\s+[\"`\[]?(\w+)",
+    re.IGNORECASE
+)
+
+
+def tables_written(query: str) -> list:
+    """Nama tabel yang diubah oleh sebuah query tulis (kosong untuk SELECT)"""
+    match = _WRITE_PATTERN.match(query)
+    return [match.group(1).lower()] if match else []
+
+
+class QueryCache:
+    """Cache LRU + TTL dengan invalidasi berbasis versi tabel"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._seen = {}           # versi table_versions di database yang terakhir terlihat
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def table_versions(self, tables) -> tuple:
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def observe(self, db_versions: dict, tables=None) -> list:
+        """Catat versi tabel dari database (hanya `tables` jika diisi).
+        Return tabel yang versinya berbeda dari yang terakhir terlihat."""
+        changed = []
+        with self._lock:
+            for table, version in db_versions.items():
+                if tables is not None and table not in tables:
+                    continue
+                if table in self._seen and self._seen[table] != version:
+                    changed.append(table)
+                self._seen[table] = version
+        return changed
+
+    def get(self, key):
+        """Return (True, value) jika ada dan belum kedaluwarsa, selain itu (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._seen.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "table_versions": dict(self._versions),
+            }
+
+
+query_cache = QueryCache()
+
+
+def cached_query(*tables, ttl: float = None):
+    """Decorator untuk method baca model yang bergantung pada `tables`.
+
+    Key cache memakai nama fungsi (bukan objek fungsinya), sehingga cache tetap
+    terpakai walaupun app.py dieksekusi ulang dan fungsinya didefinisikan ulang.
+    Hasil dikembalikan sebagai salinan agar pemanggil bebas mengubah DataFrame.
+    """
+    tables = tuple(t.lower() for t in tables)
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            check_external_changes()
+            key = (name, args, tuple(sorted(kwargs.items())), query_cache.table_versions(tables))
+            try:
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            found, value = query_cache.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                query_cache.set(key, value, ttl)
+            return copy.deepcopy(value)
+
+        return wrapper
+
+    return decorator
+
+
+_listeners = []
+
+
+def on_tables_changed(callback):
+    """Daftarkan callback(tables) yang dipanggil setiap ada penulisan yang sudah di-commit"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def read_table_versions() -> dict:
+    """Isi tabel table_versions (kosong jika database belum dimigrasi)"""
+    try:
+        with DatabaseConnection.connection() as conn:
+            return dict(conn.execute("SELECT nama, versi FROM table_versions"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def check_external_changes():
+    """Invalidasi tabel yang diubah proses lain sejak pemeriksaan terakhir"""
+    changed = query_cache.observe(read_table_versions())
+    if changed:
+        _invalidate(tuple(changed))
+
+
+_watcher = None
+
+
+def watch_external_changes(interval: float = 5.0):
+    """Jalankan thread yang memanggil check_external_changes setiap `interval` detik,
+    supaya listener (mis. sync VPS) tetap terpicu oleh penulisan dari API
+    walaupun tidak ada halaman yang membaca cache"""
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                check_external_changes()
+            except Exception as e:
+                print(f"⚠ [CACHE] Gagal memeriksa perubahan database: {e}")
+
+    _watcher = threading.Thread(target=loop, name="cache-watch", daemon=True)
+    _watcher.start()
+
+
+def invalidate_tables(*tables):
+    """Dipanggil setelah penulisan di proses ini di-commit"""
+    tables = tuple(t.lower() for t in tables)
+    # Versi database sudah naik oleh trigger: catat supaya
+    # check_external_changes tidak menganggapnya perubahan dari luar
+    query_cache.observe(read_table_versions(), tables)
+    _invalidate(tables)
+
+
+def _on_database_replaced():
+    # Isi database diganti (restore): semua hasil lama dibuang, listener diberi tahu
+    query_cache.clear()
+    versions = read_table_versions()
+    query_cache.observe(versions)
+    if versions:
+        _invalidate(tuple(versions))
+
+
+on_database_replaced(_on_database_replaced)
+
+
+def _invalidate(tables):
+    query_cache.invalidate(*tables)
+    for callback in list(_listeners):
+        try:
+            callback(tables)
+        except Exception as e:
+            print(f"⚠ [CACHE] Listener gagal: {e}")
@@ -0,0 +1,290 @@
+# query_log.py
+# Instrumentasi query: waktu, jumlah baris, lokasi pemanggil dan rencana query.
+#
+# Setiap query yang lewat BaseModel (dan pd.read_sql langsung di analytics.py)
+# dibungkus dengan track(). Hasilnya dikumpulkan:
+#   - per rerun Streamlit (begin_run / end_run): jumlah query, total waktu dan
+#     query yang diulang berkali-kali dalam satu rerun (pola N+1)
+#   - per teks query untuk seluruh proses (jumlah, total / maks waktu, baris)
+#   - query di atas SLOW_QUERY_MS beserta EXPLAIN QUERY PLAN-nya, ditulis juga
+#     ke log JSON (satu objek per baris) agar bisa dianalisis di luar aplikasi
+#
+# Konfigurasi lewat environment:
+#   QUERY_LOG=0              matikan instrumentasi
+#   SLOW_QUERY_MS=50         ambang query lambat (milidetik)
+#   SLOW_QUERY_LOG=<file>    lokasi log JSON (default: slow_queries.jsonl)
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+ENABLED = os.environ.get("QUERY_LOG", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "50"))
+LOG_PATH = os.environ.get("SLOW_QUERY_LOG", "slow_queries.jsonl")
+LOG_MAX_BYTES = 5 * 1024 * 1024        # log lama diputar ke <file>.1
+REPEAT_THRESHOLD = 5                   # query sama >= 5x dalam satu rerun -> N+1
+MAX_RUNS = 50
+MAX_SLOW = 100
+MAX_QUERIES_PER_RUN = 200
+
+# Frame yang dilewati saat mencari pemanggil: pembungkus query, bukan asal query
+_SKIP_FUNCTIONS = {"execute_query", "read_dataframe", "fetch_page", "wrapper", "track"}
+_SKIP_PATHS = ("contextlib.py", "query_cache.py", "query_log.py")
+_PANDAS_DIR = os.sep + "pandas" + os.sep
+
+_SPACES = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Teks query tanpa spasi berlebih; daftar IN (?, ?, ...) disatukan jadi (?...)"""
+    return _PLACEHOLDER_LIST.sub("?...", _SPACES.sub(" ", sql).strip())
+
+
+def call_site(depth: int = 2) -> str:
+    """Lokasi pemanggil query di kode aplikasi, mis.
+    "SiswaModel.get_page:321 <- data_siswa_page:1440" """
+    sites = []
+    frame = sys._getframe(1)
+    while frame is not None and len(sites) < depth:
+        code = frame.f_code
+        if code.co_name not in _SKIP_FUNCTIONS and not code.co_filename.endswith(_SKIP_PATHS) \
+                and _PANDAS_DIR not in code.co_filename:
+            name = getattr(code, "co_qualname", code.co_name)
+            if name != "<module>":
+                sites.append(f"{name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return " <- ".join(sites) or "?"
+
+
+def is_full_scan(plan) -> bool:
+    """True jika rencana query memindai seluruh tabel / index (bukan SEARCH)"""
+    for detail in plan:
+        if detail.startswith("SCAN") and "VIRTUAL TABLE" not in detail \
+                and "CONSTANT ROW" not in detail:
+            return True
+    return False
+
+
+def _format_params(params):
+    """Parameter query untuk log (dipotong): list untuk ?, dict untuk :nama"""
+    if isinstance(params, dict):
+        return {str(key): str(value)[:50] for key, value in params.items()}
+    return [str(p)[:50] for p in params]
+
+
+class QueryLog:
+    """Penampung statistik query untuk seluruh proses (thread-safe)"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, log_path: str = LOG_PATH):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._plans = {}                    # sql ternormalisasi -> [detail EXPLAIN]
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = {}               # sql -> statistik agregat
+            self.runs = deque(maxlen=MAX_RUNS)
+            self.slow = deque(maxlen=MAX_SLOW)
+            self.total = 0
+            self._plans.clear()
+
+    # ------------------------------------------------------------
+    # Per rerun
+    # ------------------------------------------------------------
+    def begin_run(self, page: str = ""):
+        """Mulai mengumpulkan query untuk rerun di thread ini"""
+        self._local.run = {
+            "started": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "page": page,
+            "queries": [],
+            "count": 0,
+            "total_ms": 0.0,
+            "rows": 0,
+            "slow": 0,
+            "_clock": time.perf_counter(),
+        }
+
+    def label_run(self, page: str):
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run["page"] = page
+
+    def end_run(self):
+        """Selesaikan rerun: deteksi query berulang, simpan ringkasan. Return ringkasan."""
+        run = getattr(self._local, "run", None)
+        if run is None:
+            return None
+        self._local.run = None
+
+        run["elapsed_ms"] = (time.perf_counter() - run.pop("_clock")) * 1000
+        repeated = Counter(q["sql"] for q in run["queries"])
+        run["repeated"] = [
+            {"sql": sql, "count": count,
+             "call_site": next(q["call_site"] for q in run["queries"] if q["sql"] == sql)}
+            for sql, count in repeated.most_common() if count >= REPEAT_THRESHOLD
+        ]
+        with self._lock:
+            self.runs.append(run)
+        for item in run["repeated"]:
+            self._write_log({"type": "repeated_query", "time": run["started"],
+                             "page": run["page"], **item})
+        return run
+
+    # ------------------------------------------------------------
+    # Per query
+    # ------------------------------------------------------------
+    def record(self, sql: str, params, duration_ms: float, rows: int, conn=None):
+        text = normalize_sql(sql)
+        site = call_site()
+        slow = duration_ms >= self.slow_ms
+
+        plan = None
+        if slow and conn is not None and text.split(" ", 1)[0].upper() in ("SELECT", "WITH"):
+            plan = self.explain(conn, sql, params)
+
+        with self._lock:
+            self.total += 1
+            stats = self.queries.get(text)
+            if stats is None:
+                stats = self.queries[text] = {"sql": text, "count": 0, "total_ms": 0.0,
+                                              "max_ms": 0.0, "rows": 0, "call_sites": set()}
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["rows"] += rows
+            stats["call_sites"].add(site)
+
+        run = getattr(self._local, "run", None)
+        if run is not None:
+            run["count"] += 1
+            run["total_ms"] += duration_ms
+            run["rows"] += rows
+            run["slow"] += slow
+            if len(run["queries"]) < MAX_QUERIES_PER_RUN:
+                run["queries"].append({"sql": text, "ms": duration_ms, "rows": rows,
+                                       "call_site": site})
+
+        if slow:
+            entry = {
+                "type": "slow_query",
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "page": run["page"] if run else "",
+                "ms": round(duration_ms, 2),
+                "rows": rows,
+                "sql": text,
+                "params": _format_params(params),
+                "call_site": site,
+                "plan": plan,
+                "full_scan": is_full_scan(plan or []),
+            }
+            with self._lock:
+                self.slow.append(entry)
+            self._write_log(entry)
+
+    def explain(self, conn, sql: str, params):
+        """EXPLAIN QUERY PLAN (di-cache per teks query)"""
+        text = normalize_sql(sql)
+        with self._lock:
+            plan = self._plans.get(text)
+        if plan is not None:
+            return plan
+        # EXPLAIN dijalankan di luar lock: query ke database bisa lama
+        try:
+            args = params if isinstance(params, dict) else tuple(params)
+            rows = conn.execute("EXPLAIN QUERY PLAN " + sql, args).fetchall()
+        except Exception as e:
+            return [f"(EXPLAIN gagal: {e})"]
+        with self._lock:
+            return self._plans.setdefault(text, [row[3] for row in rows])
+
+    def _write_log(self, entry: dict):
+        if not self.log_path:
+            return
+        try:
+            with self._lock:
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > LOG_MAX_BYTES:
+                    os.replace(self.log_path, self.log_path + ".1")
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠ [QUERY] Log tidak bisa ditulis: {e}")
+
+    # ------------------------------------------------------------
+    # Laporan
+    # ------------------------------------------------------------
+    def top_queries(self, limit: int = 20, order: str = "total_ms") -> list:
+        with self._lock:
+            items = [dict(stats, call_sites=sorted(stats["call_sites"]),
+                          plan=self._plans.get(stats["sql"]))
+                     for stats in self.queries.values()]
+        items.sort(key=lambda item: item[order], reverse=True)
+        for item in items[:limit]:
+            item["avg_ms"] = item["total_ms"] / item["count"]
+            plan = item.pop("plan")
+            item["full_scan"] = is_full_scan(plan) if plan else None
+        return items[:limit]
+
+    def recent_runs(self) -> list:
+        with self._lock:
+            return list(reversed(self.runs))
+
+    def recent_slow(self) -> list:
+        with self._lock:
+            return list(reversed(self.slow))
+
+
+query_log = QueryLog()
+
+
+@contextmanager
+def track(sql: str, params=(), conn=None):
+    """Ukur satu query. Isi `.rows` pada objek yang di-yield dengan jumlah baris hasil.
+
+        with DatabaseConnection.connection() as conn, track(sql, params, conn) as q:
+            rows = conn.execute(sql, params).fetchall()
+            q.rows = len(rows)
+    """
+    if not ENABLED:
+        yield _Measurement()
+        return
+
+    measurement = _Measurement()
+    started = time.perf_counter()
+    yield measurement
+    # Query yang gagal (exception) tidak dicatat
+    query_log.record(sql, params, (time.perf_counter() - started) * 1000,
+                     measurement.rows, conn)
+
+
+class _Measurement:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = 0
+
+
+def begin_run(page: str = ""):
+    query_log.begin_run(page)
+
+
+def in_run() -> bool:
+    """True jika thread ini sedang di dalam rerun (begin_run belum diakhiri)"""
+    return getattr(query_log._local, "run", None) is not None
+
+
+def label_run(page: str):
+    query_log.label_run(page)
+
+
+def end_run():
+    return query_log.end_run()
@@ -0,0 +1,73 @@
+# scanner.py
+# Membaca kode barcode / QR untuk transaksi scan (kartu siswa dan buku).
+#
+# Dua sumber input:
+#   - scanner keyboard-wedge: scanner "mengetik" kode lalu Enter ke text input,
+#     cukup dibersihkan dengan normalize_code()
+#   - gambar kamera (st.camera_input): didekode dengan pyzbar atau OpenCV
+#     jika salah satunya terpasang (opsional)
+
+import io
+import re
+
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+
+class ScanError(Exception):
+    """Gambar tidak bisa didekode (paket decoder tidak ada / gambar rusak)"""
+
+
+def normalize_code(text: str) -> str:
+    """Bersihkan hasil scan: karakter kontrol (prefix/suffix scanner) dan spasi tepi.
+    QR berformat "<jenis>:<kode>" (mis. SISWA:S00012) diambil kodenya saja."""
+    code = _CONTROL_CHARS.sub("", text or "").strip()
+    prefix, separator, rest = code.partition(":")
+    if separator and prefix.upper() in ("SISWA", "BUKU"):
+        code = rest.strip()
+    return code
+
+
+def _decode_pyzbar(image) -> list:
+    from pyzbar.pyzbar import decode
+    return [result.data.decode("utf-8", "replace") for result in decode(image)]
+
+
+def _decode_opencv(image) -> list:
+    import cv2
+    import numpy as np
+
+    frame = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    codes = []
+    ok, decoded, _, _ = cv2.QRCodeDetector().detectAndDecodeMulti(frame)
+    if ok:
+        codes.extend(text for text in decoded if text)
+    if hasattr(cv2, "barcode"):
+        result = cv2.barcode.BarcodeDetector().detectAndDecode(frame)
+        # OpenCV 4.8+: (text, points, type); versi lama: (ok, texts, types, points)
+        texts = result[1] if isinstance(result[0], bool) else [result[0]]
+        codes.extend(text for text in texts if text)
+    return codes
+
+
+def decode_image(data: bytes) -> list:
+    """Semua kode (barcode / QR) yang terbaca di gambar, sudah dinormalisasi"""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ScanError("Scan kamera membutuhkan paket Pillow (pip install pillow)")
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise ScanError(f"Gambar tidak bisa dibaca: {e}")
+
+    for decoder in (_decode_pyzbar, _decode_opencv):
+        try:
+            codes = decoder(image)
+        except ImportError:
+            continue
+        return list(dict.fromkeys(c for c in map(normalize_code, codes) if c))
+
+    raise ScanError("Decoder barcode tidak tersedia "
+                    "(pip install pyzbar atau pip install opencv-python)")
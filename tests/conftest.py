@@ -0,0 +1,104 @@
+# tests/conftest.py
+# Fixture database untuk test: skema dasar sama dengan perpustakaan_final.db
+# (sebelum migrasi), diisi sedikit data contoh. Database aplikasi tidak disentuh.
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import query_log
+from query_cache import query_cache
+
+BASE_SCHEMA = [
+    """CREATE TABLE user(
+        id_user INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT,
+        password TEXT
+    )""",
+    """CREATE TABLE kelas(
+        id_kelas INTEGER PRIMARY KEY AUTOINCREMENT,
+        nama_kelas TEXT
+    )""",
+    """CREATE TABLE buku(
+        id_buku INTEGER PRIMARY KEY AUTOINCREMENT,
+        kode_buku TEXT,
+        nama_buku TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS "siswa" (
+        "id_siswa" INTEGER,
+        "nama_siswa" TEXT,
+        "id_kelas" INTEGER,
+        PRIMARY KEY("id_siswa" AUTOINCREMENT),
+        FOREIGN KEY("id_kelas") REFERENCES "kelas"("id_kelas") ON DELETE SET NULL ON UPDATE CASCADE
+    )""",
+    """CREATE TABLE IF NOT EXISTS "peminjaman" (
+        "id_peminjaman" INTEGER PRIMARY KEY AUTOINCREMENT,
+        "id_siswa" INTEGER NOT NULL,
+        "id_buku" INTEGER NOT NULL,
+        "tanggal_pinjam" DATE NOT NULL,
+        "tanggal_kembali" DATE,
+        "status" TEXT DEFAULT 'dipinjam',
+        "id_admin" INTEGER,
+        FOREIGN KEY("id_siswa") REFERENCES "siswa"("id_siswa") ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY("id_buku") REFERENCES "buku"("id_buku") ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY("id_admin") REFERENCES "user"("id_user") ON DELETE SET NULL ON UPDATE CASCADE
+    )""",
+]
+
+KELAS = ["10 IPA 1", "11 IPS 3"]
+SISWA = [("Budi Santoso", 1), ("Siti Rahayu", 1), ("Dimas Pratama", 2)]
+BUKU = [("B001", "Laskar Pelangi"), ("B002", "Bumi Manusia"), ("B003", "Negeri 5 Menara"),
+        ("B004", "Ronggeng Dukuh Paruk"), ("B005", "Sejarah Filsafat Yunani")]
+PEMINJAMAN = [
+    (1, 1, "2025-01-06", "2025-01-08", "dikembalikan"),
+    (2, 2, "2025-01-20", None, "dipinjam"),
+    (3, 3, "2025-02-03", "2025-02-04", "dikembalikan"),
+    (1, 4, "2025-02-10", None, "dipinjam"),
+]
+
+
+def create_baseline(conn: sqlite3.Connection):
+    """Skema dasar + data contoh, tanpa migrasi"""
+    for sql in BASE_SCHEMA:
+        conn.execute(sql)
+    conn.execute("INSERT INTO user (username, password) VALUES ('admin', 'admin')")
+    conn.executemany("INSERT INTO kelas (nama_kelas) VALUES (?)", [(k,) for k in KELAS])
+    conn.executemany("INSERT INTO siswa (nama_siswa, id_kelas) VALUES (?, ?)", SISWA)
+    conn.executemany("INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)", BUKU)
+    conn.executemany("""
+        INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, tanggal_kembali, status, id_admin)
+        VALUES (?, ?, ?, ?, ?, 1)
+    """, PEMINJAMAN)
+    conn.commit()
+
+
+@pytest.fixture
+def baseline_conn():
+    """Database in-memory berisi skema dasar (belum dimigrasi)"""
+    conn = sqlite3.connect(":memory:")
+    create_baseline(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Database file sementara yang sudah diinisialisasi, dipakai lewat connection pool.
+    File (bukan :memory:) karena setiap koneksi pool harus melihat database yang sama."""
+    path = str(tmp_path / "perpustakaan_test.db")
+    conn = sqlite3.connect(path)
+    create_baseline(conn)
+    conn.close()
+
+    monkeypatch.setattr(query_log.query_log, "log_path", None)
+    database.DatabaseConnection.configure(path)
+    database.initialize_database()
+    query_cache.clear()
+    yield path
+    query_cache.clear()
+    database.DatabaseConnection.close_all()
@@ -0,0 +1,28 @@
+# tests/test_api.py
+# REST API (api.py): autentikasi dan paginasi
+
+import pytest
+
+from api import create_app
+
+
+@pytest.fixture
+def client(db):
+    client = create_app(db, secret_key="test").test_client()
+    token = client.post("/api/login", json={"username": "admin", "password": "admin"}).json["token"]
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
+
+
+def test_butuh_token(db):
+    assert create_app(db, secret_key="test").test_client().get("/api/buku").status_code == 401
+
+
+def test_batas_limit(client):
+    assert len(client.get("/api/buku?limit=3").json["data"]) == 3
+    assert len(client.get("/api/buku?limit=500").json["data"]) == 5
+
+    for limit in ("0", "-1", "501"):
+        response = client.get(f"/api/buku?limit={limit}")
+        assert response.status_code == 400
+        assert response.json["error"] == "Parameter limit di luar batas (1-500)"
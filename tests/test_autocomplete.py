@@ -0,0 +1,44 @@
+# tests/test_autocomplete.py
+# Index saran ketik (autocomplete.py)
+
+import threading
+
+from autocomplete import PrefixIndex, _load_buku
+from models import BukuModel
+
+
+def test_saran_prefix_dan_fuzzy(db):
+    index = PrefixIndex("buku", ["buku"], _load_buku)
+    assert [s["data"]["kode_buku"] for s in index.suggest("bumi")] == ["B002"]
+    assert [s["data"]["kode_buku"] for s in index.suggest("laskr pelangi")] == ["B001"]
+    assert index.suggest("laskr pelangi")[0]["fuzzy"]
+
+
+def test_baris_baru_tidak_tertimpa_rebuild(db):
+    tahan, mulai, lanjut = threading.Event(), threading.Event(), threading.Event()
+
+    def loader_lambat(conn, after_id):
+        rows = list(_load_buku(conn, after_id))
+        if after_id == 0 and tahan.is_set():
+            tahan.clear()
+            mulai.set()
+            lanjut.wait(5)          # rebuild sudah membaca database, belum menukar index
+        return rows
+
+    index = PrefixIndex("buku", ["buku"], loader_lambat)
+    index.rebuild()
+    tahan.set()
+    rebuild = threading.Thread(target=index.rebuild)
+    rebuild.start()
+    mulai.wait(5)
+
+    BukuModel.create("B900", "Buku Baru")
+    baris_baru = threading.Thread(target=index._load_new_rows)
+    baris_baru.start()
+    baris_baru.join(0.2)            # harus menunggu rebuild selesai
+    lanjut.set()
+    rebuild.join(5)
+    baris_baru.join(5)
+
+    prefix = [s["data"]["kode_buku"] for s in index.suggest("buku baru") if not s["fuzzy"]]
+    assert prefix == ["B900"]
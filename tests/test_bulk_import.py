@@ -0,0 +1,75 @@
+# tests/test_bulk_import.py
+# Import massal CSV / XLSX (bulk_import.py)
+
+import io
+
+import openpyxl
+import pytest
+
+from bulk_import import BulkImportError, errors_to_csv, import_file
+from models import BaseModel, BukuModel, SiswaModel
+
+
+def _csv(text: str):
+    return io.BytesIO(text.encode("utf-8"))
+
+
+def test_upsert_buku_berdasarkan_kode(db):
+    assert len(BukuModel.get_all()) == 5          # isi cache sebelum import
+    result = import_file(_csv(
+        "Kode,Judul\n"
+        "B001,Laskar Pelangi\n"          # sama persis: tidak dihitung berubah
+        "B002,Bumi Manusia (Cetakan 2)\n"
+        "B900,Buku Baru\n"
+        ",Tanpa Kode\n"
+    ), "katalog.csv", "buku")
+
+    assert result["valid"] == 3
+    assert result["changed"] == 2
+    assert result["errors"] == [{"baris": 5, "pesan": "kode_buku kosong"}]
+    assert BukuModel.get_by_kode("B002")["nama"] == "Bumi Manusia (Cetakan 2)"
+    assert len(BukuModel.get_all()) == 6          # cache buku sudah diinvalidasi
+    assert list(BukuModel.search("cetakan")["kode_buku"]) == ["B002"]
+
+
+def test_import_ulang_tidak_menggandakan_siswa(db):
+    data = "nama,kelas\nRina Lestari,12 IPA 1\nBudi Santoso,10 IPA 1\nRina Lestari,12 IPA 1\n"
+    first = import_file(_csv(data), "siswa.csv", "siswa")
+    assert first["changed"] == 1
+    second = import_file(_csv(data), "siswa.csv", "siswa")
+    assert second["changed"] == 0
+
+    rina = SiswaModel.search("rina")
+    assert list(rina["nama_kelas"]) == ["12 IPA 1"]
+    kelas = BaseModel.execute_query(
+        "SELECT COUNT(*) FROM kelas WHERE nama_kelas = '12 IPA 1'", fetch_one=True)[0]
+    assert kelas == 1
+
+
+def test_import_xlsx(db):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["nama_kelas"])
+    sheet.append(["12 IPS 1"])
+    sheet.append([None])
+    sheet.append(["12 IPS 2"])
+    stream = io.BytesIO()
+    workbook.save(stream)
+    stream.seek(0)
+
+    result = import_file(stream, "kelas.xlsx", "kelas")
+    assert (result["valid"], result["changed"], result["errors"]) == (2, 2, [])
+
+
+def test_file_tidak_valid(db):
+    with pytest.raises(BulkImportError, match="tidak didukung"):
+        import_file(_csv("a,b\n"), "data.txt", "buku")
+    with pytest.raises(BulkImportError):
+        import_file(_csv("judul\nTanpa kolom kode\n"), "buku.csv", "buku")
+    with pytest.raises(BulkImportError, match="tidak dikenal"):
+        import_file(_csv("x\n"), "x.csv", "anggota")
+
+
+def test_errors_to_csv():
+    assert errors_to_csv([{"baris": 3, "pesan": "nama_siswa kosong"}]).splitlines() == [
+        "baris,pesan", "3,nama_siswa kosong"]
@@ -0,0 +1,81 @@
+# tests/test_database.py
+# Connection pool (database.py)
+
+import threading
+
+import pytest
+
+from database import ConnectionPool, DatabaseConnection, PoolTimeoutError
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    yield pool
+    pool.close_all()
+
+
+def test_connection_dipakai_ulang(pool):
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert pool.stats()["created"] == 1
+
+
+def test_pool_terbatas_dan_timeout(pool):
+    a = pool.acquire()
+    b = pool.acquire()
+    assert pool.stats() == {"max_size": 2, "created": 2, "idle": 0, "in_use": 2}
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    pool.release(a)
+    assert pool.acquire() is a
+    pool.release(a)
+    pool.release(b)
+
+
+def test_menunggu_koneksi_yang_dikembalikan(pool):
+    a = pool.acquire()
+    b = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(a,)).start()
+    assert pool.acquire() is a
+    pool.release(a)
+    pool.release(b)
+
+
+def test_commit_jika_sukses_rollback_jika_error(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise ValueError("gagal")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT x FROM t").fetchall() == [(1,)]
+
+
+def test_release_membatalkan_transaksi_terbuka(pool):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO t VALUES (3)")
+    assert conn.in_transaction
+    pool.release(conn)
+    assert not conn.in_transaction
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_pool_tertutup(pool):
+    pool.close_all()
+    assert pool.stats()["created"] == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_initialize_database_mengaktifkan_wal(db):
+    with DatabaseConnection.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
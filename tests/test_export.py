@@ -0,0 +1,33 @@
+# tests/test_export.py
+# Export CSV / XLSX / PDF (export.py) dan data untuk st.download_button
+
+import io
+
+import openpyxl
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from export import FORMATS, ExportError, export_bytes, export_file
+
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_data_diterima_download_button(db, fmt):
+    ditolak = TypeError("data tidak didukung")
+    # File sementara dari export_file tidak diterima download_button
+    with export_file("buku", fmt) as exported, pytest.raises(TypeError):
+        convert_data_to_bytes_and_infer_mime(exported, ditolak)
+
+    data = export_bytes("buku", fmt)
+    assert convert_data_to_bytes_and_infer_mime(data, ditolak)[0] == data
+    assert data.startswith({"csv": b"\xef\xbb\xbfid_buku", "xlsx": b"PK", "pdf": b"%PDF"}[fmt])
+
+
+def test_isi_export(db):
+    rows = export_bytes("peminjaman", "csv", "dipinjam").decode("utf-8-sig").splitlines()
+    assert len(rows) == 3                   # header + 2 peminjaman aktif
+
+    sheet = openpyxl.load_workbook(io.BytesIO(export_bytes("buku", "xlsx"))).active
+    assert [cell.value for cell in sheet["B"]][1:] == ["B001", "B002", "B003", "B004", "B005"]
+
+    with pytest.raises(ExportError):
+        export_bytes("buku", "docx")
@@ -0,0 +1,59 @@
+# tests/test_jatuh_tempo.py
+# Tanggal jatuh tempo, daftar terlambat dan denda (migrasi 6, PeminjamanModel)
+
+from database import DatabaseConnection
+from migrations import LAMA_PINJAM_HARI, run_migrations
+from models import LoanService, PeminjamanModel
+
+
+def test_backfill_jatuh_tempo_data_lama(baseline_conn):
+    run_migrations(baseline_conn)
+    rows = baseline_conn.execute("""
+        SELECT tanggal_pinjam, tanggal_jatuh_tempo FROM peminjaman ORDER BY id_peminjaman
+    """).fetchall()
+    assert rows == [("2025-01-06", "2025-01-09"), ("2025-01-20", "2025-01-23"),
+                    ("2025-02-03", "2025-02-06"), ("2025-02-10", "2025-02-13")]
+
+
+def test_penulis_lain_tanpa_jatuh_tempo(db):
+    with DatabaseConnection.connection() as conn:
+        conn.execute("""
+            INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, status)
+            VALUES (2, 5, '2025-12-30', 'dipinjam')
+        """)
+        assert conn.execute(
+            "SELECT tanggal_jatuh_tempo FROM peminjaman ORDER BY id_peminjaman DESC LIMIT 1"
+        ).fetchone() == ("2026-01-02",)
+
+
+def test_trigger_dan_model_memakai_lama_pinjam_yang_sama(db):
+    with DatabaseConnection.connection() as conn:
+        conn.execute("""
+            INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, status)
+            VALUES (3, 5, '2025-03-01', 'dipinjam')
+        """)
+        dari_trigger = conn.execute(
+            "SELECT tanggal_jatuh_tempo FROM peminjaman ORDER BY id_peminjaman DESC LIMIT 1"
+        ).fetchone()[0]
+    assert dari_trigger == PeminjamanModel.due_date("2025-03-01")
+    assert LAMA_PINJAM_HARI == 3        # nilai saat migrasi 6 dirilis
+
+
+def test_daftar_terlambat_dan_denda(db):
+    # Aktif di data contoh: pinjam 2025-01-20 (tempo 01-23) dan 2025-02-10 (tempo 02-13)
+    assert PeminjamanModel.get_overdue("2025-01-23").empty
+    assert PeminjamanModel.count_overdue("2025-01-23") == 0
+
+    df = PeminjamanModel.get_overdue("2025-02-15")
+    assert list(df["kode_buku"]) == ["B002", "B004"]
+    assert list(df["hari_terlambat"]) == [23, 2]
+    assert list(df["denda"]) == [23000, 2000]
+    assert PeminjamanModel.count_overdue("2025-02-15") == 2
+
+    LoanService.return_by_kode_buku("B002")
+    assert list(PeminjamanModel.get_overdue("2025-02-15")["kode_buku"]) == ["B004"]
+
+
+def test_due_date():
+    assert PeminjamanModel.due_date("2025-02-27") == "2025-03-02"
+    assert PeminjamanModel.due_date("2024-02-27") == "2024-03-01"
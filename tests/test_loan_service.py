@@ -0,0 +1,78 @@
+# tests/test_loan_service.py
+# Transaksi peminjaman dan pengembalian (LoanService)
+
+import pytest
+
+from models import BaseModel, LoanError, LoanService, PeminjamanModel, SiswaModel
+
+
+def _count(table):
+    return BaseModel.execute_query(f"SELECT COUNT(*) FROM {table}", fetch_one=True)[0]
+
+
+def test_checkout_siswa_dan_kelas_baru(db):
+    hasil = LoanService.checkout("Rina Lestari", "12 IPA 1", "B003", "2025-03-03", 1)
+
+    assert hasil["nama_buku"] == "Negeri 5 Menara"
+    assert hasil["tanggal_jatuh_tempo"] == "2025-03-06"
+    row = BaseModel.execute_query("""
+        SELECT s.nama_siswa, k.nama_kelas, p.status, p.id_kelas
+        FROM peminjaman p JOIN siswa s ON s.id_siswa = p.id_siswa
+        JOIN kelas k ON k.id_kelas = s.id_kelas
+        WHERE p.id_peminjaman = ?
+    """, (hasil["id_peminjaman"],), fetch_one=True)
+    assert row == ("Rina Lestari", "12 IPA 1", "dipinjam", hasil["id_kelas"])
+
+
+def test_checkout_memakai_siswa_yang_ada(db):
+    siswa = _count("siswa")
+    hasil = LoanService.checkout("Budi Santoso", "10 IPA 1", "B005", "2025-03-03", 1)
+    assert hasil["id_siswa"] == 1
+    assert _count("siswa") == siswa
+
+
+def test_checkout_gagal_tidak_meninggalkan_data(db):
+    sebelum = {table: _count(table) for table in ("kelas", "siswa", "peminjaman")}
+    with pytest.raises(LoanError, match="Buku tidak ditemukan"):
+        LoanService.checkout("Siswa Baru", "Kelas Baru", "TIDAK-ADA", "2025-03-03", 1)
+    assert {table: _count(table) for table in sebelum} == sebelum
+
+
+def test_checkout_by_codes_menolak_buku_yang_masih_dipinjam(db):
+    assert SiswaModel.get_by_kode("S00003")["nama"] == "Dimas Pratama"
+    hasil = LoanService.checkout_by_codes("S00003", "B005", "2025-03-03", 1)
+    assert hasil["nama_siswa"] == "Dimas Pratama"
+
+    with pytest.raises(LoanError, match="masih tercatat dipinjam"):
+        LoanService.checkout_by_codes("S00003", "B005", "2025-03-04", 1)
+    with pytest.raises(LoanError, match="Kartu siswa tidak dikenal"):
+        LoanService.checkout_by_codes("S99999", "B001", "2025-03-04", 1)
+
+
+def test_pengembalian_dan_denda(db):
+    hasil = LoanService.checkout_by_codes("S00001", "B003", "2020-01-01", 1)
+
+    kembali = LoanService.return_by_kode_buku("B003")
+    assert kembali["id_peminjaman"] == hasil["id_peminjaman"]
+    assert kembali["hari_terlambat"] > 0
+    assert kembali["denda"] == kembali["hari_terlambat"] * 1000
+
+    with pytest.raises(LoanError, match="Tidak ada peminjaman aktif"):
+        LoanService.return_by_kode_buku("B003")
+    with pytest.raises(LoanError, match="sudah dikembalikan"):
+        LoanService.return_by_id(hasil["id_peminjaman"])
+    with pytest.raises(LoanError, match="tidak ditemukan"):
+        LoanService.return_by_id(9999)
+
+
+def test_pengembalian_terlihat_di_daftar_aktif(db):
+    aktif = set(PeminjamanModel.get_active_loans()["id_peminjaman"])
+    id_peminjaman = min(aktif)
+    LoanService.return_by_id(int(id_peminjaman))
+    assert set(PeminjamanModel.get_active_loans()["id_peminjaman"]) == aktif - {id_peminjaman}
+
+
+def test_calculate_fine():
+    assert LoanService.calculate_fine("2025-01-10", "2025-01-10") == {"hari_terlambat": 0, "denda": 0}
+    assert LoanService.calculate_fine("2025-01-10", "2025-01-08") == {"hari_terlambat": 0, "denda": 0}
+    assert LoanService.calculate_fine("2025-01-10", "2025-01-13") == {"hari_terlambat": 3, "denda": 3000}
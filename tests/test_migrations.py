@@ -0,0 +1,61 @@
+# tests/test_migrations.py
+# Migrasi skema (migrations.py) pada database berskema dasar
+
+import sqlite3
+
+import pytest
+
+from conftest import create_baseline
+from migrations import MIGRATIONS, MigrationError, get_applied_versions, run_migrations
+
+
+def _schema(conn):
+    return conn.execute(
+        "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+    ).fetchall()
+
+
+def test_migrasi_berjalan_sekali(baseline_conn):
+    versions = [m[0] for m in MIGRATIONS]
+    assert run_migrations(baseline_conn) == sorted(versions)
+    schema = _schema(baseline_conn)
+
+    assert run_migrations(baseline_conn) == []
+    assert _schema(baseline_conn) == schema
+    assert get_applied_versions(baseline_conn) == set(versions)
+
+
+def test_migrasi_bertahap_sama_dengan_sekaligus(baseline_conn):
+    for count in range(1, len(MIGRATIONS) + 1):
+        run_migrations(baseline_conn, MIGRATIONS[:count])
+
+    fresh = sqlite3.connect(":memory:")
+    create_baseline(fresh)
+    run_migrations(fresh)
+    assert _schema(baseline_conn) == _schema(fresh)
+
+
+def test_index_lookup_dibuat(baseline_conn):
+    run_migrations(baseline_conn)
+    indexes = {row[0] for row in baseline_conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_buku_kode", "idx_siswa_nama_kelas", "idx_kelas_nama",
+            "idx_peminjaman_status"} <= indexes
+
+
+def test_kode_buku_kosong_bukan_duplikat(baseline_conn):
+    # UNIQUE index SQLite mengizinkan banyak NULL
+    baseline_conn.executemany("INSERT INTO buku (kode_buku, nama_buku) VALUES (NULL, ?)",
+                              [("Tanpa Kode 1",), ("Tanpa Kode 2",)])
+    baseline_conn.commit()
+    assert 1 in run_migrations(baseline_conn)
+
+
+def test_migrasi_gagal_di_rollback(baseline_conn):
+    baseline_conn.execute("INSERT INTO buku (kode_buku, nama_buku) VALUES ('B001', 'Duplikat')")
+    baseline_conn.commit()
+
+    with pytest.raises(MigrationError, match="kode_buku duplikat"):
+        run_migrations(baseline_conn)
+    assert get_applied_versions(baseline_conn) == set()
+    assert not baseline_conn.in_transaction
@@ -0,0 +1,93 @@
+# tests/test_models.py
+# Model dan pencarian (models.py) lewat connection pool
+
+from database import DatabaseConnection
+from models import BaseModel, BukuModel, PeminjamanModel, SiswaModel
+
+
+def test_fts_query():
+    assert BaseModel.fts_query("bumi man") == '"bumi"* "man"*'
+    assert BaseModel.fts_query("  -- ") is None
+
+
+def test_cari_buku_data_lama_dan_prefix(db):
+    # Data yang sudah ada sebelum migrasi ikut ter-index (rebuild)
+    assert list(BukuModel.search("bumi")["kode_buku"]) == ["B002"]
+    assert list(BukuModel.search("sej fil")["kode_buku"]) == ["B005"]
+    assert list(BukuModel.search("B003")["nama_buku"]) == ["Negeri 5 Menara"]
+    assert BukuModel.search("???").empty
+
+
+def test_index_fts_mengikuti_perubahan(db):
+    BukuModel.create("B006", "Ayat-Ayat Cinta")
+    assert list(BukuModel.search("ayat")["kode_buku"]) == ["B006"]
+
+    BaseModel.execute_query("UPDATE buku SET nama_buku = 'Pulang' WHERE kode_buku = 'B006'")
+    assert BukuModel.search("ayat").empty
+    assert list(BukuModel.search("pulang")["kode_buku"]) == ["B006"]
+
+    BukuModel.delete("B006")
+    assert BukuModel.search("pulang").empty
+
+
+def test_cari_siswa_tanpa_diakritik(db):
+    SiswaModel.create("Zoë Anggraini", 2)
+    hasil = SiswaModel.search("zoe")
+    assert list(hasil["nama_siswa"]) == ["Zoë Anggraini"]
+    assert list(hasil["nama_kelas"]) == ["11 IPS 3"]
+
+
+def _walk(get_page, key, page_size, **kwargs):
+    """Telusuri semua halaman maju lalu mundur lagi. Return (halaman maju, halaman mundur)."""
+    forward, cursor = [], None
+    while True:
+        page = get_page(cursor=cursor, direction="next", page_size=page_size, **kwargs)
+        ids = list(page["data"][key])
+        forward.append(ids)
+        if not page["has_next"]:
+            break
+        cursor = ids[-1]
+
+    backward = [forward[-1]]
+    while True:
+        page = get_page(cursor=backward[-1][0], direction="prev", page_size=page_size, **kwargs)
+        if not page["has_prev"] and page["data"].empty:
+            break
+        backward.append(list(page["data"][key]))
+        if not page["has_prev"]:
+            break
+    return forward, backward[::-1]
+
+
+def test_keyset_pagination_buku(db):
+    with DatabaseConnection.connection() as conn:
+        conn.executemany("INSERT INTO buku (kode_buku, nama_buku) VALUES (?, ?)",
+                         [(f"X{i:03d}", f"Buku {i}") for i in range(18)])
+        conn.execute("DELETE FROM buku WHERE kode_buku IN ('X004', 'X010')")  # celah id
+    semua = [row[0] for row in BaseModel.execute_query("SELECT id_buku FROM buku ORDER BY id_buku")]
+
+    forward, backward = _walk(BukuModel.get_page, "id_buku", 5)
+    assert [i for page in forward for i in page] == semua
+    assert all(len(page) == 5 for page in forward[:-1])
+    assert backward == forward
+
+    pertama = BukuModel.get_page(page_size=5)
+    assert pertama["has_prev"] is False and pertama["has_next"] is True
+
+
+def test_keyset_pagination_peminjaman_terbaru_dulu(db):
+    with DatabaseConnection.connection() as conn:
+        conn.executemany("""
+            INSERT INTO peminjaman (id_siswa, id_buku, tanggal_pinjam, status)
+            VALUES (?, ?, '2025-03-01', ?)
+        """, [(1 + i % 3, 1 + i % 5, "dipinjam" if i % 2 else "dikembalikan")
+              for i in range(17)])
+
+    for status in ("ALL", "dipinjam", "dikembalikan"):
+        where = "" if status == "ALL" else f"WHERE status = '{status}'"
+        semua = [row[0] for row in BaseModel.execute_query(
+            f"SELECT id_peminjaman FROM peminjaman {where} ORDER BY id_peminjaman DESC")]
+        forward, backward = _walk(PeminjamanModel.get_page, "id_peminjaman", 4,
+                                  status_filter=status)
+        assert [i for page in forward for i in page] == semua
+        assert backward == forward
@@ -0,0 +1,86 @@
+# tests/test_query_cache.py
+# Cache query dengan invalidasi versi tabel (query_cache.py)
+
+import sqlite3
+import time
+
+import query_cache as query_cache_module
+from models import BukuModel, KelasModel, PeminjamanModel
+from query_cache import (QueryCache, invalidate_tables, on_tables_changed, query_cache,
+                         tables_written)
+
+
+def test_tables_written():
+    assert tables_written("INSERT INTO buku (kode_buku) VALUES (?)") == ["buku"]
+    assert tables_written("  insert or ignore into Kelas VALUES (1)") == ["kelas"]
+    assert tables_written('UPDATE "siswa" SET nama_siswa = ?') == ["siswa"]
+    assert tables_written("DELETE FROM peminjaman WHERE id_peminjaman = 1") == ["peminjaman"]
+    assert tables_written("SELECT * FROM buku") == []
+
+
+def test_lru_dan_ttl():
+    cache = QueryCache(max_entries=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)                       # "b" paling lama tidak dipakai
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    time.sleep(0.06)
+    assert cache.get("a") == (False, None)
+
+
+def test_hasil_cache_dipakai_sampai_tabel_diinvalidasi(db):
+    BukuModel.get_all()
+    hits = query_cache.stats()["hits"]
+
+    invalidate_tables("siswa")              # tabel lain: cache buku tetap
+    BukuModel.get_all()
+    assert query_cache.stats()["hits"] == hits + 1
+
+    invalidate_tables("buku")
+    BukuModel.get_all()
+    assert query_cache.stats()["hits"] == hits + 1
+
+
+def test_perubahan_dari_proses_lain(db, monkeypatch):
+    monkeypatch.setattr(query_cache_module, "_listeners", [])
+    changed = []
+    on_tables_changed(changed.append)
+    assert len(BukuModel.get_all()) == 5
+
+    # Koneksi terpisah di luar pool, seperti API atau import CLI
+    other = sqlite3.connect(db)
+    other.execute("INSERT INTO buku (kode_buku, nama_buku) VALUES ('B100', 'Dari Proses Lain')")
+    other.commit()
+    assert len(BukuModel.get_all()) == 6
+    assert changed == [("buku",)]
+
+    # Arah sebaliknya: tulis lewat model terlihat oleh koneksi lain,
+    # dan tidak dilaporkan ulang sebagai perubahan dari luar
+    BukuModel.create("B101", "Dari Aplikasi")
+    assert other.execute("SELECT versi FROM table_versions WHERE nama = 'buku'").fetchone()[0] == 2
+    assert len(BukuModel.get_all()) == 7
+    assert changed == [("buku",), ("buku",)]
+    other.close()
+
+
+def test_tulis_lewat_model_menginvalidasi_cache(db):
+    assert BukuModel.get_by_kode("B900") is None
+    BukuModel.create("B900", "Buku Baru")
+    assert BukuModel.get_by_kode("B900")["nama"] == "Buku Baru"
+
+    kelas = KelasModel.get_all()
+    KelasModel.get_or_create("12 IPA 2")
+    assert len(KelasModel.get_all()) == len(kelas) + 1
+
+    aktif = len(PeminjamanModel.get_active_loans())
+    PeminjamanModel.return_book(int(PeminjamanModel.get_active_loans()["id_peminjaman"][0]))
+    assert len(PeminjamanModel.get_active_loans()) == aktif - 1
+
+
+def test_hasil_cache_berupa_salinan(db):
+    df = BukuModel.get_all()
+    df.loc[0, "nama_buku"] = "Diubah pemanggil"
+    assert BukuModel.get_all().loc[0, "nama_buku"] == "Laskar Pelangi"
+    assert query_cache.stats()["hits"] >= 1
@@ -0,0 +1,30 @@
+# tests/test_vps_sync.py
+# Memasang database hasil restore (tanpa koneksi VPS)
+
+import sqlite3
+
+import autocomplete
+from conftest import create_baseline
+from database import get_database_settings
+from models import BukuModel
+from vps_sync import VPSSyncManager
+
+
+def test_restore_skema_lama_dimigrasi_dan_cache_dibuang(db, tmp_path):
+    assert len(BukuModel.get_all()) == 5
+    assert autocomplete.suggest("buku", "laskar")[0]["data"]["kode_buku"] == "B001"
+
+    # Backup lama: skema dasar belum dimigrasi, isi berbeda
+    backup = str(tmp_path / "backup.db")
+    conn = sqlite3.connect(backup)
+    create_baseline(conn)
+    conn.execute("DELETE FROM buku WHERE kode_buku = 'B001'")
+    conn.commit()
+    conn.close()
+
+    VPSSyncManager._install_local(backup, db)
+
+    assert get_database_settings()["schema_version"] == 9
+    assert len(BukuModel.get_all()) == 4
+    assert BukuModel.get_by_kode("B001") is None
+    assert autocomplete.suggest("buku", "laskar") == []
@@ -1,13 +1,91 @@
 # vps_sync.py
 # File ini terpisah dari perpustakaan.py
 # Tinggal tempel dan import ke perpustakaan.py
+#
+# Pemakaian CLI (setting dari environment VPS_HOST, VPS_USER, VPS_PASS, ...):
+#   python vps_sync.py generations
+#   python vps_sync.py restore 20250310-140000
 
 import paramiko
+import argparse
 import os
+import gzip
+import json
+import shlex
+import sys
+import hashlib
 import sqlite3
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+# Ukuran blok untuk sync incremental (kelipatan page size SQLite)
+BLOCK_SIZE = 64 * 1024
+
+# Potongan transfer upload/download (resume dari offset terakhir yang diterima)
+TRANSFER_CHUNK = 1024 * 1024
+
+
+def compute_manifest(path, block_size=BLOCK_SIZE):
+    """Hitung SHA-256 setiap blok file database (dan SHA-256 seluruh file)"""
+    blocks = []
+    whole = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            blocks.append(hashlib.sha256(data).hexdigest())
+            whole.update(data)
+    return {
+        'block_size': block_size,
+        'size': os.path.getsize(path),
+        'blocks': blocks,
+        'sha256': whole.hexdigest(),
+    }
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(TRANSFER_CHUNK), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def select_generations_to_keep(generation_ids, hourly=24, daily=7, weekly=8):
+    """Kebijakan retensi: generasi terbaru per jam (`hourly` jam terakhir yang
+    punya backup), per hari dan per minggu. Generasi terbaru selalu disimpan.
+    ID generasi berformat YYYYmmdd-HHMMSS."""
+    ordered = sorted(generation_ids, reverse=True)
+    keep = set(ordered[:1])
+    
+    rules = [
+        (lambda t: t.strftime('%Y%m%d%H'), hourly),
+        (lambda t: t.strftime('%Y%m%d'), daily),
+        (lambda t: t.strftime('%G%V'), weekly),  # minggu ISO
+    ]
+    for bucket_of, limit in rules:
+        seen = set()
+        for generation_id in ordered:
+            if len(seen) >= limit:
+                break
+            bucket = bucket_of(datetime.strptime(generation_id, '%Y%m%d-%H%M%S'))
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(generation_id)
+    return keep
+
+
+def manifest_id(manifest):
+    """Sidik jari ringkas seluruh manifest (hash dari daftar hash blok)"""
+    digest = hashlib.sha256()
+    digest.update(f"{manifest['block_size']}:{manifest['size']}:".encode())
+    for block in manifest['blocks']:
+        digest.update(block.encode())
+    return digest.hexdigest()
+
 class VPSSyncManager:
     """Manager untuk sinkronisasi database ke VPS"""
     
@@ -20,6 +98,24 @@ class VPSSyncManager:
         self.sftp = None
         self.last_sync = None
         self.sync_count = 0
+        self.last_transfer_bytes = 0
+        
+        # Sesi SSH persisten + worker sync di background
+        self.persistent = False
+        self.keepalive = 30
+        self._io_lock = threading.RLock()   # satu operasi SFTP pada satu waktu
+        self._cond = threading.Condition()
+        self._worker = None
+        self._stop = False
+        self._pending = 0
+        self._first_request = 0.0
+        self._last_request = 0.0
+        self._retry_at = None
+        self.last_error = None
+        self.last_result = None
+        self._remote_tools = None           # VPS punya sha256sum/gzip/cp?
+        self.last_backup = None
+        self.backup_dir = None              # diisi start_background_sync
     
     def connect(self):
         """Buat koneksi SSH/SFTP ke VPS"""
@@ -31,7 +127,8 @@ class VPSSyncManager:
                 port=self.vps_port,
                 username=self.vps_user,
                 password=self.vps_pass,
-                timeout=10
+                timeout=10,
+                compress=True  # kompresi zlib di level SSH
             )
             self.sftp = self.ssh.open_sftp()
             print(f"✓ [VPS] Koneksi berhasil ke {self.vps_host}")
@@ -57,62 +154,753 @@ class VPSSyncManager:
         except Exception as e:
             print(f"⚠ [VPS] Error saat disconnect: {e}")
     
+    # ------------------------------------------------------------
+    # SNAPSHOT KONSISTEN (SQLite backup API)
+    # ------------------------------------------------------------
+    @staticmethod
+    def _snapshot_path(local_db_path):
+        return local_db_path + '.snapshot'
+    
+    def create_snapshot(self, local_db_path, pages=256, sleep=0.005):
+        """Salin database yang sedang dipakai aplikasi secara konsisten.
+        
+        Koneksi sumber membuka satu transaksi baca, jadi di mode WAL
+        backup membaca satu versi database yang tetap, sementara aplikasi
+        tetap bisa menulis (tanpa transaksi itu backup akan diulang dari awal
+        setiap ada commit dari koneksi lain). Backup menyalin `pages` halaman
+        per langkah dan jeda `sleep` detik di antaranya.
+        Salinan dibuat per halaman (bukan VACUUM INTO) agar susunan bloknya
+        sama dengan sumber dan sync incremental tetap efektif.
+        """
+        snapshot_path = self._snapshot_path(local_db_path)
+        tmp_path = snapshot_path + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        
+        source = sqlite3.connect(local_db_path, timeout=30, isolation_level=None)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages, sleep=sleep)
+            source.execute("COMMIT")
+            check = target.execute("PRAGMA quick_check").fetchone()[0]
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"quick_check snapshot: {check}")
+        finally:
+            target.close()
+            source.close()
+        
+        os.replace(tmp_path, snapshot_path)
+        return snapshot_path
+    
+    def _remove_snapshot(self, local_db_path):
+        try:
+            os.remove(self._snapshot_path(local_db_path))
+        except OSError:
+            pass
+    
+    def _ensure_remote_folder(self, remote_db_path):
+        remote_folder = remote_db_path.rsplit('/', 1)[0]
+        try:
+            self.sftp.stat(remote_folder)
+        except IOError:
+            # Folder belum ada, buat folder
+            self.sftp.mkdir(remote_folder)
+            print(f"✓ [VPS] Folder dibuat: {remote_folder}")
+    
+    # ------------------------------------------------------------
+    # TRANSFER: kompresi, resume, verifikasi checksum, rename atomik
+    # ------------------------------------------------------------
+    def _remote_exec(self, command, timeout=600):
+        """Jalankan perintah shell di VPS, return stdout (raise IOError jika gagal)"""
+        stdin, stdout, stderr = self.ssh.exec_command(command, timeout=timeout)
+        output = stdout.read()
+        status = stdout.channel.recv_exit_status()
+        if status != 0:
+            message = stderr.read().decode(errors='replace').strip()
+            raise IOError(f"Perintah VPS gagal ({status}): {message}")
+        return output.decode(errors='replace')
+    
+    def _has_remote_tools(self):
+        """Cek sekali apakah VPS bisa menjalankan sha256sum, gzip dan cp"""
+        if self._remote_tools is None:
+            try:
+                self._remote_exec("command -v sha256sum && command -v gzip && command -v cp")
+                self._remote_tools = True
+            except Exception:
+                self._remote_tools = False
+                print("⚠ [VPS] sha256sum/gzip tidak tersedia di VPS, transfer tanpa kompresi")
+        return self._remote_tools
+    
+    def _remote_sha256(self, remote_path):
+        return self._remote_exec(f"sha256sum {shlex.quote(remote_path)}").split()[0]
+    
+    def _remote_size(self, remote_path):
+        try:
+            return self.sftp.stat(remote_path).st_size
+        except IOError:
+            return None
+    
+    def _replace_remote(self, tmp_path, remote_path):
+        """Ganti file live di VPS secara atomik"""
+        try:
+            self.sftp.posix_rename(tmp_path, remote_path)
+        except IOError:
+            # Server tanpa ekstensi posix-rename
+            if self._remote_size(remote_path) is not None:
+                self.sftp.remove(remote_path)
+            self.sftp.rename(tmp_path, remote_path)
+    
+    @staticmethod
+    def _compress(source_path):
+        """Kompres gzip secara streaming. mtime=0 supaya hasilnya deterministik:
+        snapshot yang sama menghasilkan file .gz yang sama, sehingga upload
+        yang terputus bisa dilanjutkan."""
+        target = source_path + '.gz'
+        with open(source_path, 'rb') as src, open(target, 'wb') as raw, \
+                gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) as gz:
+            for data in iter(lambda: src.read(TRANSFER_CHUNK), b''):
+                gz.write(data)
+        return target
+    
+    def _upload_resumable(self, local_path, remote_path):
+        """Upload per potongan; jika file parsial sudah ada di VPS, lanjutkan dari ukurannya"""
+        size = os.path.getsize(local_path)
+        offset = self._remote_size(remote_path) or 0
+        if offset > size:
+            self.sftp.remove(remote_path)
+            offset = 0
+        if offset:
+            print(f"✓ [VPS] Melanjutkan upload dari {offset / 1024:.2f} KB")
+        
+        sent = 0
+        with open(local_path, 'rb') as src, \
+                self.sftp.open(remote_path, 'r+b' if offset else 'wb') as dst:
+            dst.set_pipelined(True)
+            src.seek(offset)
+            dst.seek(offset)
+            for data in iter(lambda: src.read(TRANSFER_CHUNK), b''):
+                dst.write(data)
+                sent += len(data)
+        return sent
+    
+    def _cleanup_parts(self, remote_db_path, keep=None):
+        """Hapus file upload parsial lama (snapshot berbeda) milik database ini"""
+        folder, name = remote_db_path.rsplit('/', 1)
+        try:
+            entries = self.sftp.listdir(folder)
+        except IOError:
+            return
+        for entry in entries:
+            path = f"{folder}/{entry}"
+            if entry.startswith(name + '.') and entry.endswith('.part') and path != keep:
+                try:
+                    self.sftp.remove(path)
+                except IOError:
+                    pass
+    
+    def _upload_file(self, source_path, remote_db_path, source_sha256=None):
+        """Upload penuh satu file (sudah berupa snapshot) ke VPS.
+        
+        File dikompres gzip, dikirim per potongan ke file .part (bisa
+        dilanjutkan jika koneksi putus), diverifikasi SHA-256, diekstrak ke
+        file sementara, diverifikasi lagi, lalu di-rename atomik menggantikan
+        file live. File live tidak pernah berisi data setengah jadi.
+        """
+        self._ensure_remote_folder(remote_db_path)
+        source_sha256 = source_sha256 or file_sha256(source_path)
+        tmp_remote = remote_db_path + '.tmp'
+        
+        if self._has_remote_tools():
+            gz_path = self._compress(source_path)
+            try:
+                gz_sha256 = file_sha256(gz_path)
+                part = f"{remote_db_path}.{gz_sha256[:12]}.gz.part"
+                self._cleanup_parts(remote_db_path, keep=part)
+                sent = self._upload_resumable(gz_path, part)
+                
+                if self._remote_sha256(part) != gz_sha256:
+                    self.sftp.remove(part)
+                    raise IOError("Checksum file terkompresi di VPS tidak cocok")
+                self._remote_exec(f"gzip -dc {shlex.quote(part)} > {shlex.quote(tmp_remote)}")
+                self.sftp.remove(part)
+            finally:
+                os.remove(gz_path)
+            
+            if self._remote_sha256(tmp_remote) != source_sha256:
+                self.sftp.remove(tmp_remote)
+                raise IOError("Checksum database di VPS tidak cocok")
+        else:
+            part = tmp_remote + '.part'
+            sent = self._upload_resumable(source_path, part)
+            if self._remote_size(part) != os.path.getsize(source_path):
+                raise IOError("Ukuran file di VPS tidak cocok")
+            self._replace_remote(part, tmp_remote)
+        
+        self._replace_remote(tmp_remote, remote_db_path)
+        self.last_sync = datetime.now()
+        self.sync_count += 1
+        self.last_transfer_bytes = sent
+        
+        file_size = os.path.getsize(source_path) / 1024  # KB
+        print(f"✓ [VPS] Upload berhasil ({file_size:.2f} KB, terkirim "
+              f"{sent / 1024:.2f} KB) - #{self.sync_count}")
+    
     def upload_database(self, local_db_path, remote_db_path):
-        """Upload file database SQLite ke VPS"""
+        """Upload file database SQLite ke VPS (dari snapshot konsisten)"""
         if not os.path.exists(local_db_path):
             print(f"✗ [VPS] File tidak ditemukan: {local_db_path}")
             return False
         
         try:
-            # Pastikan folder di VPS ada
-            remote_folder = remote_db_path.rsplit('/', 1)[0]
-            try:
-                self.sftp.stat(remote_folder)
-            except IOError:
-                # Folder belum ada, buat folder
-                self.sftp.mkdir(remote_folder)
-                print(f"✓ [VPS] Folder dibuat: {remote_folder}")
+            snapshot_path = self.create_snapshot(local_db_path)
+            self._upload_file(snapshot_path, remote_db_path)
+            return True
+            
+        except Exception as e:
+            print(f"✗ [VPS] Upload gagal: {e}")
+            return False
+        finally:
+            self._remove_snapshot(local_db_path)
+    
+    # ------------------------------------------------------------
+    # SYNC INCREMENTAL (hanya blok yang berubah)
+    # ------------------------------------------------------------
+    @staticmethod
+    def _watermark_path(local_db_path):
+        """File lokal yang menyimpan manifest sync terakhir"""
+        return local_db_path + '.sync.json'
+    
+    @staticmethod
+    def _remote_manifest_path(remote_db_path):
+        return remote_db_path + '.manifest.json'
+    
+    def _load_watermark(self, local_db_path, remote_db_path):
+        try:
+            with open(self._watermark_path(local_db_path)) as f:
+                watermark = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if watermark.get('remote_path') != remote_db_path:
+            return None
+        return watermark.get('manifest')
+    
+    def _save_watermark(self, local_db_path, remote_db_path, manifest):
+        path = self._watermark_path(local_db_path)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'remote_path': remote_db_path, 'manifest': manifest,
+                       'synced_at': datetime.now().isoformat()}, f)
+        os.replace(path + '.tmp', path)
+    
+    def _read_remote_manifest(self, remote_db_path):
+        try:
+            with self.sftp.open(self._remote_manifest_path(remote_db_path), 'r') as f:
+                return json.loads(f.read())
+        except (IOError, ValueError):
+            return None
+    
+    def _write_remote_manifest(self, remote_db_path, manifest):
+        # Di VPS cukup disimpan sidik jarinya (beberapa byte), bukan daftar blok lengkap
+        marker = {'manifest_id': manifest_id(manifest), 'size': manifest['size']}
+        with self.sftp.open(self._remote_manifest_path(remote_db_path), 'w') as f:
+            f.write(json.dumps(marker))
+    
+    def upload_database_incremental(self, local_db_path, remote_db_path):
+        """Upload hanya blok yang berubah sejak sync terakhir.
+        
+        Manifest (hash per blok) sync terakhir disimpan di lokal dan di VPS.
+        Jika keduanya tidak cocok (sync pertama, file VPS diubah pihak lain)
+        atau VPS tidak punya cp/sha256sum, otomatis jatuh ke upload penuh.
+        """
+        if not os.path.exists(local_db_path):
+            print(f"✗ [VPS] File tidak ditemukan: {local_db_path}")
+            return False
+        
+        try:
+            source_path = self.create_snapshot(local_db_path)
+            new_manifest = compute_manifest(source_path)
+            old_manifest = self._load_watermark(local_db_path, remote_db_path)
             
-            # Upload file
-            self.sftp.put(local_db_path, remote_db_path)
-            self.last_sync = datetime.now()
-            self.sync_count += 1
+            remote_ok = False
+            if old_manifest and old_manifest.get('block_size') == BLOCK_SIZE:
+                remote_manifest = self._read_remote_manifest(remote_db_path)
+                try:
+                    remote_size = self.sftp.stat(remote_db_path).st_size
+                except IOError:
+                    remote_size = None
+                remote_ok = (remote_manifest is not None
+                             and remote_manifest.get('manifest_id') == manifest_id(old_manifest)
+                             and remote_size == old_manifest['size'])
             
-            file_size = os.path.getsize(local_db_path) / 1024  # KB
-            print(f"✓ [VPS] Upload berhasil ({file_size:.2f} KB) - #{self.sync_count}")
+            if not remote_ok:
+                print("⚠ [VPS] Belum ada manifest sync yang cocok, upload penuh")
+                self._upload_file(source_path, remote_db_path, new_manifest['sha256'])
+            elif not self._has_remote_tools():
+                # Tanpa cp/sha256sum salinan di VPS tidak bisa dibuat dan diverifikasi;
+                # menambal file live langsung bisa merusaknya jika koneksi putus
+                self._upload_file(source_path, remote_db_path, new_manifest['sha256'])
+            else:
+                old_blocks = old_manifest['blocks']
+                changed = [
+                    i for i, digest in enumerate(new_manifest['blocks'])
+                    if i >= len(old_blocks) or old_blocks[i] != digest
+                ]
+                
+                # Tambal salinan file di VPS, bukan file live-nya
+                target = remote_db_path + '.tmp'
+                self._remote_exec(f"cp {shlex.quote(remote_db_path)} {shlex.quote(target)}")
+                
+                sent = 0
+                with open(source_path, 'rb') as local_file, \
+                        self.sftp.open(target, 'r+b') as remote_file:
+                    remote_file.set_pipelined(True)
+                    for index in changed:
+                        offset = index * BLOCK_SIZE
+                        local_file.seek(offset)
+                        data = local_file.read(BLOCK_SIZE)
+                        remote_file.seek(offset)
+                        remote_file.write(data)
+                        sent += len(data)
+                    if new_manifest['size'] < old_manifest['size']:
+                        remote_file.truncate(new_manifest['size'])
+                
+                if self._remote_sha256(target) != new_manifest['sha256']:
+                    self.sftp.remove(target)
+                    raise IOError("Checksum database di VPS tidak cocok")
+                self._replace_remote(target, remote_db_path)
+                
+                self.last_sync = datetime.now()
+                self.sync_count += 1
+                self.last_transfer_bytes = sent
+                print(f"✓ [VPS] Sync incremental: {len(changed)}/{len(new_manifest['blocks'])} "
+                      f"blok ({sent / 1024:.2f} KB) - #{self.sync_count}")
+            
+            self._write_remote_manifest(remote_db_path, new_manifest)
+            self._save_watermark(local_db_path, remote_db_path, new_manifest)
             return True
             
         except Exception as e:
-            print(f"✗ [VPS] Upload gagal: {e}")
+            print(f"✗ [VPS] Sync incremental gagal: {e}")
             return False
+        finally:
+            self._remove_snapshot(local_db_path)
     
     def download_database(self, remote_db_path, local_db_path):
-        """Download file database SQLite dari VPS"""
+        """Download file database SQLite dari VPS.
+        
+        Download per potongan ke file .download (dilanjutkan jika terputus),
+        diverifikasi SHA-256, lalu dipasang lewat SQLite backup API sehingga
+        aman walaupun aplikasi sedang membuka database lokal.
+        """
         try:
-            self.sftp.get(remote_db_path, local_db_path)
+            remote_sha256 = self._remote_sha256(remote_db_path) if self._has_remote_tools() else None
+            remote_size = self.sftp.stat(remote_db_path).st_size
+            suffix = f".{remote_sha256[:12]}" if remote_sha256 else ""
+            part = f"{local_db_path}{suffix}.download"
+            
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if offset > remote_size:
+                offset = 0
+            if offset:
+                print(f"✓ [VPS] Melanjutkan download dari {offset / 1024:.2f} KB")
+            
+            with self.sftp.open(remote_db_path, 'rb') as src, open(part, 'ab' if offset else 'wb') as dst:
+                src.seek(offset)
+                for data in iter(lambda: src.read(TRANSFER_CHUNK), b''):
+                    dst.write(data)
+            
+            if os.path.getsize(part) != remote_size or (
+                    remote_sha256 and file_sha256(part) != remote_sha256):
+                os.remove(part)
+                raise IOError("Checksum hasil download tidak cocok")
+            
+            self._install_local(part, local_db_path)
             print(f"✓ [VPS] Download berhasil: {local_db_path}")
             return True
         except Exception as e:
             print(f"✗ [VPS] Download gagal: {e}")
             return False
     
-    def sync_database(self, local_db_path, remote_db_path):
-        """Sinkronisasi database (upload)"""
+    @staticmethod
+    def _install_local(downloaded_path, local_db_path):
+        """Pasang database hasil download menggantikan database lokal,
+        lalu migrasikan skemanya dan muat ulang cache aplikasi (reload_database)"""
+        from database import reload_database
+        
+        if os.path.exists(local_db_path):
+            # Lewat backup API: menghormati lock & WAL koneksi lain
+            source = sqlite3.connect(downloaded_path)
+            target = sqlite3.connect(local_db_path, timeout=30)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            os.remove(downloaded_path)
+        else:
+            os.replace(downloaded_path, local_db_path)
+        reload_database(local_db_path)
+    
+    # ------------------------------------------------------------
+    # BACKUP BERVERSI (generasi snapshot, deduplikasi per blok)
+    # ------------------------------------------------------------
+    # Struktur di VPS:
+    #   <backup_dir>/chunks/<sha256>.gz       blok 64 KiB terkompresi, dipakai bersama
+    #   <backup_dir>/generations/<id>.json    daftar hash blok satu generasi
+    #   <backup_dir>/index.json               daftar generasi (ringkas)
+    # Blok yang isinya sama hanya disimpan sekali, jadi generasi baru hanya
+    # menambah blok yang berubah.
+    
+    @staticmethod
+    def _generation_cache_dir(local_db_path):
+        """Cache lokal manifest generasi (isinya tidak pernah berubah)"""
+        return local_db_path + '.generations'
+    
+    def _ensure_remote_dirs(self, path):
+        parts = path.rstrip('/').split('/')
+        for i in range(2 if path.startswith('/') else 1, len(parts) + 1):
+            folder = '/'.join(parts[:i])
+            if self._remote_size(folder) is None:
+                self.sftp.mkdir(folder)
+    
+    def _write_remote_json(self, remote_path, data):
+        with self.sftp.open(remote_path + '.tmp', 'w') as f:
+            f.write(json.dumps(data))
+        self._replace_remote(remote_path + '.tmp', remote_path)
+    
+    def _read_remote_json(self, remote_path, default=None):
+        try:
+            with self.sftp.open(remote_path, 'r') as f:
+                return json.loads(f.read())
+        except IOError:
+            return default
+    
+    def list_generations(self, backup_dir):
+        """Daftar generasi backup di VPS, terbaru dulu"""
+        with self._io_lock:
+            if not (self.ensure_connected() if self.persistent else self.connect()):
+                return []
+            try:
+                return self._list_generations(backup_dir)
+            except Exception as e:
+                print(f"✗ [VPS] Gagal membaca daftar backup: {e}")
+                return []
+            finally:
+                if not self.persistent:
+                    self.disconnect()
+    
+    def _list_generations(self, backup_dir):
+        index = self._read_remote_json(f"{backup_dir}/index.json", {'generations': []})
+        return sorted(index['generations'], key=lambda g: g['id'], reverse=True)
+    
+    def _load_generation(self, backup_dir, generation_id, local_db_path):
+        cache_dir = self._generation_cache_dir(local_db_path)
+        cache_path = os.path.join(cache_dir, f"{generation_id}.json")
+        try:
+            with open(cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        
+        generation = self._read_remote_json(f"{backup_dir}/generations/{generation_id}.json")
+        if generation is None:
+            raise IOError(f"Generasi tidak ditemukan: {generation_id}")
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(generation, f)
+        return generation
+    
+    def backup_generation(self, local_db_path, backup_dir, hourly=24, daily=7, weekly=8):
+        """Buat generasi backup baru lalu terapkan kebijakan retensi.
+        Return ID generasi, atau None jika gagal."""
+        with self._io_lock:
+            if not (self.ensure_connected() if self.persistent else self.connect()):
+                return None
+            try:
+                return self._backup_generation(local_db_path, backup_dir, hourly, daily, weekly)
+            except Exception as e:
+                print(f"✗ [VPS] Backup gagal: {e}")
+                return None
+            finally:
+                self._remove_snapshot(local_db_path)
+                if not self.persistent:
+                    self.disconnect()
+    
+    def _backup_generation(self, local_db_path, backup_dir, hourly, daily, weekly):
+        snapshot_path = self.create_snapshot(local_db_path)
+        manifest = compute_manifest(snapshot_path)
+        generation_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        
+        chunk_dir = f"{backup_dir}/chunks"
+        self._ensure_remote_dirs(chunk_dir)
+        self._ensure_remote_dirs(f"{backup_dir}/generations")
+        existing = {name[:-3] for name in self.sftp.listdir(chunk_dir) if name.endswith('.gz')}
+        
+        uploaded = 0
+        sent = 0
+        with open(snapshot_path, 'rb') as f:
+            for index, digest in enumerate(manifest['blocks']):
+                if digest in existing:
+                    continue
+                f.seek(index * BLOCK_SIZE)
+                data = gzip.compress(f.read(BLOCK_SIZE), mtime=0)
+                tmp = f"{chunk_dir}/{digest}.gz.tmp"
+                with self.sftp.open(tmp, 'wb') as remote_file:
+                    remote_file.set_pipelined(True)
+                    remote_file.write(data)
+                self._replace_remote(tmp, f"{chunk_dir}/{digest}.gz")
+                existing.add(digest)
+                uploaded += 1
+                sent += len(data)
+        
+        generation = dict(manifest, id=generation_id, created=datetime.now().isoformat())
+        self._write_remote_json(f"{backup_dir}/generations/{generation_id}.json", generation)
+        cache_dir = self._generation_cache_dir(local_db_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, f"{generation_id}.json"), 'w') as cache:
+            json.dump(generation, cache)
+        
+        generations = [g for g in self._list_generations(backup_dir) if g['id'] != generation_id]
+        generations.append({'id': generation_id, 'created': generation['created'],
+                            'size': manifest['size'], 'sha256': manifest['sha256']})
+        self._write_remote_json(f"{backup_dir}/index.json", {'generations': generations})
+        
+        self.last_backup = datetime.now()
+        print(f"✓ [VPS] Backup {generation_id}: {uploaded} blok baru "
+              f"({sent / 1024:.2f} KB) dari {len(manifest['blocks'])} blok")
+        
+        self.apply_retention(backup_dir, local_db_path, hourly, daily, weekly)
+        return generation_id
+    
+    def apply_retention(self, backup_dir, local_db_path, hourly=24, daily=7, weekly=8):
+        """Hapus generasi di luar kebijakan retensi dan blok yang tidak dipakai lagi"""
+        generations = self._list_generations(backup_dir)
+        keep = select_generations_to_keep([g['id'] for g in generations], hourly, daily, weekly)
+        removed = [g['id'] for g in generations if g['id'] not in keep]
+        if not removed:
+            return 0
+        
+        # Index diperbarui dulu: generasi yang dihapus tidak lagi terlihat untuk restore
+        self._write_remote_json(f"{backup_dir}/index.json",
+                                {'generations': [g for g in generations if g['id'] in keep]})
+        cache_dir = self._generation_cache_dir(local_db_path)
+        for generation_id in removed:
+            try:
+                self.sftp.remove(f"{backup_dir}/generations/{generation_id}.json")
+            except IOError:
+                pass
+            try:
+                os.remove(os.path.join(cache_dir, f"{generation_id}.json"))
+            except OSError:
+                pass
+        
+        referenced = set()
+        for generation_id in keep:
+            referenced.update(self._load_generation(backup_dir, generation_id, local_db_path)['blocks'])
+        chunk_dir = f"{backup_dir}/chunks"
+        deleted = 0
+        for name in self.sftp.listdir(chunk_dir):
+            if name.endswith('.gz') and name[:-3] not in referenced:
+                self.sftp.remove(f"{chunk_dir}/{name}")
+                deleted += 1
+        
+        print(f"✓ [VPS] Retensi: {len(removed)} generasi dan {deleted} blok dihapus")
+        return len(removed)
+    
+    def restore_generation(self, backup_dir, generation_id, local_db_path):
+        """Restore generasi tertentu. Blok yang isinya sudah ada di database
+        lokal diambil dari file lokal; hanya blok yang berbeda yang diunduh."""
+        with self._io_lock:
+            if not (self.ensure_connected() if self.persistent else self.connect()):
+                return False
+            try:
+                generation = self._load_generation(backup_dir, generation_id, local_db_path)
+                
+                # Peta hash -> offset blok yang sudah ada di lokal (dari snapshot konsisten)
+                local_blocks = {}
+                source_path = None
+                if os.path.exists(local_db_path):
+                    source_path = self.create_snapshot(local_db_path)
+                    for index, digest in enumerate(compute_manifest(source_path)['blocks']):
+                        local_blocks.setdefault(digest, index * BLOCK_SIZE)
+                
+                target = local_db_path + '.restore'
+                downloaded = 0
+                with open(target, 'wb') as out:
+                    local_file = open(source_path, 'rb') if source_path else None
+                    try:
+                        for digest in generation['blocks']:
+                            if digest in local_blocks:
+                                local_file.seek(local_blocks[digest])
+                                data = local_file.read(BLOCK_SIZE)
+                            else:
+                                with self.sftp.open(f"{backup_dir}/chunks/{digest}.gz", 'rb') as chunk:
+                                    data = gzip.decompress(chunk.read())
+                                if hashlib.sha256(data).hexdigest() != digest:
+                                    raise IOError(f"Blok rusak di VPS: {digest[:12]}")
+                                downloaded += 1
+                            out.write(data)
+                    finally:
+                        if local_file:
+                            local_file.close()
+                
+                if file_sha256(target) != generation['sha256']:
+                    os.remove(target)
+                    raise IOError("Checksum hasil restore tidak cocok")
+                self._install_local(target, local_db_path)
+                print(f"✓ [VPS] Restore {generation_id} berhasil: {downloaded} dari "
+                      f"{len(generation['blocks'])} blok diunduh")
+                return True
+            except Exception as e:
+                print(f"✗ [VPS] Restore gagal: {e}")
+                return False
+            finally:
+                self._remove_snapshot(local_db_path)
+                if not self.persistent:
+                    self.disconnect()
+    
+    def is_connected(self):
+        transport = self.ssh.get_transport() if self.ssh else None
+        return transport is not None and transport.is_active()
+    
+    def ensure_connected(self):
+        """Pakai sesi yang masih hidup, atau buat koneksi baru (mode persisten)"""
+        if self.is_connected():
+            return True
         if not self.connect():
             return False
-        
-        result = self.upload_database(local_db_path, remote_db_path)
-        self.disconnect()
-        return result
+        self.ssh.get_transport().set_keepalive(self.keepalive)
+        return True
+    
+    def sync_database(self, local_db_path, remote_db_path, incremental=True):
+        """Sinkronisasi database (upload, default hanya blok yang berubah)"""
+        with self._io_lock:
+            if not (self.ensure_connected() if self.persistent else self.connect()):
+                return False
+            
+            if incremental:
+                result = self.upload_database_incremental(local_db_path, remote_db_path)
+            else:
+                result = self.upload_database(local_db_path, remote_db_path)
+            if not self.persistent or not result:
+                # Gagal: tutup sesi supaya percobaan berikutnya konek ulang
+                self.disconnect()
+            return result
     
     def restore_database(self, remote_db_path, local_db_path):
         """Restore database dari VPS"""
-        if not self.connect():
-            return False
+        with self._io_lock:
+            if not (self.ensure_connected() if self.persistent else self.connect()):
+                return False
+            
+            result = self.download_database(remote_db_path, local_db_path)
+            if not self.persistent or not result:
+                self.disconnect()
+            return result
+    
+    # ------------------------------------------------------------
+    # WORKER SYNC DI BACKGROUND
+    # ------------------------------------------------------------
+    def start_background_sync(self, local_db_path, remote_db_path, debounce=10,
+                              max_delay=120, max_backoff=300, keepalive=30,
+                              backup_dir=None, backup_interval=3600):
+        """Jalankan thread yang melakukan sync setelah ada permintaan.
         
-        result = self.download_database(remote_db_path, local_db_path)
-        self.disconnect()
-        return result
+        Permintaan yang datang beruntun digabung: sync dijalankan setelah
+        `debounce` detik tanpa permintaan baru (paling lambat `max_delay`
+        detik sejak permintaan pertama). Jika gagal, dicoba lagi dengan
+        jeda eksponensial sampai `max_backoff` detik.
+        Jika `backup_dir` diisi, setelah sync berhasil dibuat generasi backup
+        paling sering sekali per `backup_interval` detik.
+        """
+        if self._worker and self._worker.is_alive():
+            return
+        self.persistent = True
+        self.keepalive = keepalive
+        self.backup_dir = backup_dir
+        self._stop = False
+        self._worker = threading.Thread(
+            target=self._worker_loop,
+            args=(local_db_path, remote_db_path, debounce, max_delay, max_backoff,
+                  backup_dir, backup_interval),
+            name="vps-sync", daemon=True
+        )
+        self._worker.start()
+        print("✓ [VPS] Worker sync background berjalan")
+    
+    def request_sync(self):
+        """Minta sync (tidak menunggu, aman dipanggil setelah setiap penulisan)"""
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_request = now
+            self._pending += 1
+            self._last_request = now
+            self._cond.notify()
+    
+    def stop_background_sync(self, flush=True, timeout=60):
+        """Hentikan worker; jika flush, permintaan yang tersisa disinkronkan dulu"""
+        with self._cond:
+            self._stop = True
+            if not flush:
+                self._pending = 0
+            self._cond.notify()
+        if self._worker:
+            self._worker.join(timeout)
+        self.persistent = False
+        with self._io_lock:
+            self.disconnect()
+    
+    def _worker_loop(self, local_db_path, remote_db_path, debounce, max_delay, max_backoff,
+                     backup_dir, backup_interval):
+        backoff = 1
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if not self._pending:
+                    break
+                
+                # Debounce: tunggu sampai tidak ada permintaan baru
+                while not self._stop:
+                    now = time.monotonic()
+                    wait = min(self._last_request + debounce,
+                               self._first_request + max_delay) - now
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                batch = self._pending
+                self._pending = 0
+            
+            try:
+                ok = self.sync_database(local_db_path, remote_db_path)
+                error = None if ok else "sync gagal"
+            except Exception as e:
+                ok, error = False, str(e)
+            self.last_result = 'ok' if ok else 'gagal'
+            self.last_error = error
+            
+            if ok:
+                backoff = 1
+                due = (self.last_backup is None or
+                       (datetime.now() - self.last_backup).total_seconds() >= backup_interval)
+                if backup_dir and due:
+                    self.backup_generation(local_db_path, backup_dir)
+                continue
+            
+            # Gagal: kembalikan ke antrian lalu tunggu sebelum mencoba lagi
+            with self._cond:
+                if not self._pending:
+                    self._first_request = time.monotonic()
+                self._pending += batch
+                if self._stop:
+                    break
+                self._retry_at = time.monotonic() + backoff
+                print(f"⚠ [VPS] Sync gagal, coba lagi dalam {backoff} detik")
+                self._cond.wait(backoff)
+                self._retry_at = None
+            backoff = min(backoff * 2, max_backoff)
     
     def test_connection(self):
         """Test koneksi ke VPS (untuk debugging)"""
@@ -134,6 +922,14 @@ class VPSSyncManager:
         status = {
             'last_sync': self.last_sync,
             'sync_count': self.sync_count,
+            'last_transfer_kb': round(self.last_transfer_bytes / 1024, 2),
+            'queue_depth': self._pending,
+            'worker_running': bool(self._worker and self._worker.is_alive()),
+            'connected': self.is_connected(),
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'retry_in': max(0, round(self._retry_at - time.monotonic())) if self._retry_at else None,
+            'last_backup': self.last_backup,
             'last_sync_str': self.last_sync.strftime('%H:%M:%S') if self.last_sync else 'Belum sync'
         }
         return status
@@ -154,4 +950,55 @@ def create_vps_sync(vps_host, vps_user, vps_pass):
             vps_pass='password123'
         )
     """
-    return VPSSyncManager(vps_host, vps_user, vps_pass)
\ No newline at end of file
+    return VPSSyncManager(vps_host, vps_user, vps_pass)
+
+
+def config_from_env():
+    """Setting VPS dari environment (dipakai app.py dan CLI)"""
+    remote_path = os.environ.get("VPS_REMOTE_DB", "/root/perpustakaan/perpustakaan_final.db")
+    return {
+        'host': os.environ.get("VPS_HOST"),
+        'user': os.environ.get("VPS_USER", "root"),
+        'password': os.environ.get("VPS_PASS", ""),
+        'remote_path': remote_path,
+        # Backup berversi (per jam, retensi harian/mingguan) di folder backups/ VPS
+        'backup_dir': os.environ.get("VPS_BACKUP_DIR", os.path.dirname(remote_path) + "/backups"),
+    }
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    from database import DB_PATH
+    
+    parser = argparse.ArgumentParser(description="Backup berversi database perpustakaan di VPS")
+    parser.add_argument("--db", default=DB_PATH, help="path database lokal (default: perpustakaan_final.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("generations", help="daftar generasi backup, terbaru dulu")
+    restore = commands.add_parser("restore", help="pulihkan database lokal dari satu generasi")
+    restore.add_argument("generation", help="ID generasi (lihat perintah generations)")
+    args = parser.parse_args(argv)
+    
+    config = config_from_env()
+    if not config['host']:
+        print("✗ [VPS] VPS_HOST belum diisi")
+        return 1
+    manager = create_vps_sync(config['host'], config['user'], config['password'])
+    
+    if args.command == "generations":
+        generations = manager.list_generations(config['backup_dir'])
+        if not generations:
+            print(f"Belum ada backup di {config['backup_dir']}")
+        for generation in generations:
+            print(f"{generation['id']}  {generation['created'][:19]}  "
+                  f"{generation['size'] / 1024:.0f} KB")
+        return 0
+    
+    ok = manager.restore_generation(config['backup_dir'], args.generation, args.db)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())